@@ -7,102 +7,32 @@ snapshots, and restore functionality.
 """
 
 import os
+import re
+import tarfile
+import tempfile
 import sys
 import subprocess
 import json
 import argparse
+import threading
 import time
-from typing import Dict, List, Optional, Tuple
-
-# Linux distribution configurations organized by family
-LINUX_FAMILIES = {
-    "debian": {
-        "name": "Debian Family",
-        "description": "Debian-based distributions (apt package manager)",
-        "distributions": {
-            "ubuntu": {
-                "name": "Ubuntu 22.04 LTS",
-                "description": "Popular, user-friendly Ubuntu distribution",
-                "container": "ubuntu-vps",
-                "port": 2201,
-                "volume": "ubuntu-persistent"
-            },
-            "debian": {
-                "name": "Debian 12 (Bookworm)",
-                "description": "Stable Debian base distribution",
-                "container": "debian-vps", 
-                "port": 2202,
-                "volume": "debian-persistent"
-            }
-        }
-    },
-    "redhat": {
-        "name": "Red Hat Family",
-        "description": "RHEL-based distributions (yum/dnf package manager)",
-        "distributions": {
-            "rocky": {
-                "name": "Rocky Linux 9",
-                "description": "Enterprise-grade RHEL alternative",
-                "container": "rocky-vps",
-                "port": 2203,
-                "volume": "rocky-persistent"
-            },
-            "centos": {
-                "name": "CentOS Stream 9",
-                "description": "Upstream development platform for RHEL",
-                "container": "centos-vps",
-                "port": 2204,
-                "volume": "centos-persistent"
-            }
-        }
-    },
-    "alpine": {
-        "name": "Alpine Family",
-        "description": "Lightweight distributions (apk package manager)",
-        "distributions": {
-            "alpine": {
-                "name": "Alpine Linux 3.18",
-                "description": "Security-oriented, lightweight Linux",
-                "container": "alpine-vps",
-                "port": 2205,
-                "volume": "alpine-persistent"
-            }
-        }
-    },
-    "suse": {
-        "name": "SUSE Family", 
-        "description": "SUSE-based distributions (zypper package manager)",
-        "distributions": {
-            "opensuse": {
-                "name": "openSUSE Leap 15.5",
-                "description": "Stable SUSE enterprise distribution",
-                "container": "opensuse-vps",
-                "port": 2206,
-                "volume": "opensuse-persistent"
-            }
-        }
-    },
-    "arch": {
-        "name": "Arch Family",
-        "description": "Rolling release distributions (pacman package manager)",
-        "distributions": {
-            "arch": {
-                "name": "Arch Linux",
-                "description": "Rolling release, cutting-edge Linux",
-                "container": "arch-vps",
-                "port": 2207,
-                "volume": "arch-persistent"
-            },
-            "slackware": {
-                "name": "Slackware 15.0",
-                "description": "Veteran Linux distribution",
-                "container": "slackware-vps",
-                "port": 2208,
-                "volume": "slackware-persistent"
-            }
-        }
-    }
-}
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from build_cache import DEFAULT_PKG_CACHE_URL, PKG_CACHE_ENV, proxy_build_args
+from docker_api import DockerAPIError, get_client
+from family_registry import LINUX_FAMILIES, REGISTRY
+from inventory import InventoryCache
+from readiness import wait_for_vps_ready
+from snapshot_index import KIND_STORE, KIND_VOLUME, parse_size
+from snapshot_store import HELPER_IMAGE, SnapshotStore, SnapshotStoreError, format_size
+from volume_archive import (ArchiveError, choose_codec, default_archive_path, export_archive,
+                            import_archive, volume_tar_writer)
+from volume_cleanup import (MAX_OVERLAY_DEPTH, PRE_RESTORE_PREFIX, forget_snapshot, overlay_layers,
+                            prune_volumes, trim_pre_restores)
+from volume_state import VolumeState
 
 class Colors:
     """ANSI color codes for terminal output"""
@@ -134,6 +64,74 @@ def run_command(command: str, capture_output: bool = True, suppress_errors: bool
             print(f"{Colors.RED}Error executing command: {e}{Colors.RESET}")
         return False, str(e)
 
+# Volumes and containers seen by the menus, refreshed with one list call each
+# (sizes only when a menu shows them). Every launcher mutation below invalidates it.
+INVENTORY = InventoryCache(images=False)
+
+def volume_exists(name: str) -> bool:
+    """Check whether a Docker volume with exactly this name exists"""
+    return INVENTORY.get().has_volume(name)
+
+def inspect_volume(name: str) -> Optional[Dict]:
+    """Return live volume details (including driver options), or None if missing"""
+    client = get_client()
+    if client:
+        try:
+            return client.inspect_volume(name)
+        except (DockerAPIError, OSError):
+            pass
+    success, output = run_command(f"docker volume inspect {name}")
+    if not success:
+        return None
+    try:
+        return json.loads(output)[0]
+    except (ValueError, IndexError):
+        return None
+
+def create_volume(name: str, labels: Optional[Dict[str, str]] = None,
+                  driver_opts: Optional[Dict[str, str]] = None) -> bool:
+    """Create a named volume"""
+    INVENTORY.invalidate()
+    client = get_client()
+    if client:
+        try:
+            client.create_volume(name, labels=labels, driver_opts=driver_opts)
+            return True
+        except (DockerAPIError, OSError):
+            pass
+    options = "".join(f' --label "{k}={v}"' for k, v in (labels or {}).items())
+    options += "".join(f' --opt "{k}={v}"' for k, v in (driver_opts or {}).items())
+    success, _ = run_command(f"docker volume create{options} {name}")
+    return success
+
+def remove_volume(name: str) -> bool:
+    """Remove a named volume"""
+    INVENTORY.invalidate()
+    client = get_client()
+    if client:
+        try:
+            client.remove_volume(name)
+            return True
+        except DockerAPIError as e:
+            if e.status == 404:
+                return False
+        except OSError:
+            pass
+    success, _ = run_command(f"docker volume rm {name}")
+    return success
+
+def container_running(name: str) -> bool:
+    """Check whether the named container is running"""
+    client = get_client()
+    if client:
+        try:
+            info = client.inspect_container(name)
+            return bool(info and info["State"].get("Running"))
+        except (DockerAPIError, OSError):
+            pass
+    success, output = run_command(f'docker ps --filter "name=^{name}$" --format "{{{{.Names}}}}"')
+    return success and name in output.splitlines()
+
 def show_header():
     """Display the application header"""
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -154,7 +152,10 @@ def show_mode_options() -> List[str]:
         ("persistent", "💾 Persistent Server", "Data persists between sessions, acts like real VPS"),
         ("upgrade", "🔄 Upgrade Mode", "Update existing persistent server with latest packages"),
         ("snapshot", "📸 Create Snapshot", "Save current server state for later restore"),
-        ("restore", "📥 Restore Snapshot", "Restore from a previous snapshot")
+        ("restore", "📥 Restore Snapshot", "Restore from a previous snapshot"),
+        ("rollback", "⏪ Roll Back Restore", "Return to the state from before the last restore"),
+        ("export", "📤 Export Archive", "Stream persistent data or a snapshot to a compressed file"),
+        ("import", "📦 Import Archive", "Load a compressed archive as a new snapshot")
     ]
     
     for i, (key, title, desc) in enumerate(modes, 1):
@@ -190,52 +191,61 @@ def show_distributions(family_key: str) -> List[str]:
     print(f"{Colors.YELLOW}{'='*header_length}{Colors.RESET}")
     print()
     
+    # One bulk inventory query for the whole menu
+    inventory = INVENTORY.get()
+    
     distro_keys = list(family["distributions"].keys())
     for i, distro_key in enumerate(distro_keys, 1):
         distro = family["distributions"][distro_key]
         
         # Check if persistent volume exists
-        success, output = run_command(f'docker volume ls --format "{{{{.Name}}}}" | findstr {distro["volume"]}')
-        persistent_status = f" {Colors.BLUE}[HAS PERSISTENT DATA]{Colors.RESET}" if success and output else f" {Colors.GRAY}[CLEAN]{Colors.RESET}"
+        volume = active_volume(distro_key, distro)
+        has_volume = inventory.has_volume(volume)
+        persistent_status = f" {Colors.BLUE}[HAS PERSISTENT DATA]{Colors.RESET}" if has_volume else f" {Colors.GRAY}[CLEAN]{Colors.RESET}"
         
         print(f"{Colors.GREEN}[{i}] {distro['name']}{persistent_status}")
         print(f"     {Colors.GRAY}{distro['description']}{Colors.RESET}")
         print(f"     {Colors.GRAY}SSH Port: {distro['port']}{Colors.RESET}")
         print(f"     {Colors.GRAY}Container: {distro['container']}{Colors.RESET}")
         
-        if success and output:
-            print(f"     {Colors.BLUE}State Volume: {distro['volume']} (exists){Colors.RESET}")
+        if has_volume:
+            size = inventory.volume_size(volume)
+            size_text = f", {format_size(size)}" if size >= 0 else ""
+            print(f"     {Colors.BLUE}State Volume: {volume} (exists{size_text}){Colors.RESET}")
         else:
-            print(f"     {Colors.GRAY}State Volume: {distro['volume']} (clean){Colors.RESET}")
+            print(f"     {Colors.GRAY}State Volume: {volume} (clean){Colors.RESET}")
         print()
     
     return distro_keys
 
-def show_existing_snapshots(distro_key: str) -> List[str]:
-    """Display existing snapshots for a distribution"""
+def open_snapshot_store() -> SnapshotStore:
+    """Open the snapshot store, building its index from disk and volumes on first use"""
+    store = SnapshotStore()
+    if not store.index.exists:
+        store.reindex(INVENTORY.get().volumes_with_sizes(), VOLUME_STATE.retained())
+    return store
+
+def show_existing_snapshots(distro_key: str, snapshot_filters: Optional[Dict] = None) -> List[str]:
+    """Display existing snapshots for a distribution and return their names.
+
+    snapshot_filters are passed to SnapshotIndex.query (max_age_days, min_size, max_size, sort).
+    """
     print(f"{Colors.YELLOW}Available Snapshots for {distro_key}:{Colors.RESET}")
     print(f"{Colors.YELLOW}{'='*34}{Colors.RESET}")
     print()
     
-    # List snapshots (stored as named volumes)
-    success, output = run_command(f'docker volume ls --format "{{{{.Name}}}}" | findstr {distro_key}-snapshot-')
+    snapshots = []
+    for snapshot in open_snapshot_store().list_snapshots(distro_key, **(snapshot_filters or {})):
+        snapshots.append(snapshot["name"])
+        legacy = f" {Colors.GRAY}(legacy volume)" if snapshot["kind"] == KIND_VOLUME else ""
+        print(f"{Colors.GREEN}[{len(snapshots)}] {snapshot['name']}{legacy}{Colors.RESET}")
+        print(f"     {Colors.GRAY}Created: {snapshot['created_at'] or 'Unknown'}{Colors.RESET}")
+        if snapshot["size"] >= 0:
+            files = f", {snapshot['file_count']} files" if snapshot["file_count"] >= 0 else ""
+            print(f"     {Colors.GRAY}Size: {format_size(snapshot['size'])}{files}{Colors.RESET}")
+        print()
     
-    if success and output:
-        snapshots = output.split('\n')
-        for i, snapshot in enumerate(snapshots, 1):
-            snapshot_name = snapshot.replace(f"{distro_key}-snapshot-", "")
-            print(f"{Colors.GREEN}[{i}] {snapshot_name}{Colors.RESET}")
-            
-            # Try to get creation date from volume metadata
-            vol_success, vol_output = run_command(f'docker volume inspect {snapshot}')
-            if vol_success:
-                try:
-                    vol_data = json.loads(vol_output)
-                    created_date = vol_data[0].get('CreatedAt', 'Unknown')
-                    print(f"     {Colors.GRAY}Created: {created_date}{Colors.RESET}")
-                except:
-                    print(f"     {Colors.GRAY}Created: Unknown{Colors.RESET}")
-            print()
+    if snapshots:
         return snapshots
     else:
         print(f"{Colors.GRAY}No snapshots found for {distro_key}{Colors.RESET}")
@@ -271,223 +281,708 @@ def get_user_choice(prompt: str, max_choice: int, extra_options: str = "") -> st
             print(f"{Colors.RED}Or use: {extra_options}{Colors.RESET}")
         print()
 
-def start_persistent_container(distro_key: str, volume_names: List[str]) -> bool:
-    """Start container with persistent volume using override file"""
-    distro = None
-    for family in LINUX_FAMILIES.values():
-        if distro_key in family["distributions"]:
-            distro = family["distributions"][distro_key]
-            break
+# Which volume each distribution's persistent mount points at (restores re-point it)
+VOLUME_STATE = VolumeState()
+
+def active_volume(distro_key: str, distro: Dict) -> str:
+    """Volume currently serving as the distribution's persistent data"""
+    return VOLUME_STATE.active_volume(distro_key, distro["volume"])
+
+def create_overlay_clone(clone_volume: str, source_volume: str) -> bool:
+    """Create a writable copy-on-write clone of a volume with an overlay mount.
+
+    Takes constant time regardless of data size. Returns False (and cleans up)
+    if the daemon cannot mount overlay volumes, e.g. on non-Linux storage.
+    """
+    source_info = inspect_volume(source_volume)
+    if not source_info:
+        return False
+    
+    rw_volume = f"{clone_volume}-rw"
+    create_volume(rw_volume, labels={"vps.overlay-upper-for": clone_volume})
+    prepared, _ = run_command(f'docker run --rm -v "{rw_volume}:/rw" {HELPER_IMAGE} mkdir -p /rw/upper /rw/work')
+    rw_info = inspect_volume(rw_volume)
+    if prepared and rw_info:
+        rw_dir = rw_info["Mountpoint"]
+        mount_options = (f"lowerdir={':'.join(overlay_layers(source_info))},"
+                         f"upperdir={rw_dir}/upper,workdir={rw_dir}/work")
+        create_volume(clone_volume, labels={"vps.clone-of": source_volume},
+                      driver_opts={"type": "overlay", "device": "overlay", "o": mount_options})
+        # The local driver only mounts on first use, so prove the mount works now
+        mounted, _ = run_command(f'docker run --rm -v "{clone_volume}:/check" {HELPER_IMAGE} true')
+        if mounted:
+            return True
+        remove_volume(clone_volume)
+    remove_volume(rw_volume)
+    return False
+
+def ensure_snapshot_base(store: SnapshotStore, distro_key: str, state_name: str, log: Callable[[str], None]) -> str:
+    """Materialize a store snapshot into a base volume once, reused by later restores.
+
+    The name carries the content hash, so a re-taken snapshot gets a new base
+    and clones layered on the old one keep working.
+    """
+    content_hash = store.load_manifest(distro_key, state_name)["content_hash"]
+    base_volume = f"{distro_key}-snapbase-{state_name}-{content_hash[:12]}"
+    if volume_exists(base_volume):
+        return base_volume
+    
+    log(f"{Colors.YELLOW}Materializing snapshot base volume (first restore of '{state_name}')...{Colors.RESET}")
+    create_volume(base_volume, labels={"vps.snapshot": f"{distro_key}/{state_name}"})
+    try:
+        store.restore_snapshot(distro_key, state_name, base_volume)
+    except SnapshotStoreError:
+        remove_volume(base_volume)
+        raise
+    return base_volume
+
+def copy_volume(source_volume: str, target_volume: str) -> bool:
+    """Fill a new volume with a full copy of another (also flattens an overlay clone)"""
+    create_volume(target_volume)
+    copied, _ = run_command(f'docker run --rm -v "{source_volume}:/source:ro" -v "{target_volume}:/target" '
+                            f'{HELPER_IMAGE} sh -c "cp -a /source/. /target/"')
+    if not copied:
+        remove_volume(target_volume)
+    return copied
+
+def clean_up_volumes(distro_key: str, distro: Dict, store: SnapshotStore, log: Callable[[str], None]) -> None:
+    """Remove restore clones, -rw and snapshot base volumes nothing mounts or layers on any more"""
+    removed = prune_volumes(distro_key, distro["volume"], VOLUME_STATE, store)
+    if removed:
+        INVENTORY.invalidate()
+        log(f"{Colors.GRAY}   Removed {len(removed)} superseded volume(s): {', '.join(removed)}{Colors.RESET}")
+
+def restore_by_repointing(distro_key: str, distro: Dict, store: SnapshotStore, snapshot: Dict,
+                          log: Callable[[str], None]) -> Optional[str]:
+    """Point the distribution at a writable clone of a snapshot; return the new volume.
+
+    The previously active volume is left untouched and indexed as a
+    'pre-restore-<timestamp>' snapshot so the restore can be rolled back; only
+    the newest PRE_RESTORE_KEEP of those are kept.
+    """
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    clone_volume = f"{distro_key}-restore-{timestamp}"
+    previous_volume = active_volume(distro_key, distro)
+    
+    if snapshot["kind"] == KIND_STORE and VOLUME_STATE.overlay_supported is False:
+        # Overlay unavailable: stream the snapshot straight into the new volume
+        create_volume(clone_volume)
+        try:
+            store.restore_snapshot(distro_key, snapshot["name"], clone_volume)
+        except SnapshotStoreError:
+            remove_volume(clone_volume)
+            raise
+    else:
+        source_volume = (ensure_snapshot_base(store, distro_key, snapshot["name"], log)
+                         if snapshot["kind"] == KIND_STORE else snapshot["location"])
+        source_info = inspect_volume(source_volume)
+        depth = len(overlay_layers(source_info)) if source_info else 0
+        if depth >= MAX_OVERLAY_DEPTH:
+            # Clones of clones stack lower dirs; start a fresh chain from a full copy
+            log(f"{Colors.YELLOW}{source_volume} is {depth} overlay layers deep; flattening into a copy{Colors.RESET}")
+            if not copy_volume(source_volume, clone_volume):
+                return None
+        elif create_overlay_clone(clone_volume, source_volume):
+            VOLUME_STATE.overlay_supported = True
+            log(f"{Colors.GRAY}   Copy-on-write clone of {source_volume}{Colors.RESET}")
+        else:
+            VOLUME_STATE.overlay_supported = False
+            log(f"{Colors.YELLOW}Overlay volumes unavailable; copying snapshot data instead{Colors.RESET}")
+            if not copy_volume(source_volume, clone_volume):
+                return None
+    
+    if volume_exists(previous_volume):
+        pre_restore = {
+            "distro": distro_key,
+            "name": f"{PRE_RESTORE_PREFIX}{timestamp}",
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "source_volume": previous_volume,
+            "kind": KIND_VOLUME,
+            "location": previous_volume,
+        }
+        store.index.record(pre_restore)
+        VOLUME_STATE.retain(pre_restore)
+        log(f"{Colors.GRAY}   Previous state kept as snapshot '{pre_restore['name']}'{Colors.RESET}")
+    
+    VOLUME_STATE.set_active(distro_key, clone_volume)
+    trim_pre_restores(distro_key, VOLUME_STATE, store.index)
+    clean_up_volumes(distro_key, distro, store, log)
+    return clone_volume
+
+def snapshot_taken(store: SnapshotStore, distro_key: str, state_name: str, log: Callable[[str], None]) -> bool:
+    """Whether a snapshot name is already in use (reported through log); names are never overwritten"""
+    if store.has_snapshot(distro_key, state_name) or store.index.get(distro_key, state_name):
+        log(f"{Colors.RED}❌ Snapshot '{state_name}' already exists. Choose another name or delete it first:{Colors.RESET}")
+        log(f"{Colors.WHITE}   python snapshot_store.py delete {distro_key} {state_name}{Colors.RESET}")
+        return True
+    return False
+
+def roll_back(distro_key: str, distro: Dict, store: SnapshotStore, snapshot: Dict,
+              log: Callable[[str], None]) -> str:
+    """Re-point the distribution at a pre-restore volume and drop the state it replaces.
+
+    The pre-restore snapshot becomes the active volume again, so it is no longer
+    listed; the clone being rolled back is removed with its -rw volume.
+    """
+    VOLUME_STATE.set_active(distro_key, snapshot["location"])
+    forget_snapshot(distro_key, snapshot["name"], VOLUME_STATE, store.index)
+    clean_up_volumes(distro_key, distro, store, log)
+    return snapshot["location"]
+
+def compose_service(distro_key: str) -> str:
+    """docker-compose service name for a distribution"""
+    return REGISTRY.distribution(distro_key)["service"]
+
+def compose_profile(distro_key: str) -> str:
+    """docker-compose profile that enables a distribution's service"""
+    return REGISTRY.distribution(distro_key)["profile"]
+
+def stop_service(distro_key: str) -> bool:
+    """Stop and remove only this distribution's container.
+
+    Unlike `down`, this leaves the shared network and other distributions alone,
+    so it is safe while other launches are in flight.
+    """
+    INVENTORY.invalidate()
+    success, _ = run_command(f"docker-compose -f ../docker-compose.yml --profile {compose_profile(distro_key)} rm -s -f {compose_service(distro_key)}")
+    return success
+
+# Per-launch compose override files live here, one unique file per launch
+OVERRIDE_DIR = Path(__file__).resolve().parent / ".vps-state" / "compose"
+
+def compose_up(distro_key: str, override_files: List[str] = (), quiet: bool = False) -> bool:
+    """Start only this distribution's service, optionally with extra compose files.
+
+    Naming the service keeps concurrent launches from touching each other's
+    containers. One retry covers the race where two first launches both try
+    to create the shared network.
+    """
+    files = " ".join(f'-f "{path}"' for path in ["../docker-compose.yml", *override_files])
+    command = f"docker-compose {files} --profile {compose_profile(distro_key)} up -d --no-deps {compose_service(distro_key)}"
+    try:
+        success, _ = run_command(command, capture_output=quiet)
+        if not success:
+            success, _ = run_command(command, capture_output=quiet)
+        return success
+    finally:
+        INVENTORY.invalidate()
+
+def start_persistent_container(distro_key: str, volume_names: List[str], quiet: bool = False) -> bool:
+    """Start container with persistent volume using a private override file"""
+    distro = REGISTRY.distribution(distro_key)
     
     if not distro:
         return False
     
     # Create temporary docker-compose override for persistent volumes
     override_content = f"""services:
-  {distro_key}-vps:
+  {compose_service(distro_key)}:
     volumes:
       - {volume_names[0]}:/home/vpsuser/persistent
       - {volume_names[0]}:/var/lib/persistent-data
+volumes:
+  {volume_names[0]}:
+    external: true
 """
     
+    OVERRIDE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, override_path = tempfile.mkstemp(dir=OVERRIDE_DIR, prefix=f"override-{distro_key}-", suffix=".yml")
     try:
-        with open("../docker-compose.override.yml", "w") as f:
+        with os.fdopen(fd, "w") as f:
             f.write(override_content)
-        
-        success, _ = run_command(f"docker-compose -f ../docker-compose.yml --profile {distro_key} up -d", capture_output=False)
-        return success
+        return compose_up(distro_key, [override_path], quiet)
     finally:
         # Clean up override file
-        if os.path.exists("../docker-compose.override.yml"):
-            os.remove("../docker-compose.override.yml")
+        os.remove(override_path)
+
+def start_vps_environment(family_key: str, distro_key: str, mode: str, state_name: str = "", build_first: bool = False,
+                          log: Callable[[str], None] = print, snapshot_filters: Optional[Dict] = None,
+                          archive_options: Optional[Dict] = None) -> bool:
+    """Start VPS environment based on selected mode.
 
-def start_vps_environment(family_key: str, distro_key: str, mode: str, state_name: str = "", build_first: bool = False) -> bool:
-    """Start VPS environment based on selected mode"""
+    Output goes through `log`; passing anything other than print also captures
+    docker-compose output so concurrent launches don't interleave on the terminal.
+    archive_options (path, codec, level, threads) apply to export/import.
+    """
+    quiet = log is not print
     family = LINUX_FAMILIES[family_key]
     distro = family["distributions"][distro_key]
+    volume = active_volume(distro_key, distro)
     
-    print(f"{Colors.GREEN}🚀 Starting VPS Environment...{Colors.RESET}")
-    print(f"{Colors.GREEN}{'='*30}{Colors.RESET}")
-    print(f"{Colors.WHITE}Family: {family['name']}{Colors.RESET}")
-    print(f"{Colors.WHITE}Distribution: {distro['name']}{Colors.RESET}")
-    print(f"{Colors.WHITE}Mode: {mode}{Colors.RESET}")
-    print(f"{Colors.WHITE}Container: {distro['container']}{Colors.RESET}")
-    print()
+    log(f"{Colors.GREEN}🚀 Starting VPS Environment...{Colors.RESET}")
+    log(f"{Colors.GREEN}{'='*30}{Colors.RESET}")
+    log(f"{Colors.WHITE}Family: {family['name']}{Colors.RESET}")
+    log(f"{Colors.WHITE}Distribution: {distro['name']}{Colors.RESET}")
+    log(f"{Colors.WHITE}Mode: {mode}{Colors.RESET}")
+    log(f"{Colors.WHITE}Container: {distro['container']}{Colors.RESET}")
+    log("")
     
     if mode == "fresh":
-        print(f"{Colors.CYAN}🧹 Fresh Install Mode:{Colors.RESET}")
-        print(f"{Colors.GRAY}- Clean container (no persistent data){Colors.RESET}")
-        print(f"{Colors.GRAY}- Fastest startup{Colors.RESET}")
-        print(f"{Colors.GRAY}- All changes lost when stopped{Colors.RESET}")
-        print()
+        log(f"{Colors.CYAN}🧹 Fresh Install Mode:{Colors.RESET}")
+        log(f"{Colors.GRAY}- Clean container (no persistent data){Colors.RESET}")
+        log(f"{Colors.GRAY}- Fastest startup{Colors.RESET}")
+        log(f"{Colors.GRAY}- All changes lost when stopped{Colors.RESET}")
+        log("")
         
         # Stop existing container
-        run_command(f"docker-compose -f ../docker-compose.yml --profile {distro_key} down")
+        stop_service(distro_key)
         
         # Start fresh (no volume mount)
         if build_first:
-            run_command(f"docker-compose -f ../docker-compose.yml build {distro['container']}")
+            run_command(f"docker-compose -f ../docker-compose.yml build {proxy_build_args()} {distro['service']}")
         
-        success, _ = run_command(f"docker-compose -f ../docker-compose.yml --profile {distro_key} up -d", capture_output=False)
+        success = compose_up(distro_key, quiet=quiet)
         
     elif mode == "persistent":
-        print(f"{Colors.BLUE}💾 Persistent Server Mode:{Colors.RESET}")
-        print(f"{Colors.GRAY}- Data persists between sessions{Colors.RESET}")
-        print(f"{Colors.GRAY}- Acts like a real VPS{Colors.RESET}")
-        print(f"{Colors.GRAY}- Changes saved automatically{Colors.RESET}")
-        print()
+        log(f"{Colors.BLUE}💾 Persistent Server Mode:{Colors.RESET}")
+        log(f"{Colors.GRAY}- Data persists between sessions{Colors.RESET}")
+        log(f"{Colors.GRAY}- Acts like a real VPS{Colors.RESET}")
+        log(f"{Colors.GRAY}- Changes saved automatically{Colors.RESET}")
+        log("")
         
         # Create persistent volume if it doesn't exist
-        volume_exists, _ = run_command(f'docker volume ls --format "{{{{.Name}}}}" | findstr {distro["volume"]}')
-        if not volume_exists:
-            print(f"{Colors.YELLOW}Creating persistent volume: {distro['volume']}{Colors.RESET}")
-            run_command(f"docker volume create {distro['volume']}")
+        if not volume_exists(volume):
+            log(f"{Colors.YELLOW}Creating persistent volume: {volume}{Colors.RESET}")
+            create_volume(volume)
         
         # Stop existing container
-        run_command(f"docker-compose -f ../docker-compose.yml --profile {distro_key} down")
+        stop_service(distro_key)
         
         # Start with persistent volume
         if build_first:
-            run_command(f"docker-compose -f ../docker-compose.yml build {distro['container']}")
+            run_command(f"docker-compose -f ../docker-compose.yml build {proxy_build_args()} {distro['service']}")
         
-        success = start_persistent_container(distro_key, [distro["volume"]])
+        success = start_persistent_container(distro_key, [volume], quiet)
         
     elif mode == "upgrade":
-        print(f"{Colors.MAGENTA}🔄 Upgrade Mode:{Colors.RESET}")
-        print(f"{Colors.GRAY}- Updates existing persistent server{Colors.RESET}")
-        print(f"{Colors.GRAY}- Rebuilds image with latest packages{Colors.RESET}")
-        print(f"{Colors.GRAY}- Preserves user data and configurations{Colors.RESET}")
-        print()
+        log(f"{Colors.MAGENTA}🔄 Upgrade Mode:{Colors.RESET}")
+        log(f"{Colors.GRAY}- Updates existing persistent server{Colors.RESET}")
+        log(f"{Colors.GRAY}- Rebuilds image with latest packages{Colors.RESET}")
+        log(f"{Colors.GRAY}- Preserves user data and configurations{Colors.RESET}")
+        log("")
         
-        volume_exists, _ = run_command(f'docker volume ls --format "{{{{.Name}}}}" | findstr {distro["volume"]}')
-        if not volume_exists:
-            print(f"{Colors.RED}❌ No persistent volume found. Use 'persistent' mode first.{Colors.RESET}")
+        if not volume_exists(volume):
+            log(f"{Colors.RED}❌ No persistent volume found. Use 'persistent' mode first.{Colors.RESET}")
             return False
         
         # Stop container, rebuild, restart with same volume
-        run_command(f"docker-compose -f ../docker-compose.yml --profile {distro_key} down")
-        print(f"{Colors.YELLOW}Rebuilding with latest packages...{Colors.RESET}")
-        run_command(f"docker-compose -f ../docker-compose.yml build --no-cache {distro['container']}")
+        stop_service(distro_key)
+        log(f"{Colors.YELLOW}Rebuilding with latest packages...{Colors.RESET}")
+        run_command(f"docker-compose -f ../docker-compose.yml build --no-cache {proxy_build_args()} {distro['service']}")
         
-        success = start_persistent_container(distro_key, [distro["volume"]])
+        success = start_persistent_container(distro_key, [volume], quiet)
         
     elif mode == "snapshot":
-        print(f"{Colors.CYAN}📸 Snapshot Mode:{Colors.RESET}")
-        print(f"{Colors.GRAY}- Saves current server state{Colors.RESET}")
-        print(f"{Colors.GRAY}- Creates named backup for later restore{Colors.RESET}")
-        print()
+        log(f"{Colors.CYAN}📸 Snapshot Mode:{Colors.RESET}")
+        log(f"{Colors.GRAY}- Saves current server state{Colors.RESET}")
+        log(f"{Colors.GRAY}- Creates named backup for later restore{Colors.RESET}")
+        log("")
         
         if not state_name:
             state_name = input(f"{Colors.YELLOW}Enter snapshot name: {Colors.RESET}")
         
-        snapshot_volume = f"{distro_key}-snapshot-{state_name}"
+        if not volume_exists(volume):
+            log(f"{Colors.RED}❌ No persistent volume found. Use 'persistent' mode first.{Colors.RESET}")
+            return False
         
-        # Create snapshot by copying persistent volume
-        print(f"{Colors.YELLOW}Creating snapshot: {snapshot_volume}{Colors.RESET}")
-        run_command(f"docker volume create {snapshot_volume}")
+        store = open_snapshot_store()
+        if snapshot_taken(store, distro_key, state_name, log):
+            return False
         
-        # Copy data from persistent volume to snapshot
-        copy_cmd = f'docker run --rm -v "{distro["volume"]}:/source" -v "{snapshot_volume}:/target" alpine sh -c "cp -a /source/. /target/"'
-        success, _ = run_command(copy_cmd)
+        # Stream the persistent volume into the deduplicated snapshot store
+        log(f"{Colors.YELLOW}Creating snapshot: {distro_key}/{state_name}{Colors.RESET}")
+        try:
+            manifest = store.create_snapshot(distro_key, state_name, volume)
+        except SnapshotStoreError as e:
+            log(f"{Colors.RED}❌ Snapshot failed: {e}{Colors.RESET}")
+            return False
         
-        if success:
-            print(f"{Colors.GREEN}✅ Snapshot '{state_name}' created successfully!{Colors.RESET}")
-        return success
+        log(f"{Colors.GREEN}✅ Snapshot '{state_name}' created successfully!{Colors.RESET}")
+        log(f"{Colors.GRAY}   {manifest['file_count']} files, {format_size(manifest['logical_size'])} logical, "
+              f"{format_size(manifest['new_bytes'])} new data "
+              f"({manifest['new_chunks']}/{manifest['total_chunks']} chunks written){Colors.RESET}")
+        return True
         
-    elif mode == "restore":
-        print(f"{Colors.YELLOW}📥 Restore Mode:{Colors.RESET}")
-        print(f"{Colors.GRAY}- Restores from a previous snapshot{Colors.RESET}")
-        print(f"{Colors.GRAY}- Overwrites current persistent data{Colors.RESET}")
-        print()
+    elif mode == "export":
+        log(f"{Colors.CYAN}📤 Export Mode:{Colors.RESET}")
+        log(f"{Colors.GRAY}- Streams {'snapshot ' + state_name if state_name else 'persistent data'} to a compressed archive{Colors.RESET}")
+        log("")
+        
+        options = archive_options or {}
+        store = open_snapshot_store()
+        if state_name:
+            snapshot = store.index.get(distro_key, state_name)
+            if snapshot and snapshot["kind"] == KIND_VOLUME:
+                write_tar = volume_tar_writer(snapshot["location"])
+            elif store.has_snapshot(distro_key, state_name):
+                manifest = store.load_manifest(distro_key, state_name)
+                write_tar = lambda sink: store.write_tar(manifest, sink)
+            else:
+                log(f"{Colors.RED}❌ Snapshot '{state_name}' not found.{Colors.RESET}")
+                return False
+        elif volume_exists(volume):
+            write_tar = volume_tar_writer(volume)
+        else:
+            log(f"{Colors.RED}❌ No persistent volume found. Use 'persistent' mode first.{Colors.RESET}")
+            return False
+        
+        try:
+            codec = choose_codec(options.get("codec", "auto"))
+            path = options.get("path") or default_archive_path(distro_key, state_name or "persistent", codec)
+            log(f"{Colors.YELLOW}Exporting to {path}...{Colors.RESET}")
+            stats = export_archive(write_tar, path, codec, options.get("level"), options.get("threads", 0))
+        except (ArchiveError, SnapshotStoreError, OSError) as e:
+            log(f"{Colors.RED}❌ Export failed: {e}{Colors.RESET}")
+            return False
+        
+        log(f"{Colors.GREEN}✅ Exported {path}{Colors.RESET}")
+        log(f"{Colors.GRAY}   {stats.summary()}{Colors.RESET}")
+        return True
+        
+    elif mode == "import":
+        log(f"{Colors.CYAN}📦 Import Mode:{Colors.RESET}")
+        log(f"{Colors.GRAY}- Loads a compressed archive into the snapshot store{Colors.RESET}")
+        log("")
+        
+        path = (archive_options or {}).get("path")
+        if not path:
+            path = input(f"{Colors.YELLOW}Enter archive path: {Colors.RESET}").strip()
+        if not state_name:
+            # ubuntu-backup1.tar.zst -> backup1
+            state_name = Path(path).name.split(".tar")[0]
+            if state_name.startswith(f"{distro_key}-"):
+                state_name = state_name[len(distro_key) + 1:]
+        
+        store = open_snapshot_store()
+        if snapshot_taken(store, distro_key, state_name, log):
+            return False
+        log(f"{Colors.YELLOW}Importing {path} as snapshot: {distro_key}/{state_name}{Colors.RESET}")
+        manifests = []
+        try:
+            stats = import_archive(lambda source: manifests.append(
+                store.ingest_tar(source, distro_key, state_name, f"archive:{Path(path).name}", commit=False)), path)
+            # Only keep the snapshot once the whole archive decompressed cleanly
+            store.commit_manifest(manifests[0])
+        except (ArchiveError, SnapshotStoreError, tarfile.TarError, OSError) as e:
+            log(f"{Colors.RED}❌ Import failed: {e}{Colors.RESET}")
+            return False
+        
+        log(f"{Colors.GREEN}✅ Snapshot '{state_name}' imported successfully!{Colors.RESET}")
+        log(f"{Colors.GRAY}   {stats.summary()}{Colors.RESET}")
+        log(f"{Colors.WHITE}Restore:    python advanced-launcher.py --family {family_key} --distribution {distro_key} --mode restore --state {state_name}{Colors.RESET}")
+        return True
+        
+    elif mode in ("restore", "rollback"):
+        store = open_snapshot_store()
+        if mode == "rollback":
+            log(f"{Colors.YELLOW}⏪ Rollback Mode:{Colors.RESET}")
+            log(f"{Colors.GRAY}- Returns to the state from before the last restore{Colors.RESET}")
+            log(f"{Colors.GRAY}- The restored data is discarded{Colors.RESET}")
+            log("")
+            
+            pre_restores = [s for s in store.index.query(distro_key, kind=KIND_VOLUME, descending=True)
+                            if s["name"].startswith(PRE_RESTORE_PREFIX)]
+            if not pre_restores:
+                log(f"{Colors.RED}❌ No pre-restore snapshot to roll back to.{Colors.RESET}")
+                return False
+            state_name = pre_restores[0]["name"]
+        else:
+            log(f"{Colors.YELLOW}📥 Restore Mode:{Colors.RESET}")
+            log(f"{Colors.GRAY}- Restores from a previous snapshot{Colors.RESET}")
+            log(f"{Colors.GRAY}- Current data is kept as a pre-restore snapshot{Colors.RESET}")
+            log("")
         
         if not state_name:
-            snapshots = show_existing_snapshots(distro_key)
+            snapshots = show_existing_snapshots(distro_key, snapshot_filters)
             if not snapshots:
-                print(f"{Colors.RED}❌ No snapshots available for restore.{Colors.RESET}")
+                log(f"{Colors.RED}❌ No snapshots available for restore.{Colors.RESET}")
                 return False
             
             choice = get_user_choice(f"Select snapshot to restore [1-{len(snapshots)}]", len(snapshots))
             if choice == "back":
                 return False
             
-            selected_snapshot = snapshots[int(choice) - 1]
-            state_name = selected_snapshot.replace(f"{distro_key}-snapshot-", "")
+            state_name = snapshots[int(choice) - 1]
         
-        snapshot_volume = f"{distro_key}-snapshot-{state_name}"
+        snapshot = store.index.get(distro_key, state_name)
+        if not snapshot:
+            # Index may be stale; fall back to checking the store and volumes directly
+            if store.has_snapshot(distro_key, state_name):
+                snapshot = {"name": state_name, "kind": KIND_STORE}
+            else:
+                snapshot = {"name": state_name, "kind": KIND_VOLUME,
+                            "location": f"{distro_key}-snapshot-{state_name}"}
         
         # Verify snapshot exists
-        snapshot_exists, _ = run_command(f'docker volume ls --format "{{{{.Name}}}}" | findstr {snapshot_volume}')
-        if not snapshot_exists:
-            print(f"{Colors.RED}❌ Snapshot '{state_name}' not found.{Colors.RESET}")
+        if snapshot["kind"] == KIND_VOLUME and not volume_exists(snapshot["location"]):
+            log(f"{Colors.RED}❌ Snapshot '{state_name}' not found.{Colors.RESET}")
             return False
         
         # Stop container
-        run_command(f"docker-compose -f ../docker-compose.yml --profile {distro_key} down")
-        
-        # Create/recreate persistent volume
-        run_command(f"docker volume rm {distro['volume']}")
-        run_command(f"docker volume create {distro['volume']}")
+        was_running = container_running(distro["container"])
+        stop_service(distro_key)
         
-        # Restore data from snapshot
-        print(f"{Colors.YELLOW}Restoring from snapshot: {state_name}{Colors.RESET}")
-        restore_cmd = f'docker run --rm -v "{snapshot_volume}:/source" -v "{distro["volume"]}:/target" alpine sh -c "cp -a /source/. /target/"'
-        run_command(restore_cmd)
+        # Re-point the persistent mount at a clone of the snapshot (or back at the pre-restore volume)
+        log(f"{Colors.YELLOW}Restoring from snapshot: {state_name}{Colors.RESET}")
+        restore_started = time.time()
+        try:
+            if mode == "rollback":
+                restored = roll_back(distro_key, distro, store, snapshot, log)
+            else:
+                restored = restore_by_repointing(distro_key, distro, store, snapshot, log)
+            error = f"could not populate a volume from '{state_name}'."
+        except SnapshotStoreError as e:
+            restored, error = None, str(e)
+        if not restored:
+            log(f"{Colors.RED}❌ Restore failed: {error}{Colors.RESET}")
+            if was_running and volume_exists(volume):
+                log(f"{Colors.YELLOW}Restarting on the previous volume {volume}...{Colors.RESET}")
+                start_persistent_container(distro_key, [volume], quiet)
+            return False
+        volume = restored
+        log(f"{Colors.GRAY}   Volume {volume} ready in {time.time() - restore_started:.1f}s{Colors.RESET}")
         
         # Start with restored data
-        success = start_persistent_container(distro_key, [distro["volume"]])
+        success = start_persistent_container(distro_key, [volume], quiet)
     
     if mode != "snapshot":
-        # Wait for services to start
-        print(f"{Colors.YELLOW}⏳ Waiting for services to initialize...{Colors.RESET}")
-        time.sleep(10)
+        # Wait for the container to start and sshd to answer
+        log(f"{Colors.YELLOW}⏳ Waiting for services to initialize...{Colors.RESET}")
+        readiness = wait_for_vps_ready(distro["container"], distro["port"])
+        if readiness.ready:
+            log(f"{Colors.GREEN}SSH ready after {readiness.elapsed:.1f}s ({readiness.detail}){Colors.RESET}")
+        else:
+            log(f"{Colors.YELLOW}⚠️  Not ready after {readiness.elapsed:.1f}s: {readiness.detail}{Colors.RESET}")
         
         # Check if container is running
-        running_success, running_output = run_command(f'docker ps --filter "name={distro["container"]}" --format "{{{{.Names}}}}"')
-        
-        if running_success and running_output:
-            print(f"{Colors.GREEN}✅ Container started successfully!{Colors.RESET}")
-            print()
-            print(f"{Colors.CYAN}🔗 Connection Information:{Colors.RESET}")
-            print(f"{Colors.CYAN}{'='*25}{Colors.RESET}")
-            print(f"{Colors.GREEN}SSH: ssh vpsuser@localhost -p {distro['port']}{Colors.RESET}")
-            print(f"{Colors.GREEN}Password: vpsuser123{Colors.RESET}")
-            print(f"{Colors.BLUE}Mode: {mode}{Colors.RESET}")
+        if container_running(distro["container"]):
+            log(f"{Colors.GREEN}✅ Container started successfully!{Colors.RESET}")
+            log("")
+            log(f"{Colors.CYAN}🔗 Connection Information:{Colors.RESET}")
+            log(f"{Colors.CYAN}{'='*25}{Colors.RESET}")
+            log(f"{Colors.GREEN}SSH: ssh vpsuser@localhost -p {distro['port']}{Colors.RESET}")
+            log(f"{Colors.GREEN}Password: vpsuser123{Colors.RESET}")
+            log(f"{Colors.BLUE}Mode: {mode}{Colors.RESET}")
             
-            if mode in ["persistent", "upgrade", "restore"]:
-                print(f"{Colors.BLUE}Persistent Volume: {distro['volume']}{Colors.RESET}")
-            print()
+            if mode in ["persistent", "upgrade", "restore", "rollback"]:
+                log(f"{Colors.BLUE}Persistent Volume: {volume}{Colors.RESET}")
+            log("")
             
-            print(f"{Colors.CYAN}💡 Quick Commands:{Colors.RESET}")
-            print(f"{Colors.CYAN}{'='*18}{Colors.RESET}")
-            print(f"{Colors.WHITE}Connect:    python manage-vps.py connect {distro_key}{Colors.RESET}")
-            print(f"{Colors.WHITE}Status:     python manage-vps.py status{Colors.RESET}")
-            print(f"{Colors.WHITE}Logs:       docker-compose logs -f {distro['container']}{Colors.RESET}")
-            print(f"{Colors.WHITE}Stop:       docker-compose --profile {distro_key} down{Colors.RESET}")
+            log(f"{Colors.CYAN}💡 Quick Commands:{Colors.RESET}")
+            log(f"{Colors.CYAN}{'='*18}{Colors.RESET}")
+            log(f"{Colors.WHITE}Connect:    python manage-vps.py connect {distro_key}{Colors.RESET}")
+            log(f"{Colors.WHITE}Status:     python manage-vps.py status{Colors.RESET}")
+            log(f"{Colors.WHITE}Logs:       docker-compose logs -f {distro['service']}{Colors.RESET}")
+            log(f"{Colors.WHITE}Stop:       docker-compose --profile {distro['profile']} down{Colors.RESET}")
             
             if mode in ["persistent", "upgrade"]:
-                print(f"{Colors.WHITE}Snapshot:   python advanced-launcher.py --family {family_key} --distribution {distro_key} --mode snapshot --state mybackup{Colors.RESET}")
+                log(f"{Colors.WHITE}Snapshot:   python advanced-launcher.py --family {family_key} --distribution {distro_key} --mode snapshot --state mybackup{Colors.RESET}")
             
             return True
         else:
-            print(f"{Colors.RED}❌ Container failed to start properly!{Colors.RESET}")
+            log(f"{Colors.RED}❌ Container failed to start properly!{Colors.RESET}")
             return False
     
     return True
 
+def find_family(distro_key: str) -> Optional[str]:
+    """Return the family key that contains a distribution"""
+    return REGISTRY.family_of(distro_key)
+
+def resolve_targets(family_arg: Optional[str], distribution_arg: str) -> List[Tuple[str, str]]:
+    """Expand --family/--distribution ("all" or a comma-separated list) into (family, distro) pairs"""
+    families = [family_arg] if family_arg else list(LINUX_FAMILIES.keys())
+    if distribution_arg == "all":
+        return [(family_key, distro_key) for family_key in families
+                for distro_key in LINUX_FAMILIES[family_key]["distributions"]]
+    
+    targets = []
+    for distro_key in [d.strip() for d in distribution_arg.split(",") if d.strip()]:
+        family_key = family_arg or find_family(distro_key)
+        if not family_key or distro_key not in LINUX_FAMILIES[family_key]["distributions"]:
+            raise ValueError(distro_key)
+        if (family_key, distro_key) not in targets:
+            targets.append((family_key, distro_key))
+    return targets
+
+def strip_colors(text: str) -> str:
+    """Remove ANSI color codes"""
+    return re.sub(r"\033\[[0-9;]*m", "", text)
+
+def launch_parallel(targets: List[Tuple[str, str]], mode: str, state_name: str = "",
+                    build_first: bool = False, max_workers: int = 4,
+                    archive_options: Optional[Dict] = None) -> bool:
+    """Launch several distributions through a bounded worker pool and print one summary"""
+    workers = max(1, min(max_workers, len(targets)))
+    print(f"{Colors.GREEN}🚀 Launching {len(targets)} distributions (mode: {mode}, workers: {workers}){Colors.RESET}")
+    print(f"{Colors.GREEN}{'='*60}{Colors.RESET}")
+    
+    print_lock = threading.Lock()
+    start = time.time()
+    
+    def progress(distro_key: str, message: str, color: str):
+        with print_lock:
+            print(f"{color}[{time.time() - start:6.1f}s] {distro_key:<10} {message}{Colors.RESET}")
+    
+    def launch(family_key: str, distro_key: str):
+        messages = []
+        progress(distro_key, "starting...", Colors.GRAY)
+        launch_start = time.time()
+        try:
+            success = start_vps_environment(family_key, distro_key, mode, state_name, build_first,
+                                            log=messages.append, archive_options=archive_options)
+        except Exception as e:
+            messages.append(str(e))
+            success = False
+        elapsed = time.time() - launch_start
+        if success:
+            progress(distro_key, f"✅ ready in {elapsed:.1f}s", Colors.GREEN)
+        else:
+            progress(distro_key, f"❌ failed after {elapsed:.1f}s", Colors.RED)
+        return success, elapsed, messages
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(launch, family_key, distro_key): (family_key, distro_key)
+                   for family_key, distro_key in targets}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    wall_time = time.time() - start
+    
+    print()
+    print(f"{Colors.CYAN}📊 Launch Summary{Colors.RESET}")
+    print(f"{Colors.CYAN}{'='*78}{Colors.RESET}")
+    print(f"{'Distribution':<22} {'Container':<16} {'SSH':<6} {'Status':<8} {'Time':>7}  Detail")
+    print("-" * 78)
+    for family_key, distro_key in targets:
+        distro = LINUX_FAMILIES[family_key]["distributions"][distro_key]
+        success, elapsed, messages = results[(family_key, distro_key)]
+        color = Colors.GREEN if success else Colors.RED
+        detail = ""
+        if not success:
+            lines = [strip_colors(m).strip() for m in messages if strip_colors(m).strip()]
+            detail = lines[-1][:40] if lines else ""
+        print(f"{distro['name'][:21]:<22} {distro['container']:<16} {distro['port']:<6} "
+              f"{color}{'PASS' if success else 'FAIL':<8}{Colors.RESET} {elapsed:>6.1f}s  {detail}")
+    print("-" * 78)
+    passed = sum(1 for success, _, _ in results.values() if success)
+    serial_time = sum(elapsed for _, elapsed, _ in results.values())
+    print(f"Results: {passed}/{len(targets)} launched")
+    print(f"Wall time: {wall_time:.1f}s (sum of individual launches: {serial_time:.1f}s)")
+    
+    return passed == len(targets)
+
+def persistent_mount_source(container: str) -> Optional[str]:
+    """Name of the volume mounted at /home/vpsuser/persistent in a container"""
+    info = None
+    client = get_client()
+    if client:
+        try:
+            info = client.inspect_container(container)
+        except (DockerAPIError, OSError):
+            info = None
+    if info is None:
+        success, output = run_command(f"docker inspect {container}")
+        if not success:
+            return None
+        try:
+            info = json.loads(output)[0]
+        except (ValueError, IndexError):
+            return None
+    for mount in info.get("Mounts") or []:
+        if mount.get("Destination") == "/home/vpsuser/persistent":
+            return mount.get("Name")
+    return None
+
+def stress_test_persistent() -> bool:
+    """Launch every distribution in persistent mode at once and check each got its own volume"""
+    targets = resolve_targets(None, "all")
+    print(f"{Colors.MAGENTA}🔥 Persistent launch stress test: {len(targets)} simultaneous launches{Colors.RESET}")
+    print()
+    launched = launch_parallel(targets, "persistent", max_workers=len(targets))
+    
+    print()
+    print(f"{Colors.CYAN}🔍 Volume isolation check{Colors.RESET}")
+    print(f"{Colors.CYAN}{'='*78}{Colors.RESET}")
+    print(f"{'Distribution':<22} {'Expected volume':<26} {'Mounted volume':<26} Status")
+    print("-" * 78)
+    isolated = 0
+    for family_key, distro_key in targets:
+        distro = LINUX_FAMILIES[family_key]["distributions"][distro_key]
+        expected = active_volume(distro_key, distro)
+        mounted = persistent_mount_source(distro["container"]) or "-"
+        ok = mounted == expected
+        isolated += ok
+        color = Colors.GREEN if ok else Colors.RED
+        print(f"{distro['name'][:21]:<22} {expected[:25]:<26} {mounted[:25]:<26} {color}{'OK' if ok else 'MISMATCH'}{Colors.RESET}")
+    print("-" * 78)
+    
+    leftovers = list(OVERRIDE_DIR.glob("override-*.yml")) if OVERRIDE_DIR.exists() else []
+    print(f"Isolated: {isolated}/{len(targets)}   Leftover override files: {len(leftovers)}")
+    return launched and isolated == len(targets) and not leftovers
+
 def main():
     """Main function - entry point"""
     parser = argparse.ArgumentParser(description="Advanced VPS Environment Launcher")
     parser.add_argument("--family", help="Linux family key for non-interactive mode")
-    parser.add_argument("--distribution", help="Distribution key for non-interactive mode")
-    parser.add_argument("--mode", choices=["fresh", "persistent", "upgrade", "snapshot", "restore"],
+    parser.add_argument("--distribution",
+                        help="Distribution key for non-interactive mode: a key, a comma-separated list, or 'all'")
+    parser.add_argument("--mode", choices=["fresh", "persistent", "upgrade", "snapshot", "restore", "rollback", "export", "import"],
                        default="fresh", help="Launch mode")
     parser.add_argument("--state", help="State name for snapshot/restore operations")
     parser.add_argument("--build", action="store_true", help="Rebuild containers before starting")
     parser.add_argument("--logs", action="store_true", help="Show logs after starting")
+    parser.add_argument("--pkg-cache", nargs="?", const=DEFAULT_PKG_CACHE_URL, metavar="URL",
+                        help="Route --build/upgrade package downloads through the package cache "
+                             "(start it with: docker-compose --profile pkg-cache up -d pkg-cache)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Maximum concurrent launches when starting several distributions")
+    parser.add_argument("--max-age", type=float, metavar="DAYS", help="Only offer snapshots newer than DAYS for restore")
+    parser.add_argument("--min-size", type=parse_size, help="Only offer snapshots at least this large (e.g. 100M)")
+    parser.add_argument("--max-size", type=parse_size, help="Only offer snapshots at most this large (e.g. 2G)")
+    parser.add_argument("--archive", help="Archive file for export/import (default: <distro>-<state>.tar.zst)")
+    parser.add_argument("--compression", choices=["auto", "zstd", "gzip"], default="auto",
+                        help="Export compression (auto uses zstd when installed, else gzip)")
+    parser.add_argument("--level", type=int, help="Compression level (default: zstd 3, gzip 6)")
+    parser.add_argument("--threads", type=int, default=0, help="zstd compression threads (0 = all cores)")
+    parser.add_argument("--stress-test", action="store_true",
+                        help="Start every distribution in persistent mode simultaneously and verify volume isolation")
     
     args = parser.parse_args()
+    if args.pkg_cache:
+        os.environ[PKG_CACHE_ENV] = args.pkg_cache
+    snapshot_filters = {"max_age_days": args.max_age, "min_size": args.min_size, "max_size": args.max_size}
+    archive_options = {"path": args.archive, "codec": args.compression, "level": args.level, "threads": args.threads}
+    
+    if args.stress_test:
+        sys.exit(0 if stress_test_persistent() else 1)
+    
+    # Non-interactive mode (several distributions)
+    if args.distribution and (args.distribution == "all" or "," in args.distribution):
+        if args.family and args.family not in LINUX_FAMILIES:
+            print(f"{Colors.RED}❌ Unknown family: {args.family}{Colors.RESET}")
+            available_families = ", ".join(LINUX_FAMILIES.keys())
+            print(f"{Colors.YELLOW}Available families: {available_families}{Colors.RESET}")
+            sys.exit(1)
+        
+        try:
+            targets = resolve_targets(args.family, args.distribution)
+        except ValueError as e:
+            scope = f" in family {args.family}" if args.family else ""
+            print(f"{Colors.RED}❌ Unknown distribution: {e}{scope}{Colors.RESET}")
+            sys.exit(1)
+        
+        if args.mode in ["snapshot", "restore"] and not args.state:
+            print(f"{Colors.RED}❌ --state is required for {args.mode} with several distributions{Colors.RESET}")
+            sys.exit(1)
+        if args.mode == "import" or (args.mode == "export" and args.archive):
+            print(f"{Colors.RED}❌ {args.mode} with --archive takes a single distribution{Colors.RESET}")
+            sys.exit(1)
+        
+        success = launch_parallel(targets, args.mode, args.state or "", args.build, args.workers, archive_options)
+        sys.exit(0 if success else 1)
     
-    # Non-interactive mode
+    # Non-interactive mode (single distribution)
     if args.family and args.distribution:
         if args.family not in LINUX_FAMILIES:
             print(f"{Colors.RED}❌ Unknown family: {args.family}{Colors.RESET}")
@@ -502,7 +997,8 @@ def main():
             sys.exit(1)
         
         success = start_vps_environment(args.family, args.distribution, args.mode, 
-                                      args.state or "", args.build)
+                                      args.state or "", args.build, snapshot_filters=snapshot_filters,
+                                      archive_options=archive_options)
         
         if args.logs and success:
             container_name = LINUX_FAMILIES[args.family]["distributions"][args.distribution]["container"]
@@ -553,8 +1049,10 @@ def main():
         state_name = ""
         if selected_mode == "snapshot":
             state_name = input(f"{Colors.YELLOW}Enter snapshot name: {Colors.RESET}")
+        elif selected_mode == "export":
+            state_name = input(f"{Colors.YELLOW}Snapshot to export (blank = persistent data): {Colors.RESET}").strip()
         elif selected_mode == "restore":
-            snapshots = show_existing_snapshots(selected_distro)
+            snapshots = show_existing_snapshots(selected_distro, snapshot_filters)
             if not snapshots:
                 print(f"{Colors.RED}❌ No snapshots available. Press Enter to continue...{Colors.RESET}")
                 input()
@@ -564,10 +1062,11 @@ def main():
             if snapshot_choice == "back":
                 continue
             
-            state_name = snapshots[int(snapshot_choice) - 1].replace(f"{selected_distro}-snapshot-", "")
+            state_name = snapshots[int(snapshot_choice) - 1]
         
         # Step 5: Execute
-        success = start_vps_environment(selected_family, selected_distro, selected_mode, state_name, args.build)
+        success = start_vps_environment(selected_family, selected_distro, selected_mode, state_name, args.build,
+                                        archive_options=archive_options)
         
         if success:
             print()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Base Image Prefetch
+Parses the FROM lines of the distro Dockerfiles and pulls every missing base
+image concurrently in the background, so builds find their base image local
+instead of each pulling it lazily as it starts. Builds wait only for their
+own base image. Reports bytes pulled and the time saved over serial pulls.
+A registry prefix (e.g. a local `registry:2` mirror) can stand in for the
+upstream registries.
+"""
+
+import re
+import sys
+import time
+import argparse
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from docker_api import DockerAPIError, get_client
+from family_registry import DISTRIBUTIONS
+
+FROM_LINE = re.compile(r"^\s*FROM\s+(?:--platform=\S+\s+)?(\S+)(?:\s+AS\s+(\S+))?", re.IGNORECASE)
+DEFAULT_WORKERS = 4
+PULL_TIMEOUT = 1800
+WAIT_TIMEOUT = PULL_TIMEOUT + 60  # A build never waits longer than one pull may take
+
+
+def dockerfile_base_images(dockerfile: Path) -> List[str]:
+    """External images named by FROM lines (build stages, scratch and ARG-based refs are skipped)"""
+    images, stages = [], set()
+    for line in Path(dockerfile).read_text().splitlines():
+        match = FROM_LINE.match(line)
+        if not match:
+            continue
+        image, stage = match.group(1), match.group(2)
+        if image.lower() not in stages and image != "scratch" and "$" not in image and image not in images:
+            images.append(image)
+        if stage:
+            stages.add(stage.lower())
+    return images
+
+
+def split_reference(image: str) -> Tuple[str, str]:
+    """Split an image reference into (repository, tag or digest); the tag defaults to latest"""
+    if "@" in image:
+        repo, digest = image.split("@", 1)
+        return repo, digest
+    name_start = image.rfind("/") + 1
+    if ":" in image[name_start:]:
+        repo, tag = image.rsplit(":", 1)
+        return repo, tag
+    return image, "latest"
+
+
+def mirror_reference(image: str, registry: str) -> str:
+    """The same image under a registry prefix, dropping any upstream registry host"""
+    first, _, rest = image.partition("/")
+    if rest and ("." in first or ":" in first or first == "localhost"):
+        image = rest
+    return f"{registry.rstrip('/')}/{image}"
+
+
+def format_size(size_bytes: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size_bytes < 1024:
+            return f"{size_bytes:.1f}{unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.1f}TB"
+
+
+class PrefetchResult:
+    """Outcome of one base image"""
+
+    def __init__(self, image: str, distros: List[str]):
+        self.image = image
+        self.distros = distros
+        self.status = "queued"  # queued, present, pulling, pulled or failed
+        self.bytes = 0
+        self.seconds = 0.0
+        self.error = ""
+        self.done = threading.Event()
+
+
+class BaseImagePrefetcher:
+    """Background pulls of the base images of a set of distributions"""
+
+    def __init__(self, dockerfiles: Dict[str, Path], registry: Optional[str] = None,
+                 workers: int = DEFAULT_WORKERS, log=None):
+        """`dockerfiles` maps distro keys to Dockerfiles, in the order builds will start"""
+        self.registry = registry
+        self.workers = workers
+        self.log = log or (lambda message: None)
+        self.results: Dict[str, PrefetchResult] = {}
+        self.distro_images: Dict[str, List[str]] = {}
+        self.waited: Dict[str, float] = {}
+        for distro_key, dockerfile in dockerfiles.items():
+            images = dockerfile_base_images(dockerfile) if Path(dockerfile).exists() else []
+            self.distro_images[distro_key] = images
+            for image in images:
+                self.results.setdefault(image, PrefetchResult(image, [])).distros.append(distro_key)
+        self.started = 0.0
+        self.finished = 0.0
+        self._thread = None
+
+    def start(self) -> "BaseImagePrefetcher":
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            self._prefetch()
+        except Exception as e:
+            # Never leave a build blocked on an event nobody will set
+            self.log(f"Base image prefetch failed: {e}")
+            for result in self.results.values():
+                if not result.done.is_set():
+                    result.status = "failed"
+                    result.error = result.error or str(e)
+                    result.done.set()
+        finally:
+            self.finished = time.time()
+
+    def _prefetch(self) -> None:
+        client = get_client()
+        missing = []
+        for result in self.results.values():
+            if self._present(client, result.image):
+                result.status = "present"
+                result.done.set()
+            else:
+                missing.append(result)
+        if missing:
+            self.log(f"Prefetching {len(missing)} base image(s): " + ", ".join(r.image for r in missing))
+            with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+                for result in missing:
+                    pool.submit(self._pull, client, result)
+
+    @staticmethod
+    def _present(client, image: str) -> bool:
+        if client:
+            try:
+                return client.inspect_image(image) is not None
+            except (DockerAPIError, OSError):
+                pass
+        return subprocess.run(["docker", "image", "inspect", image], capture_output=True).returncode == 0
+
+    def _pull(self, client, result: PrefetchResult) -> None:
+        source = mirror_reference(result.image, self.registry) if self.registry else result.image
+        result.status = "pulling"
+        start = time.time()
+        try:
+            if client:
+                result.bytes = self._pull_api(client, source)
+            else:
+                result.bytes = self._pull_cli(source)
+            if source != result.image:
+                self._retag(client, source, result.image)
+            result.status = "pulled"
+        except Exception as e:
+            result.status = "failed"
+            result.error = str(e)
+        finally:
+            result.seconds = time.time() - start
+            result.done.set()
+        self.log(f"Base image {result.image}: {result.status} in {result.seconds:.1f}s"
+                 + (f" ({format_size(result.bytes)})" if result.bytes else "")
+                 + (f" - {result.error}" if result.error else ""))
+
+    @staticmethod
+    def _pull_api(client, source: str) -> int:
+        """Pull through the Engine API; returns compressed bytes downloaded (layers already present excluded)"""
+        repo, tag = split_reference(source)
+        layer_sizes, downloaded = {}, set()
+        for message in client.pull_image(repo, tag, timeout=PULL_TIMEOUT):
+            if "error" in message:
+                raise RuntimeError(message["error"])
+            layer, status = message.get("id"), message.get("status", "")
+            total = (message.get("progressDetail") or {}).get("total")
+            if layer and status == "Downloading" and total:
+                layer_sizes[layer] = total
+            elif layer and status in ("Download complete", "Pull complete") and layer in layer_sizes:
+                downloaded.add(layer)
+        return sum(layer_sizes[layer] for layer in downloaded)
+
+    @staticmethod
+    def _pull_cli(source: str) -> int:
+        """Pull with the docker CLI; returns the image size (the CLI does not report download bytes)"""
+        result = subprocess.run(["docker", "pull", "--quiet", source], capture_output=True, text=True,
+                                timeout=PULL_TIMEOUT)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "docker pull failed")
+        size = subprocess.run(["docker", "image", "inspect", "--format", "{{.Size}}", source],
+                              capture_output=True, text=True)
+        return int(size.stdout.strip() or 0) if size.returncode == 0 else 0
+
+    @staticmethod
+    def _retag(client, source: str, image: str) -> None:
+        repo, tag = split_reference(image)
+        if client:
+            client.tag_image(source, repo, tag)
+        elif subprocess.run(["docker", "tag", source, image], capture_output=True).returncode != 0:
+            raise RuntimeError(f"could not tag {source} as {image}")
+
+    def wait(self, distro_key: str, timeout: float = WAIT_TIMEOUT) -> bool:
+        """Block until this distribution's base images are local; False if any failed or timeout ran out"""
+        start = time.time()
+        deadline = start + timeout
+        results = [self.results[image] for image in self.distro_images.get(distro_key, [])]
+        for result in results:
+            if not result.done.wait(max(0.0, deadline - time.time())):
+                break
+        self.waited[distro_key] = time.time() - start
+        return all(result.done.is_set() and result.status in ("present", "pulled") for result in results)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread:
+            self._thread.join(timeout)
+
+    def summary(self) -> Dict:
+        pulled = [r for r in self.results.values() if r.status == "pulled"]
+        serial = sum(r.seconds for r in pulled)
+        wall = (self.finished or time.time()) - self.started if pulled else 0.0
+        return {
+            "images": len(self.results),
+            "present": sum(1 for r in self.results.values() if r.status == "present"),
+            "pulled": len(pulled),
+            "failed": sum(1 for r in self.results.values() if r.status == "failed"),
+            "bytes": sum(r.bytes for r in pulled),
+            "serial_seconds": serial,
+            "wall_seconds": wall,
+            "saved_seconds": max(0.0, serial - wall),
+            "waited_seconds": sum(self.waited.values()),
+        }
+
+    def lines(self) -> List[str]:
+        rows = [f"{'Base image':<36} {'Status':<8} {'Size':>10} {'Time':>8}  Used by"]
+        for result in self.results.values():
+            size = format_size(result.bytes) if result.bytes else "-"
+            seconds = f"{result.seconds:.1f}s" if result.status in ("pulled", "failed") else "-"
+            rows.append(f"{result.image:<36} {result.status:<8} {size:>10} {seconds:>8}  {', '.join(result.distros)}")
+        stats = self.summary()
+        rows.append(f"Pulled {stats['pulled']} ({format_size(stats['bytes'])}), already present {stats['present']}, "
+                    f"failed {stats['failed']}")
+        if stats["pulled"]:
+            rows.append(f"Concurrent pulls took {stats['wall_seconds']:.1f}s vs {stats['serial_seconds']:.1f}s serially "
+                        f"(saved {stats['saved_seconds']:.1f}s); builds waited {stats['waited_seconds']:.1f}s")
+        return rows
+
+
+def distro_dockerfiles(distro_keys: Optional[List[str]] = None) -> Dict[str, Path]:
+    keys = distro_keys or list(DISTRIBUTIONS)
+    return {key: Path(DISTRIBUTIONS[key]["context_dir"]) / "Dockerfile" for key in keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pull missing distro base images concurrently")
+    parser.add_argument("distros", nargs="*", help="Distributions (default: all)")
+    parser.add_argument("--registry", help="Pull through this registry prefix (e.g. localhost:5000) and retag")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent pulls")
+    parser.add_argument("--list", action="store_true", help="Only list base images")
+    args = parser.parse_args()
+
+    unknown = [key for key in args.distros if key not in DISTRIBUTIONS]
+    if unknown:
+        print(f"Unknown distribution(s): {', '.join(unknown)}")
+        sys.exit(1)
+
+    prefetcher = BaseImagePrefetcher(distro_dockerfiles(args.distros), args.registry, args.workers, log=print)
+    if args.list:
+        for image, result in prefetcher.results.items():
+            print(f"{image:<36} {', '.join(result.distros)}")
+        return
+    prefetcher.start().join()
+    for line in prefetcher.lines():
+        print(line)
+    sys.exit(1 if prefetcher.summary()["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
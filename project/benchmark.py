@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Container Lifecycle Benchmark
+Runs each distribution through its lifecycle N times (start from a removed
+container, time to running, time to an SSH banner, idle memory after a
+settle period, teardown) and records image size once. Results are written as
+JSON; the compare command checks a run against a stored baseline and exits
+non-zero when any median got worse than the threshold, so Dockerfile changes
+under distros/ can be gated on it.
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from docker_api import DockerAPIError, get_client
+from family_registry import LINUX_FAMILIES
+from preflight import COMPOSE_FILE
+from readiness import wait_for_container, wait_for_ssh
+
+STATE_DIR = Path(__file__).resolve().parent / ".vps-state"
+RESULTS_DIR = STATE_DIR / "benchmarks"
+BASELINE_FILE = STATE_DIR / "benchmark-baseline.json"
+DEFAULT_ITERATIONS = 3
+DEFAULT_SETTLE = 5.0
+DEFAULT_THRESHOLD = 10.0  # Percent a median may grow before it counts as a regression
+START_TIMEOUT = 120
+MEMORY_UNITS = {"B": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4,
+                "kB": 1000, "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4}
+
+# Lower is better for every metric. Changes smaller than the floor are noise.
+METRICS = {
+    "cold_start_seconds": {"label": "Cold start", "unit": "s", "floor": 0.25},
+    "time_to_ssh_seconds": {"label": "Time to SSH", "unit": "s", "floor": 0.25},
+    "idle_memory_bytes": {"label": "Idle memory", "unit": "bytes", "floor": 8 * 1024 ** 2},
+    "teardown_seconds": {"label": "Teardown", "unit": "s", "floor": 0.25},
+    "image_size_bytes": {"label": "Image size", "unit": "bytes", "floor": 1024 ** 2},
+}
+
+
+def parse_memory(text: str) -> int:
+    """Parse `docker stats` sizes such as '12.5MiB' or '800kB'"""
+    match = re.match(r"^([\d.]+)\s*([A-Za-z]+)$", text.strip())
+    if not match or match.group(2) not in MEMORY_UNITS:
+        return -1
+    return int(float(match.group(1)) * MEMORY_UNITS[match.group(2)])
+
+
+def format_value(metric: str, value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    if METRICS[metric]["unit"] == "bytes":
+        return f"{value / 1024 ** 2:.1f}MiB"
+    return f"{value:.2f}s"
+
+
+def _compose(action: str, distro: Dict) -> subprocess.CompletedProcess:
+    base = ["docker-compose", "-f", str(COMPOSE_FILE), "--profile", distro["profile"]]
+    if action == "up":
+        args = base + ["up", "-d", "--no-deps", distro["service"]]
+    else:
+        args = base + ["rm", "-s", "-f", distro["service"]]
+    return subprocess.run(args, capture_output=True, text=True)
+
+
+def idle_memory(container: str) -> int:
+    """Memory in use by the container, excluding reclaimable page cache (-1 if unknown)"""
+    client = get_client()
+    if client:
+        try:
+            memory = client.container_stats(container).get("memory_stats") or {}
+            stats = memory.get("stats") or {}
+            # cgroup v2 reports inactive_file, v1 total_inactive_file (or cache on old daemons)
+            reclaimable = stats.get("inactive_file", stats.get("total_inactive_file", stats.get("cache", 0)))
+            if "usage" in memory:
+                return memory["usage"] - reclaimable
+        except (DockerAPIError, OSError):
+            pass
+    result = subprocess.run(["docker", "stats", "--no-stream", "--format", "{{.MemUsage}}", container],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return -1
+    return parse_memory(result.stdout.split("/", 1)[0])
+
+
+def image_size(container: str) -> int:
+    """Size of the image the container runs (-1 if unknown)"""
+    client = get_client()
+    if client:
+        try:
+            info = client.inspect_container(container)
+            image = info and client.inspect_image(info["Image"])
+            if image:
+                return image.get("Size", -1)
+        except (DockerAPIError, OSError):
+            pass
+    result = subprocess.run(["docker", "inspect", "--format", "{{.Image}}", container], capture_output=True, text=True)
+    if result.returncode != 0:
+        return -1
+    size = subprocess.run(["docker", "image", "inspect", "--format", "{{.Size}}", result.stdout.strip()],
+                          capture_output=True, text=True)
+    return int(size.stdout.strip() or -1) if size.returncode == 0 else -1
+
+
+def benchmark_iteration(distro: Dict, settle: float, want_image_size: bool) -> Dict:
+    """One lifecycle pass; metrics that could not be measured are left out"""
+    sample = {}
+    _compose("rm", distro)
+
+    start = time.time()
+    result = _compose("up", distro)
+    if result.returncode != 0:
+        return {"error": f"start failed: {(result.stderr or result.stdout).strip()[-200:]}"}
+    try:
+        deadline = start + START_TIMEOUT
+        running = wait_for_container(distro["container"], deadline, since=start - 1)
+        if not running.ready:
+            return {"error": f"not running: {running.detail}"}
+        sample["cold_start_seconds"] = time.time() - start
+        ssh = wait_for_ssh(distro["port"], deadline)
+        if not ssh.ready:
+            sample["error"] = f"no SSH: {ssh.detail}"
+            return sample
+        sample["time_to_ssh_seconds"] = time.time() - start
+
+        time.sleep(settle)
+        memory = idle_memory(distro["container"])
+        if memory >= 0:
+            sample["idle_memory_bytes"] = memory
+        if want_image_size:
+            size = image_size(distro["container"])
+            if size >= 0:
+                sample["image_size_bytes"] = size
+    finally:
+        teardown = time.time()
+        if _compose("rm", distro).returncode == 0 and "cold_start_seconds" in sample:
+            sample["teardown_seconds"] = time.time() - teardown
+    return sample
+
+
+def summarize(samples: List[Dict]) -> Dict[str, Dict]:
+    summary = {}
+    for metric in METRICS:
+        values = [sample[metric] for sample in samples if metric in sample]
+        if values:
+            summary[metric] = {"median": statistics.median(values), "min": min(values), "max": max(values),
+                               "stdev": statistics.stdev(values) if len(values) > 1 else 0.0, "n": len(values)}
+    return summary
+
+
+def selected_distros(distro_keys: List[str], family_keys: List[str]) -> Dict[str, Dict]:
+    """Distributions in LINUX_FAMILIES order, filtered by distro or family keys"""
+    selected = {}
+    for family_key, family in LINUX_FAMILIES.items():
+        for distro_key, distro in family["distributions"].items():
+            if (not distro_keys and not family_keys) or distro_key in distro_keys or family_key in family_keys:
+                selected[distro_key] = distro
+    return selected
+
+
+def run_benchmark(distros: Dict[str, Dict], iterations: int = DEFAULT_ITERATIONS,
+                  settle: float = DEFAULT_SETTLE, log=print) -> Dict:
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "host": platform.node(),
+        "iterations": iterations,
+        "settle_seconds": settle,
+        "distros": {},
+    }
+    for distro_key, distro in distros.items():
+        samples, errors = [], []
+        for index in range(iterations):
+            sample = benchmark_iteration(distro, settle, want_image_size=(index == 0))
+            if "error" in sample:
+                errors.append(sample.pop("error"))
+            samples.append(sample)
+            measured = ", ".join(f"{METRICS[m]['label'].lower()} {format_value(m, v)}" for m, v in sample.items())
+            log(f"{distro_key} {index + 1}/{iterations}: {measured or errors[-1]}")
+        results["distros"][distro_key] = {
+            "name": distro["name"],
+            "samples": samples,
+            "summary": summarize(samples),
+            "errors": errors,
+        }
+    return results
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD, subset: bool = False) -> List[Dict]:
+    """Every baseline metric with its change; a row regresses when its median grew by
+    more than threshold percent (and its noise floor), or when it could not be compared.
+
+    Baseline distributions or metrics absent from the current run and distributions
+    with failed runs are regressions too: a distro that no longer starts must not pass.
+    With subset, baseline distributions left out of the current run are skipped.
+    """
+    rows = []
+    for distro_key, entry in current["distros"].items():
+        if entry.get("errors"):
+            rows.append({"distro": distro_key, "metric": None, "baseline": None, "current": None, "change": None,
+                         "regression": True,
+                         "problem": f"{len(entry['errors'])} failed run(s): {entry['errors'][0]}"})
+    for distro_key, before_entry in baseline["distros"].items():
+        entry = current["distros"].get(distro_key)
+        if entry is None:
+            if not subset:
+                rows.append({"distro": distro_key, "metric": None, "baseline": None, "current": None,
+                             "change": None, "regression": True, "problem": "missing from the current run"})
+            continue
+        for metric, before in before_entry.get("summary", {}).items():
+            if metric not in METRICS:
+                continue
+            stats = entry["summary"].get(metric)
+            if stats is None:
+                rows.append({"distro": distro_key, "metric": metric, "baseline": before["median"], "current": None,
+                             "change": None, "regression": True, "problem": "not measured"})
+                continue
+            old, new = before["median"], stats["median"]
+            change = (new - old) / old * 100 if old else 0.0
+            rows.append({"distro": distro_key, "metric": metric, "baseline": old, "current": new, "change": change,
+                         "regression": change > threshold and new - old > METRICS[metric]["floor"],
+                         "problem": None})
+    return rows
+
+
+def print_summary(results: Dict) -> None:
+    print(f"{'Distro':<12} " + " ".join(f"{spec['label']:>12}" for spec in METRICS.values()) + "  Errors")
+    for distro_key, entry in results["distros"].items():
+        cells = " ".join(f"{format_value(metric, (entry['summary'].get(metric) or {}).get('median')):>12}"
+                         for metric in METRICS)
+        print(f"{distro_key:<12} {cells}  {len(entry['errors'])}")
+
+
+def print_comparison(rows: List[Dict], threshold: float) -> None:
+    print(f"{'Distro':<12} {'Metric':<13} {'Baseline':>12} {'Current':>12} {'Change':>8}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        label = METRICS[row["metric"]]["label"] if row["metric"] else "-"
+        change = f"{row['change']:>+7.1f}%" if row["change"] is not None else f"{'-':>8}"
+        problem = f" ({row['problem']})" if row["problem"] else ""
+        print(f"{row['distro']:<12} {label:<13} "
+              f"{format_value(row['metric'], row['baseline']):>12} {format_value(row['metric'], row['current']):>12} "
+              f"{change}{flag}{problem}")
+    regressed = sum(1 for row in rows if row["regression"])
+    print()
+    print(f"{regressed} regression(s) beyond {threshold:.0f}% or missing" if regressed
+          else f"No regressions beyond {threshold:.0f}%")
+
+
+def latest_results() -> Optional[Path]:
+    files = sorted(RESULTS_DIR.glob("benchmark-*.json"))
+    return files[-1] if files else None
+
+
+def load_results(path: Path) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_results(results: Dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Container lifecycle benchmarks")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Benchmark distributions and write JSON results")
+    run_parser.add_argument("distros", nargs="*", help="Distributions (default: all)")
+    run_parser.add_argument("--family", action="append", default=[], help="Benchmark a whole family")
+    run_parser.add_argument("-n", "--iterations", type=int, default=DEFAULT_ITERATIONS, help="Runs per distribution")
+    run_parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE,
+                            help="Seconds to idle after SSH is up before sampling memory")
+    run_parser.add_argument("--output", type=Path, help="Results file (default: .vps-state/benchmarks/)")
+    run_parser.add_argument("--save-baseline", action="store_true", help="Also store the results as the baseline")
+
+    compare_parser = subparsers.add_parser("compare", help="Check results against the baseline")
+    compare_parser.add_argument("results", nargs="?", type=Path, help="Results file (default: latest run)")
+    compare_parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="Baseline results file")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="Percent a median may grow before it is a regression")
+    compare_parser.add_argument("--subset", action="store_true",
+                                help="Skip baseline distributions the results do not include (partial runs)")
+    compare_parser.add_argument("--json", action="store_true", help="Print the comparison as JSON")
+
+    baseline_parser = subparsers.add_parser("baseline", help="Store a results file as the baseline")
+    baseline_parser.add_argument("results", nargs="?", type=Path, help="Results file (default: latest run)")
+
+    args = parser.parse_args()
+
+    if args.action == "run":
+        known = {key for family in LINUX_FAMILIES.values() for key in family["distributions"]}
+        unknown = [key for key in args.distros if key not in known] + \
+                  [key for key in args.family if key not in LINUX_FAMILIES]
+        if unknown:
+            print(f"Unknown distribution(s) or family(s): {', '.join(unknown)}")
+            sys.exit(1)
+        results = run_benchmark(selected_distros(args.distros, args.family), args.iterations, args.settle)
+        output = args.output or RESULTS_DIR / f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+        save_results(results, output)
+        print()
+        print_summary(results)
+        print(f"\nResults written to {output}")
+        if args.save_baseline:
+            save_results(results, BASELINE_FILE)
+            print(f"Baseline updated: {BASELINE_FILE}")
+        sys.exit(1 if any(entry["errors"] for entry in results["distros"].values()) else 0)
+
+    results_file = args.results or latest_results()
+    if not results_file or not results_file.exists():
+        print("No benchmark results found; run `benchmark.py run` first")
+        sys.exit(1)
+
+    if args.action == "baseline":
+        save_results(load_results(results_file), BASELINE_FILE)
+        print(f"Baseline set from {results_file}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; store one with `benchmark.py baseline`")
+        sys.exit(1)
+    rows = compare(load_results(args.baseline), load_results(results_file), args.threshold, args.subset)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_comparison(rows, args.threshold)
+    sys.exit(1 if any(row["regression"] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
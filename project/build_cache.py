@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Content-Hash Build Cache
+Hashes each distribution's build context together with its family_config.py
+and stamps the digest on the image as a label (via the CONTEXT_HASH build
+arg), so builders can skip `docker compose build` when an image built from
+identical inputs is what the compose service's tag points at.
+"""
+
+import os
+import re
+import json
+import hashlib
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from docker_api import DockerAPIError, get_client
+from preflight import COMPOSE_FILE
+
+PROJECT_DIR = Path(__file__).resolve().parent
+FAMILIES_DIR = PROJECT_DIR / "families"
+HASH_LABEL = "vps.context-hash"
+DISTRO_LABEL = "vps.distro"
+# Set to the package cache sidecar's URL (pkg_cache_proxy.py) to route builds through it
+PKG_CACHE_ENV = "PKG_CACHE_URL"
+DEFAULT_PKG_CACHE_URL = "http://host.docker.internal:3142"
+
+
+def context_dir(distro_config: Dict) -> Path:
+    """Build context of a distribution (dockerfile_path is relative to families/)"""
+    return (FAMILIES_DIR / distro_config["dockerfile_path"]).resolve()
+
+
+def context_hash(build_context: Path, family_config: Path) -> str:
+    """SHA-256 over every file in the build context plus the family config.
+
+    Paths are included so renames and moves change the digest too.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(p for p in Path(build_context).rglob("*") if p.is_file()):
+        digest.update(path.relative_to(build_context).as_posix().encode() + b"\0")
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        digest.update(b"\0")
+    digest.update(b"family_config.py\0")
+    digest.update(Path(family_config).read_bytes())
+    return digest.hexdigest()
+
+
+def service_image_names(service: str) -> List[str]:
+    """Names docker-compose may have given a service's image, most likely first.
+
+    Compose v1 names images <project>_<service> with the project name stripped to
+    [a-z0-9]; v2 uses <project>-<service> and keeps dashes and underscores.
+    """
+    project = (os.environ.get("COMPOSE_PROJECT_NAME") or COMPOSE_FILE.parent.name).lower()
+    names = [f"devcontainer_server_docker_{service}",
+             f"{re.sub(r'[^a-z0-9]', '', project)}_{service}",
+             f"{re.sub(r'[^a-z0-9_-]', '', project)}-{service}"]
+    return list(dict.fromkeys(names))
+
+
+def _image_labels(name: str) -> Optional[Dict[str, str]]:
+    """Labels of the image a tag points at, or None if the tag does not exist"""
+    client = get_client()
+    if client:
+        try:
+            image = client.inspect_image(name)
+            return None if image is None else (image.get("Config") or {}).get("Labels") or {}
+        except (DockerAPIError, OSError):
+            pass
+    result = subprocess.run(["docker", "image", "inspect", "--format", "{{json .Config.Labels}}", name],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip() or "null") or {}
+
+
+def service_image_hash(distro_key: str, service: str) -> Optional[str]:
+    """Context hash of the image the compose service's tag currently points at.
+
+    Only the tagged image counts: an older build with the same labels can
+    survive as a dangling image, but compose would not run it.
+    """
+    for name in service_image_names(service):
+        labels = _image_labels(name)
+        if labels is not None:
+            return labels.get(HASH_LABEL) if labels.get(DISTRO_LABEL) == distro_key else None
+    return None
+
+
+def proxy_build_args() -> str:
+    """Build arguments that send package downloads through the package cache, if enabled.
+
+    http_proxy is one of Docker's predefined build args: RUN steps see it
+    without an ARG line, and it is left out of the image and the build cache key.
+    """
+    url = os.environ.get(PKG_CACHE_ENV, "")
+    return f"--build-arg http_proxy={url} --build-arg HTTP_PROXY={url}" if url else ""
+
+
+def build_args(digest: str) -> str:
+    """docker compose build arguments that stamp the digest label"""
+    return f"--build-arg CONTEXT_HASH={digest} {proxy_build_args()}".rstrip()
+
+
+class BuildReport:
+    """Which images were skipped, rebuilt or failed during a run"""
+
+    def __init__(self):
+        self.entries: List[Dict] = []
+
+    def record(self, distro_key: str, action: str, digest: str, seconds: float = 0.0) -> None:
+        self.entries.append({"distro": distro_key, "action": action, "hash": digest[:12], "seconds": seconds})
+
+    def count(self, action: str) -> int:
+        return sum(1 for entry in self.entries if entry["action"] == action)
+
+    def lines(self) -> List[str]:
+        rows = [f"{'Distro':<12} {'Action':<9} {'Context hash':<14} {'Time':>8}"]
+        for entry in self.entries:
+            seconds = f"{entry['seconds']:.1f}s" if entry["action"] != "skipped" else "-"
+            rows.append(f"{entry['distro']:<12} {entry['action']:<9} {entry['hash']:<14} {seconds:>8}")
+        rows.append(f"Skipped: {self.count('skipped')}  Rebuilt: {self.count('rebuilt')}  "
+                    f"Failed: {self.count('failed')}")
+        return rows
+
+
+def build_if_changed(distro_key: str, distro_config: Dict, family_config: Path, run,
+                     report: BuildReport, force: bool = False, service: Optional[str] = None) -> str:
+    """Build a distribution's compose service unless its tagged image has the same context hash.
+
+    `run(cmd)` executes a shell command and returns True on success.
+    Returns the recorded action: "skipped", "rebuilt" or "failed".
+    """
+    digest = context_hash(context_dir(distro_config), family_config)
+    service = service or distro_config.get("service", distro_config["container"])
+    if not force and service_image_hash(distro_key, service) == digest:
+        report.record(distro_key, "skipped", digest)
+        return "skipped"
+
+    start = time.time()
+    action = "rebuilt" if run(f"docker compose build {build_args(digest)} {service}") else "failed"
+    report.record(distro_key, action, digest, time.time() - start)
+    return action
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Build Step Profiler
+Parses BuildKit plain progress output (`#N [stage 2/9] RUN ...`, `#N CACHED`,
+`#N DONE 12.3s`) into per-step durations and cache hits, adds layer sizes
+from `docker history`, and appends one record per build to a JSONL history
+file. The report command shows the slowest steps, cache-hit ratios and
+regressions against earlier runs.
+"""
+
+import re
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from build_cache import DISTRO_LABEL, HASH_LABEL
+
+STATE_DIR = Path(__file__).resolve().parent / ".vps-state"
+HISTORY_FILE = STATE_DIR / "build-history.jsonl"
+PLAIN_PROGRESS_ENV = {"BUILDKIT_PROGRESS": "plain", "DOCKER_BUILDKIT": "1"}
+
+STEP_LINE = re.compile(r"^#(\d+) (.*)$")
+DONE_LINE = re.compile(r"^DONE (\d+(?:\.\d+)?)s$")
+# Dockerfile instructions look like "[2/9] RUN ..." or "[ubuntu-vps 2/9] RUN ..."
+INSTRUCTION = re.compile(r"^\[(?:[^\]]*? )?(\d+)/(\d+)\] (.*)$")
+SIZE_UNITS = {"B": 1, "kB": 1000, "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3}
+
+# A step regressed if it got this much slower than its previous median
+REGRESSION_FACTOR = 1.25
+REGRESSION_MIN_SECONDS = 2.0
+
+
+def parse_docker_size(text: str) -> int:
+    """Parse `docker history` sizes such as '0B', '12.3kB', '245MB'"""
+    match = re.match(r"^([\d.]+)\s*([kKMG]?B)$", text.strip())
+    if not match:
+        return 0
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def _normalize(command: str) -> str:
+    command = re.sub(r"^/bin/sh -c (#\(nop\) )?", "", command.strip())
+    command = re.sub(r"\s*# buildkit$", "", command)
+    return " ".join(command.split())
+
+
+class BuildProfile:
+    """Collects BuildKit steps for one image build; feed() every output line"""
+
+    def __init__(self, distro_key: str):
+        self.distro_key = distro_key
+        self.started = datetime.now(timezone.utc)
+        self.steps: Dict[int, Dict] = {}
+
+    def feed(self, line: str) -> None:
+        match = STEP_LINE.match(line.strip())
+        if not match:
+            return
+        step_id, text = int(match.group(1)), match.group(2)
+        step = self.steps.get(step_id)
+        if step is None:
+            instruction = INSTRUCTION.match(text)
+            if not instruction:
+                return  # Internal steps: loading context, metadata, exporting
+            self.steps[step_id] = {"index": int(instruction.group(1)), "name": instruction.group(3),
+                                   "seconds": 0.0, "cached": False, "size": -1, "error": False}
+            return
+        done = DONE_LINE.match(text)
+        if done:
+            step["seconds"] = float(done.group(1))
+        elif text == "CACHED":
+            step["cached"] = True
+        elif text.startswith("ERROR"):
+            step["error"] = True
+
+    def ordered_steps(self) -> List[Dict]:
+        return sorted(self.steps.values(), key=lambda step: step["index"])
+
+    def attach_layer_sizes(self) -> Optional[str]:
+        """Match `docker history` layers of the newest image for this distro; return its context hash"""
+        result = subprocess.run(["docker", "image", "ls", "-q", "--filter", f"label={DISTRO_LABEL}={self.distro_key}"],
+                                capture_output=True, text=True)
+        image_ids = result.stdout.split() if result.returncode == 0 else []
+        if not image_ids:
+            return None
+        image = image_ids[0]
+
+        history = subprocess.run(["docker", "history", "--no-trunc", "--format", "{{.CreatedBy}}\t{{.Size}}", image],
+                                 capture_output=True, text=True)
+        layers = []
+        for row in history.stdout.splitlines() if history.returncode == 0 else []:
+            created_by, _, size = row.rpartition("\t")
+            layers.append((_normalize(created_by), parse_docker_size(size)))
+        for step in self.steps.values():
+            _, _, args = step["name"].partition(" ")
+            needle = " ".join(args.split())[:60]
+            for created_by, size in layers:
+                if needle and needle in created_by:
+                    step["size"] = size
+                    break
+
+        labels = subprocess.run(["docker", "image", "inspect", "--format",
+                                 f'{{{{index .Config.Labels "{HASH_LABEL}"}}}}', image],
+                                capture_output=True, text=True)
+        if labels.returncode != 0:
+            return None
+        return labels.stdout.strip() or None
+
+    def record(self, success: bool, total_seconds: float, history_file: Path = HISTORY_FILE) -> Dict:
+        """Append this build to the history file and return the record"""
+        context_hash = self.attach_layer_sizes() if success else None
+        entry = {
+            "timestamp": self.started.isoformat(timespec="seconds"),
+            "distro": self.distro_key,
+            "context_hash": context_hash or "",
+            "success": success,
+            "total_seconds": round(total_seconds, 2),
+            "steps": self.ordered_steps(),
+        }
+        history_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(history_file, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        return entry
+
+
+def load_history(history_file: Path = HISTORY_FILE, distro_key: Optional[str] = None) -> List[Dict]:
+    entries = []
+    if not history_file.exists():
+        return entries
+    with open(history_file) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if not distro_key or entry["distro"] == distro_key:
+                entries.append(entry)
+    return entries
+
+
+def estimated_build_seconds(entries: List[Dict], recent: int = 5) -> Dict[str, float]:
+    """Median duration of each distro's most recent successful builds.
+
+    Builds where every step came from the layer cache say nothing about how
+    long a real build takes, so they are left out.
+    """
+    durations = {}
+    for entry in entries:
+        fully_cached = entry["steps"] and all(step["cached"] for step in entry["steps"])
+        if entry["success"] and not fully_cached:
+            durations.setdefault(entry["distro"], []).append(entry["total_seconds"])
+    return {distro: statistics.median(runs[-recent:]) for distro, runs in durations.items()}
+
+
+def slowest_steps(entries: List[Dict], top: int = 10) -> List[Dict]:
+    """Slowest uncached steps from each distro's most recent build"""
+    latest = {}
+    for entry in entries:
+        latest[entry["distro"]] = entry
+    steps = [dict(step, distro=distro) for distro, entry in latest.items()
+             for step in entry["steps"] if not step["cached"]]
+    return sorted(steps, key=lambda step: step["seconds"], reverse=True)[:top]
+
+
+def cache_hit_ratios(entries: List[Dict]) -> Dict[str, float]:
+    totals, hits = {}, {}
+    for entry in entries:
+        for step in entry["steps"]:
+            totals[entry["distro"]] = totals.get(entry["distro"], 0) + 1
+            hits[entry["distro"]] = hits.get(entry["distro"], 0) + step["cached"]
+    return {distro: hits[distro] / totals[distro] for distro in sorted(totals)}
+
+
+def regressions(entries: List[Dict]) -> List[Dict]:
+    """Uncached steps in each distro's latest build that are slower than their earlier median"""
+    by_distro = {}
+    for entry in entries:
+        by_distro.setdefault(entry["distro"], []).append(entry)
+
+    found = []
+    for distro, runs in by_distro.items():
+        latest, previous = runs[-1], runs[:-1]
+        for step in latest["steps"]:
+            if step["cached"]:
+                continue
+            earlier = [s["seconds"] for run in previous for s in run["steps"]
+                       if s["name"] == step["name"] and not s["cached"]]
+            if not earlier:
+                continue
+            baseline = statistics.median(earlier)
+            if step["seconds"] > baseline * REGRESSION_FACTOR and step["seconds"] - baseline > REGRESSION_MIN_SECONDS:
+                found.append({"distro": distro, "name": step["name"], "seconds": step["seconds"],
+                              "baseline": baseline, "runs": len(earlier)})
+    return sorted(found, key=lambda row: row["seconds"] - row["baseline"], reverse=True)
+
+
+def _short(name: str, width: int = 52) -> str:
+    return name if len(name) <= width else name[:width - 3] + "..."
+
+
+def print_report(distro_key: Optional[str] = None, top: int = 10, history_file: Path = HISTORY_FILE) -> None:
+    entries = load_history(history_file, distro_key)
+    if not entries:
+        print("No build history recorded yet")
+        return
+
+    print(f"Builds recorded: {len(entries)}")
+    print()
+    print("Slowest steps (latest build per distro)")
+    print(f"{'Distro':<12} {'Step':<53} {'Time':>8} {'Layer':>10}")
+    for step in slowest_steps(entries, top):
+        size = f"{step['size'] / 1000 ** 2:.1f}MB" if step["size"] >= 0 else "-"
+        print(f"{step['distro']:<12} {_short(step['name']):<53} {step['seconds']:>7.1f}s {size:>10}")
+
+    print()
+    print("Cache-hit ratio")
+    for distro, ratio in cache_hit_ratios(entries).items():
+        print(f"  {distro:<12} {ratio:>6.0%}")
+
+    print()
+    found = regressions(entries)
+    if not found:
+        print("No regressions against previous runs")
+        return
+    print(f"Regressions (>{REGRESSION_FACTOR:.2f}x previous median)")
+    print(f"{'Distro':<12} {'Step':<53} {'Now':>8} {'Before':>8}")
+    for row in found:
+        print(f"{row['distro']:<12} {_short(row['name']):<53} {row['seconds']:>7.1f}s {row['baseline']:>7.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build step profiler")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    report_parser = subparsers.add_parser("report", help="Slowest steps, cache hits and regressions")
+    report_parser.add_argument("distro", nargs="?", help="Limit to one distribution")
+    report_parser.add_argument("--top", type=int, default=10, help="Number of slow steps to show")
+
+    parse_parser = subparsers.add_parser("parse", help="Profile a saved `--progress=plain` build log")
+    parse_parser.add_argument("distro")
+    parse_parser.add_argument("log", help="Build log file, or - for stdin")
+
+    args = parser.parse_args()
+
+    if args.action == "report":
+        print_report(args.distro, args.top)
+    elif args.action == "parse":
+        profile = BuildProfile(args.distro)
+        stream = sys.stdin if args.log == "-" else open(args.log)
+        for line in stream:
+            profile.feed(line)
+        for step in profile.ordered_steps():
+            state = "CACHED" if step["cached"] else f"{step['seconds']:.1f}s"
+            print(f"{step['index']:>3} {_short(step['name'], 60):<60} {state:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Streaming Command Runner
+Runs a shell command while streaming its output: the full log is teed to a
+file, only a bounded tail is kept in memory, and both a wall-clock timeout
+and a no-output (idle) timeout are enforced. Per-line and periodic progress
+callbacks let callers drive status displays.
+"""
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, TextIO
+
+DEFAULT_TAIL_LINES = 200
+PROGRESS_INTERVAL = 1.0
+
+
+class CommandResult:
+    """Outcome of a streamed command"""
+
+    def __init__(self, returncode: Optional[int], tail: deque, line_count: int, elapsed: float,
+                 timed_out: Optional[str] = None):
+        self.returncode = returncode
+        self.tail = list(tail)
+        self.line_count = line_count
+        self.elapsed = elapsed
+        self.timed_out = timed_out  # None, "wall" or "idle"
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    @property
+    def output(self) -> str:
+        """The retained tail of the output"""
+        return "\n".join(self.tail)
+
+    def __bool__(self):
+        return self.success
+
+
+def _terminate(process: subprocess.Popen) -> None:
+    """Kill the command and anything it spawned"""
+    try:
+        if os.name != "nt":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except OSError:
+        pass
+
+
+def run_streaming(cmd: str, timeout: Optional[float] = None, idle_timeout: Optional[float] = None,
+                  tail_lines: int = DEFAULT_TAIL_LINES, log_file: Optional[TextIO] = None,
+                  on_line: Optional[Callable[[str], None]] = None,
+                  on_progress: Optional[Callable[[int, float], None]] = None,
+                  cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+                  merge_stderr: bool = True) -> CommandResult:
+    """Run a shell command, streaming stdout+stderr.
+
+    Every line goes to `log_file` (if given) and `on_line`; only the last
+    `tail_lines` are kept. With `merge_stderr` off, stderr lines are only
+    written to `log_file`, so the result holds stdout alone. `on_progress(line_count, elapsed)` is called about
+    once a second. The command is killed if it runs longer than `timeout` or
+    prints nothing for `idle_timeout` seconds. `env` entries are added to
+    the current environment.
+    """
+    start = time.time()
+    kwargs = {"start_new_session": True} if os.name != "nt" else {}
+    stderr = subprocess.STDOUT if merge_stderr else subprocess.PIPE
+    process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=stderr,
+                               stdin=subprocess.DEVNULL, cwd=cwd, text=True, errors="replace",
+                               bufsize=1, env={**os.environ, **env} if env else None, **kwargs)
+
+    tail = deque(maxlen=tail_lines)
+    state = {"lines": 0, "last_output": start}
+    log_lock = threading.Lock()
+
+    def read_output():
+        for line in process.stdout:
+            line = line.rstrip("\n")
+            tail.append(line)
+            state["lines"] += 1
+            state["last_output"] = time.time()
+            if log_file:
+                with log_lock:
+                    log_file.write(line + "\n")
+            if on_line:
+                on_line(line)
+        process.stdout.close()
+
+    def read_stderr():
+        for line in process.stderr:
+            state["last_output"] = time.time()
+            if log_file:
+                with log_lock:
+                    log_file.write(line.rstrip("\n") + "\n")
+        process.stderr.close()
+
+    readers = [threading.Thread(target=read_output, daemon=True)]
+    if not merge_stderr:
+        readers.append(threading.Thread(target=read_stderr, daemon=True))
+    for reader in readers:
+        reader.start()
+
+    timed_out = None
+    next_progress = start + PROGRESS_INTERVAL
+    while True:
+        try:
+            process.wait(timeout=0.2)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        now = time.time()
+        if timeout and now - start > timeout:
+            timed_out = "wall"
+        elif idle_timeout and now - state["last_output"] > idle_timeout:
+            timed_out = "idle"
+        if timed_out:
+            _terminate(process)
+            process.wait()
+            break
+        if on_progress and now >= next_progress:
+            on_progress(state["lines"], now - start)
+            next_progress = now + PROGRESS_INTERVAL
+
+    for reader in readers:
+        reader.join(timeout=5)
+    if log_file:
+        log_file.flush()
+    elapsed = time.time() - start
+    if on_progress:
+        on_progress(state["lines"], elapsed)
+    return CommandResult(process.returncode, tail, state["lines"], elapsed, timed_out)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Docker Engine API Client
+Keep-alive HTTP client for the Docker Engine API over the local unix socket.
+Uses only the Python standard library; callers fall back to the docker CLI
+when no socket is reachable (e.g. Docker Desktop named pipes on Windows).
+"""
+
+import os
+import json
+import queue
+import socket
+import threading
+import http.client
+from urllib.parse import urlencode, quote
+from typing import Dict, Iterator, List, Optional, Any
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+API_VERSION = "v1.41"  # Docker Engine 20.10+
+
+
+class DockerAPIError(Exception):
+    """Raised when the Engine API returns an error status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Docker API error {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection that talks to a unix domain socket instead of TCP"""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+def socket_path_from_env() -> str:
+    """Resolve the daemon socket path from DOCKER_HOST, defaulting to the standard socket"""
+    docker_host = os.environ.get("DOCKER_HOST", "")
+    if docker_host.startswith("unix://"):
+        return docker_host[len("unix://"):]
+    return DEFAULT_SOCKET
+
+
+class DockerAPIClient:
+    """Pooled keep-alive client for the Docker Engine API"""
+
+    def __init__(self, socket_path: Optional[str] = None, pool_size: int = 4, timeout: float = 30):
+        self.socket_path = socket_path or socket_path_from_env()
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def is_available(self) -> bool:
+        """Check that the daemon socket exists (does not contact the daemon)"""
+        return os.path.exists(self.socket_path)
+
+    def close(self) -> None:
+        """Close all pooled connections"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return UnixHTTPConnection(self.socket_path, timeout=self.timeout), False
+
+    def _release(self, conn) -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(self, method: str, path: str, params: Optional[Dict] = None,
+                body: Optional[Any] = None, expect_json: bool = True) -> Any:
+        """Send a request and return the decoded JSON (or raw bytes) response"""
+        url = f"/{API_VERSION}{path}"
+        if params:
+            url += "?" + urlencode({k: v for k, v in params.items() if v is not None})
+
+        headers = {"Host": "docker"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request(method, url, body=payload, headers=headers)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                if reused:
+                    # Stale keep-alive connection; the daemon never saw the request
+                    continue
+                raise
+            try:
+                response = conn.getresponse()
+                data = response.read()
+            except http.client.RemoteDisconnected:
+                conn.close()
+                if reused:
+                    # Closed without a byte of response: the daemon had already dropped
+                    # the idle connection. Anything later (e.g. a timeout while it works
+                    # on a POST) is not retried, so requests are never sent twice.
+                    continue
+                raise
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                raise
+            break
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+        if response.status >= 400:
+            message = data.decode(errors="replace").strip()
+            try:
+                message = json.loads(message).get("message", message)
+            except ValueError:
+                pass
+            raise DockerAPIError(response.status, message)
+
+        if not expect_json:
+            return data
+        return json.loads(data) if data else None
+
+    def ping(self) -> bool:
+        """Return True if the daemon answers /_ping"""
+        try:
+            return self.request("GET", "/_ping", expect_json=False) == b"OK"
+        except (OSError, http.client.HTTPException, DockerAPIError):
+            return False
+
+    def version(self) -> Dict:
+        return self.request("GET", "/version")
+
+    # Volumes
+
+    def list_volumes(self, filters: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        params = {"filters": json.dumps(filters)} if filters else None
+        return self.request("GET", "/volumes", params=params).get("Volumes") or []
+
+    def inspect_volume(self, name: str) -> Optional[Dict]:
+        """Return volume details, or None if the volume does not exist"""
+        try:
+            return self.request("GET", f"/volumes/{quote(name, safe='')}")
+        except DockerAPIError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def create_volume(self, name: str, labels: Optional[Dict[str, str]] = None,
+                      driver: str = "local", driver_opts: Optional[Dict[str, str]] = None) -> Dict:
+        body = {"Name": name, "Driver": driver, "Labels": labels or {}, "DriverOpts": driver_opts or {}}
+        return self.request("POST", "/volumes/create", body=body)
+
+    def remove_volume(self, name: str, force: bool = False) -> None:
+        self.request("DELETE", f"/volumes/{quote(name, safe='')}",
+                     params={"force": "true" if force else "false"}, expect_json=False)
+
+    # Containers
+
+    def list_containers(self, all: bool = False, filters: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        params = {"all": "true" if all else "false"}
+        if filters:
+            params["filters"] = json.dumps(filters)
+        return self.request("GET", "/containers/json", params=params)
+
+    def inspect_container(self, name: str) -> Optional[Dict]:
+        """Return container details, or None if the container does not exist"""
+        try:
+            return self.request("GET", f"/containers/{quote(name, safe='')}/json")
+        except DockerAPIError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def container_stats(self, name: str) -> Dict:
+        """One resource usage sample (the daemon waits about a second to compute CPU deltas)"""
+        return self.request("GET", f"/containers/{quote(name, safe='')}/stats", params={"stream": "false"})
+
+    # Images
+
+    def inspect_image(self, name: str) -> Optional[Dict]:
+        """Return image details, or None if the image is not present locally"""
+        try:
+            # Image references keep their slashes and colons in the path, as the docker CLI sends them
+            return self.request("GET", f"/images/{quote(name, safe='/:@')}/json")
+        except DockerAPIError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def pull_image(self, image: str, tag: str, timeout: Optional[float] = None) -> Iterator[Dict]:
+        """Pull an image, yielding the daemon's JSON progress messages.
+
+        Uses a dedicated connection since the progress stream holds it open.
+        Errors arrive in-band as {"error": ...} messages.
+        """
+        conn = UnixHTTPConnection(self.socket_path, timeout=timeout)
+        try:
+            conn.request("POST", f"/{API_VERSION}/images/create?{urlencode({'fromImage': image, 'tag': tag})}",
+                         headers={"Host": "docker"})
+            response = conn.getresponse()
+            if response.status >= 400:
+                raise DockerAPIError(response.status, response.read().decode(errors="replace").strip())
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
+    def tag_image(self, source: str, repo: str, tag: str) -> None:
+        self.request("POST", f"/images/{quote(source, safe='/:@')}/tag", params={"repo": repo, "tag": tag},
+                     expect_json=False)
+
+    # Events
+
+    def events(self, filters: Optional[Dict[str, List[str]]] = None, since: Optional[float] = None,
+               until: Optional[float] = None, timeout: Optional[float] = None) -> Iterator[Dict]:
+        """Stream daemon events as dicts until `until` passes or the socket times out.
+
+        Uses a dedicated connection since the stream holds it open.
+        """
+        params = {}
+        if filters:
+            params["filters"] = json.dumps(filters)
+        if since is not None:
+            params["since"] = str(int(since))
+        if until is not None:
+            params["until"] = str(int(until) + 1)
+
+        conn = UnixHTTPConnection(self.socket_path, timeout=timeout)
+        try:
+            conn.request("GET", f"/{API_VERSION}/events?{urlencode(params)}", headers={"Host": "docker"})
+            response = conn.getresponse()
+            if response.status >= 400:
+                raise DockerAPIError(response.status, response.read().decode(errors="replace").strip())
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        except socket.timeout:
+            return
+        finally:
+            conn.close()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_client() -> Optional[DockerAPIClient]:
+    """Return a process-wide client, or None when no daemon socket is reachable"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            client = DockerAPIClient()
+            if not client.is_available() or not client.ping():
+                return None
+            _shared_client = client
+        return _shared_client
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Batched In-Container Test Execution
+Runs a list of shell commands inside a container in a single `docker exec`
+session. Each command is wrapped in begin/end markers carrying its exit code,
+so one round-trip yields per-command exit codes, output and timings (taken
+on the host as the markers stream in, so no `date` support is needed inside
+minimal images).
+"""
+
+import re
+import shlex
+import time
+from typing import Dict, List, Optional, TextIO
+
+from command_runner import run_streaming
+
+MARKER = "@@vps-test"
+MARKER_LINE = re.compile(rf"^{MARKER} (\d+) (begin|end)(?: (-?\d+))?@@$")
+DEFAULT_TIMEOUT = 300
+OUTPUT_LINES = 50
+
+
+class TestCommandResult:
+    """Outcome of one command from a batch"""
+
+    def __init__(self, command: str):
+        self.command = command
+        self.exit_code: Optional[int] = None  # None: never finished (batch died or timed out)
+        self.timed_out = False  # The batch timeout cut this command off
+        self.exec_error = False  # Stands in for the whole batch: docker exec itself failed
+        self.seconds = 0.0
+        self.output: List[str] = []
+
+    @property
+    def passed(self) -> bool:
+        return self.exit_code == 0
+
+    def to_dict(self) -> Dict:
+        return {"command": self.command, "exit_code": self.exit_code, "passed": self.passed,
+                "timed_out": self.timed_out, "exec_error": self.exec_error,
+                "seconds": round(self.seconds, 3), "output": "\n".join(self.output)}
+
+    def describe(self) -> str:
+        """Why a failed command failed, for logs"""
+        if self.exit_code is not None:
+            return f"exit {self.exit_code}"
+        return "timed out" if self.timed_out else "not run"
+
+
+def build_batch_script(commands: List[str]) -> str:
+    """POSIX sh script that runs every command, bracketed by markers.
+
+    Each command runs in a subshell with stdin closed so one failing or
+    interactive command cannot stop the rest. The leading newline keeps a
+    marker on its own line when the previous output lacked a trailing one.
+    """
+    parts = []
+    for index, command in enumerate(commands):
+        parts.append(f"printf '\\n{MARKER} {index} begin@@\\n'")
+        parts.append(f"( {command} ) </dev/null 2>&1")
+        parts.append(f"printf '\\n{MARKER} {index} end %s@@\\n' \"$?\"")
+    return "\n".join(parts)
+
+
+class _BatchParser:
+    """Splits streamed batch output into per-command results"""
+
+    def __init__(self, commands: List[str], output_lines: int):
+        self.results = [TestCommandResult(command) for command in commands]
+        self.output_lines = output_lines
+        self.current: Optional[int] = None
+        self.started = 0.0
+        self.began = False  # Whether the script produced any marker, i.e. the exec session ran
+
+    def feed(self, line: str) -> None:
+        match = MARKER_LINE.match(line.strip())
+        if not match:
+            if self.current is not None and line.strip():
+                output = self.results[self.current].output
+                output.append(line)
+                del output[:-self.output_lines]
+            return
+        index, event = int(match.group(1)), match.group(2)
+        if index >= len(self.results):
+            return
+        now = time.time()
+        if event == "begin":
+            self.current, self.started, self.began = index, now, True
+        else:
+            result = self.results[index]
+            result.exit_code = int(match.group(3))
+            result.seconds = now - self.started
+            self.current = None
+
+    def finish(self, timed_out: bool) -> None:
+        """Charge the time of a command cut off by a timeout"""
+        if self.current is not None:
+            self.results[self.current].seconds = time.time() - self.started
+            self.results[self.current].timed_out = timed_out
+
+
+def run_test_batch(container: str, commands: List[str], timeout: float = DEFAULT_TIMEOUT,
+                   log_file: Optional[TextIO] = None, output_lines: int = OUTPUT_LINES) -> List[TestCommandResult]:
+    """Run all commands in one exec session and return one result per command.
+
+    When docker exec itself fails (container gone, no sh, daemon error) no
+    command ran, so a single exec_error result carrying its exit code and
+    output is returned instead.
+    """
+    if not commands:
+        return []
+    parser = _BatchParser(commands, output_lines)
+    script = build_batch_script(commands)
+    batch = run_streaming(f"docker exec {container} sh -c {shlex.quote(script)}", timeout=timeout,
+                          log_file=log_file, on_line=parser.feed)
+    parser.finish(bool(batch.timed_out))
+    if not parser.began and not batch.success:
+        error = TestCommandResult(f"docker exec {container}")
+        error.exec_error = True
+        error.timed_out = bool(batch.timed_out)
+        error.exit_code = None if batch.timed_out else batch.returncode
+        error.seconds = batch.elapsed
+        error.output = [line for line in batch.tail if line.strip()][-output_lines:]
+        return [error]
+    return parser.results
+
+
+def format_matrix(results: Dict[str, List[TestCommandResult]], width: int = 44) -> List[str]:
+    """Per-family pass/fail matrix: a totals row per family, then one row per command"""
+    rows = [f"{'Family / command':<{width + 4}} {'Result':<10} {'Exit':>5} {'Time':>8}"]
+    for family_key, family_results in results.items():
+        passed = sum(1 for result in family_results if result.passed)
+        total_time = sum(result.seconds for result in family_results)
+        status = "PASS" if passed == len(family_results) else "FAIL"
+        rows.append(f"{family_key:<{width + 4}} {f'{status} {passed}/{len(family_results)}':<10} {'':>5} {total_time:>7.2f}s")
+        for result in family_results:
+            command = result.command if len(result.command) <= width else result.command[:width - 3] + "..."
+            if result.exec_error:
+                outcome = "exec error"
+            else:
+                outcome = "pass" if result.passed else ("fail" if result.exit_code is not None else "n/a")
+            exit_code = "-" if result.exit_code is None else str(result.exit_code)
+            rows.append(f"    {command:<{width}} {outcome:<10} {exit_code:>5} {result.seconds:>7.2f}s")
+    return rows
@@ -6,6 +6,7 @@ Handles building and testing for Debian-based distributions
 
 import os
 import sys
+import argparse
 import subprocess
 from pathlib import Path
 
@@ -13,6 +14,9 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
+from build_cache import BuildReport, build_if_changed
+from readiness import wait_for_vps_ready
+
 try:
     from families.debian.family_config import distributions, family_name, build_commands, test_commands
 except ImportError:
@@ -20,10 +24,13 @@ except ImportError:
     sys.exit(1)
 
 class DebianFamilyBuilder:
-    def __init__(self):
+    def __init__(self, force=False):
         self.family_name = family_name
         self.distributions = distributions
         self.representative = self.get_representative()
+        self.force = force
+        self.build_report = BuildReport()
+        self.family_config = Path(__file__).resolve().parent / "family_config.py"
         
     def get_representative(self):
         """Get the representative distribution for this family"""
@@ -54,11 +61,14 @@ class DebianFamilyBuilder:
         distro_key, config = self.representative
         print(f"Building {self.family_name} representative: {config['name']}")
         
-        # Build using docker-compose
-        build_cmd = f"docker compose build {config['container']}"
-        success = self.run_cmd(build_cmd)
+        # Build using docker-compose, unless the context hash is unchanged
+        action = build_if_changed(distro_key, config, self.family_config, self.run_cmd,
+                                  self.build_report, force=self.force)
         
-        if success:
+        if action == "skipped":
+            print(f"✓ {config['container']} is up to date, skipped build")
+            return True
+        elif action == "rebuilt":
             print(f"✓ Successfully built {config['container']}")
             return True
         else:
@@ -72,15 +82,20 @@ class DebianFamilyBuilder:
         for distro_key, config in self.distributions.items():
             print(f"Building {config['name']}...")
             
-            build_cmd = f"docker compose build {config['container']}"
-            success = self.run_cmd(build_cmd)
-            results[distro_key] = success
+            action = build_if_changed(distro_key, config, self.family_config, self.run_cmd,
+                                      self.build_report, force=self.force)
+            results[distro_key] = action != "failed"
             
-            if success:
+            if action == "skipped":
+                print(f"✓ {config['container']} is up to date, skipped build")
+            elif action == "rebuilt":
                 print(f"✓ Successfully built {config['container']}")
             else:
                 print(f"✗ Failed to build {config['container']}")
-                
+        
+        print()
+        for line in self.build_report.lines():
+            print(line)
         return results
         
     def test_distribution(self, distro_key):
@@ -99,8 +114,9 @@ class DebianFamilyBuilder:
             return False
             
         # Wait for startup
-        import time
-        time.sleep(10)
+        readiness = wait_for_vps_ready(config["container"], config["port"])
+        if not readiness.ready:
+            print(f"⚠ {config['container']} not ready after {readiness.elapsed:.1f}s: {readiness.detail}")
         
         # Test container is running
         check_cmd = f'docker ps --filter "name={config["container"]}" --format "{{{{.Names}}}}"'
@@ -118,7 +134,11 @@ class DebianFamilyBuilder:
             return False
 
 def main():
-    builder = DebianFamilyBuilder()
+    parser = argparse.ArgumentParser(description="Debian Family Builder")
+    parser.add_argument("--force", action="store_true", help="Rebuild images even when their context hash is unchanged")
+    args = parser.parse_args()
+    
+    builder = DebianFamilyBuilder(force=args.force)
     
     print("Debian Family Build Options:")
     print("[1] Build representative only (Ubuntu)")
@@ -9,7 +9,8 @@ distributions = {
     "opensuse": {
         "name": "openSUSE Leap 15.5",
         "description": "Stable, professional-grade Linux distribution",
-        "container": "opensuse-vps",
+        "container": "suse-vps",  # Compose service/container name
+        "profile": "suse",  # Compose profile (differs from the distro key)
         "port": 2206,
         "volume": "opensuse-persistent",
         "dockerfile_path": "../distros/suse",
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Family Configuration Registry
+Single source of truth for the Linux families and distributions defined in
+families/*/family_config.py. Configs are parsed with `ast` (never imported or
+executed), only when first needed, and cached on disk keyed by file mtime so
+later runs skip parsing unchanged files. Provides indexed lookups by distro
+key, container name, SSH port and compose profile.
+"""
+
+import os
+import ast
+import json
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+PROJECT_DIR = Path(__file__).resolve().parent
+COMPOSE_FILE = PROJECT_DIR.parent / "docker-compose.yml"
+FAMILIES_DIR = PROJECT_DIR / "families"
+CACHE_FILE = PROJECT_DIR / ".vps-state" / "family-registry.json"
+CONFIG_NAME = "family_config.py"
+CONFIG_FIELDS = ("family_name", "package_manager", "description", "distributions",
+                 "build_commands", "test_commands", "ssh_config")
+CACHE_VERSION = 1
+
+
+def parse_family_config(path: Path) -> Dict:
+    """Read the literal top-level assignments of a family_config.py without executing it"""
+    tree = ast.parse(Path(path).read_text(), filename=str(path))
+    values = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name in CONFIG_FIELDS:
+                values[name] = ast.literal_eval(node.value)
+    return values
+
+
+def compose_profiles(compose_file: Path = COMPOSE_FILE) -> Optional[Dict[str, List[str]]]:
+    """Service name -> its `profiles:` list in docker-compose.yml (None if unreadable)"""
+    # Only by_profile needs the compose file, so the parser is not imported at startup
+    from preflight import ComposeError, parse_yaml
+    try:
+        data = parse_yaml(Path(compose_file).read_text())
+    except (ComposeError, OSError):
+        return None
+    services = data.get("services") if isinstance(data, dict) else None
+    if not isinstance(services, dict):
+        return None
+    return {name: list(service.get("profiles") or []) for name, service in services.items()
+            if isinstance(service, dict)}
+
+
+def _build_family(family_key: str, config_path: Path, values: Dict) -> Dict:
+    """Family entry in the shape the tools use, with derived per-distro fields"""
+    distributions = {}
+    representative = None
+    for distro_key, distro in values.get("distributions", {}).items():
+        distro = dict(distro)
+        distro["key"] = distro_key
+        distro["family"] = family_key
+        # Compose service names match container names; profiles default to the distro key
+        distro.setdefault("service", distro["container"])
+        distro.setdefault("profile", distro_key)
+        distro["context_dir"] = str((config_path.parent.parent / distro["dockerfile_path"]).resolve())
+        distributions[distro_key] = distro
+        if distro.get("representative") and representative is None:
+            representative = distro_key
+    return {
+        "key": family_key,
+        "name": values.get("family_name", family_key.title()),
+        "package_manager": values.get("package_manager", "unknown"),
+        "description": values.get("description", ""),
+        "distributions": distributions,
+        "build_commands": values.get("build_commands", []),
+        "test_commands": values.get("test_commands", []),
+        "ssh_config": values.get("ssh_config", {}),
+        "config_path": config_path,
+        "representative": representative,
+    }
+
+
+class FamilyRegistry:
+    """Lazily loaded, mtime-cached view of all family configurations"""
+
+    def __init__(self, families_dir: Path = FAMILIES_DIR, cache_file: Optional[Path] = CACHE_FILE,
+                 compose_file: Path = COMPOSE_FILE):
+        self.families_dir = Path(families_dir)
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.compose_file = Path(compose_file)
+        self._lock = threading.Lock()
+        self._signature = None
+        self._families: Dict[str, Dict] = {}
+        self._by_container: Dict[str, Dict] = {}
+        self._by_port: Dict[int, Dict] = {}
+        self._by_profile: Optional[Dict[str, List[Dict]]] = None
+        self._profiles_mtime = None
+        self._distributions: Dict[str, Dict] = {}
+        self.errors: Dict[str, str] = {}
+
+    def _config_paths(self) -> Dict[str, Path]:
+        paths = {}
+        if not self.families_dir.is_dir():
+            return paths
+        for entry in os.scandir(self.families_dir):
+            config_path = Path(entry.path) / CONFIG_NAME
+            if entry.is_dir() and config_path.is_file():
+                paths[entry.name] = config_path
+        return paths
+
+    def _read_cache(self) -> Dict:
+        if not self.cache_file or not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file) as f:
+                cache = json.load(f)
+        except ValueError:
+            return {}
+        return cache.get("families", {}) if cache.get("version") == CACHE_VERSION else {}
+
+    def _write_cache(self, entries: Dict) -> None:
+        if not self.cache_file:
+            return
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_file.with_name(f".{self.cache_file.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"version": CACHE_VERSION, "families": entries}, f, indent=2)
+            os.replace(tmp_path, self.cache_file)
+        except OSError:
+            pass  # A read-only checkout still works, just without the disk cache
+
+    def _ensure_loaded(self) -> None:
+        """(Re)load when any config file was added, removed or modified"""
+        paths = self._config_paths()
+        signature = {key: path.stat().st_mtime_ns for key, path in paths.items()}
+        with self._lock:
+            if signature == self._signature:
+                return
+
+            cached = self._read_cache()
+            entries, families, errors = {}, {}, {}
+            for family_key, config_path in paths.items():
+                entry = cached.get(family_key)
+                if not entry or entry.get("mtime_ns") != signature[family_key]:
+                    try:
+                        entry = {"mtime_ns": signature[family_key], "values": parse_family_config(config_path)}
+                    except (SyntaxError, ValueError, OSError) as e:
+                        errors[family_key] = str(e)
+                        continue
+                entries[family_key] = entry
+                families[family_key] = _build_family(family_key, config_path, entry["values"])
+            if entries != cached:
+                self._write_cache(entries)
+
+            # Families in SSH port order, which is also the compose file order
+            def first_port(family):
+                return min((d["port"] for d in family["distributions"].values()), default=0)
+            self._families = dict(sorted(families.items(), key=lambda item: first_port(item[1])))
+            self._distributions = {key: distro for family in self._families.values()
+                                   for key, distro in family["distributions"].items()}
+            self._by_container = {d["container"]: d for d in self._distributions.values()}
+            self._by_port = {d["port"]: d for d in self._distributions.values()}
+            self._by_profile = None  # Rebuilt from docker-compose.yml on first use
+            self.errors = errors
+            self._signature = signature
+
+    # Lookups
+
+    def families(self) -> Dict[str, Dict]:
+        self._ensure_loaded()
+        return self._families
+
+    def family(self, family_key: str) -> Optional[Dict]:
+        return self.families().get(family_key)
+
+    def distributions(self) -> Dict[str, Dict]:
+        self._ensure_loaded()
+        return self._distributions
+
+    def distribution(self, distro_key: str) -> Optional[Dict]:
+        return self.distributions().get(distro_key)
+
+    def family_of(self, distro_key: str) -> Optional[str]:
+        distro = self.distribution(distro_key)
+        return distro["family"] if distro else None
+
+    def by_container(self, container: str) -> Optional[Dict]:
+        self._ensure_loaded()
+        return self._by_container.get(container)
+
+    def by_port(self, port: int) -> Optional[Dict]:
+        self._ensure_loaded()
+        return self._by_port.get(port)
+
+    def by_profile(self, profile: str) -> List[Dict]:
+        """Distributions whose compose service lists the profile under `profiles:`.
+
+        Read from docker-compose.yml, which is what `--profile` actually starts;
+        without a readable compose file only each distribution's own profile is known.
+        """
+        self._ensure_loaded()
+        try:
+            mtime = self.compose_file.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            if self._by_profile is None or mtime != self._profiles_mtime:
+                profiles = compose_profiles(self.compose_file) if mtime is not None else None
+                by_profile = {}
+                for distro in self._distributions.values():
+                    names = profiles.get(distro["service"], []) if profiles is not None else [distro["profile"]]
+                    for name in names:
+                        by_profile.setdefault(name, []).append(distro)
+                self._by_profile, self._profiles_mtime = by_profile, mtime
+            return list(self._by_profile.get(profile, []))
+
+
+class _LazyMapping(Mapping):
+    """Read-only dict view that loads the registry on first access"""
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getitem__(self, key):
+        return self._loader()[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._loader())
+
+    def __len__(self) -> int:
+        return len(self._loader())
+
+
+REGISTRY = FamilyRegistry()
+
+# Drop-in replacements for the tools' old hard-coded tables
+LINUX_FAMILIES = _LazyMapping(REGISTRY.families)
+DISTRIBUTIONS = _LazyMapping(REGISTRY.distributions)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Image Test Reports and Sharding
+Deterministic partitioning of the distributions into CI shards, JSON and
+JUnit XML output for test-docker-images.py runs, and merging of per-shard
+JSON reports into one result that also notices shards that never reported.
+"""
+
+import json
+import platform
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPORT_VERSION = 1
+SUITE_NAME = "docker-images"
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """Parse 'i/n' (1-based) into (i, n)"""
+    try:
+        index, count = (int(part) for part in text.split("/", 1))
+    except ValueError:
+        raise ValueError(f"shard must look like i/n, got {text!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"shard index must be between 1 and n, got {text!r}")
+    return index, count
+
+
+def shard_keys(distro_keys: List[str], index: int, count: int) -> List[str]:
+    """The distributions shard index of count runs: round-robin over the sorted keys.
+
+    Depends only on the configured distributions, so every runner computes the
+    same split and the shards together cover each distribution exactly once.
+    """
+    return [key for position, key in enumerate(sorted(distro_keys)) if position % count == index - 1]
+
+
+def build_report(test_results: Dict[str, Dict], distro_failures: Dict[str, List[str]],
+                 durations: Dict[str, float], image_freshness: Dict[str, bool],
+                 selected: List[str], all_distros: List[str], shard: Tuple[int, int] = (1, 1)) -> Dict:
+    results = {}
+    for distro_key, result in test_results.items():
+        results[distro_key] = dict(result, image_fresh=image_freshness.get(distro_key),
+                                   seconds=round(durations.get(distro_key, 0.0), 2),
+                                   failures=list(distro_failures.get(distro_key, [])))
+    return {
+        "version": REPORT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "host": platform.node(),
+        "shard": {"index": shard[0], "count": shard[1]},
+        "selected": list(selected),
+        "all_distros": sorted(all_distros),
+        "results": results,
+        # Selected but not tested: no Dockerfile for them in this checkout
+        "skipped": [key for key in selected if key not in results],
+    }
+
+
+def failure_messages(result: Dict) -> List[str]:
+    """Why a distribution failed, as shown in the summary when nothing more specific was recorded"""
+    if result["overall"]:
+        return []
+    if result.get("failures"):
+        return result["failures"]
+    return ["Image not built"] if not result["image_exists"] else ["Container test failed"]
+
+
+def write_json(report: Dict, path: Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path: Path) -> Dict:
+    with open(path) as f:
+        report = json.load(f)
+    if report.get("version") != REPORT_VERSION:
+        raise ValueError(f"{path}: unsupported report version {report.get('version')!r}")
+    return report
+
+
+def to_junit(report: Dict) -> ET.ElementTree:
+    """One testcase per distribution; distributions missing from a merged run are errors"""
+    shard = report["shard"]
+    suite_name = SUITE_NAME if shard["count"] == 1 else f"{SUITE_NAME} shard {shard['index']}/{shard['count']}"
+    results = report["results"]
+    missing = report.get("missing", [])
+    skipped = report.get("skipped", [])
+    failures = sum(1 for result in results.values() if not result["overall"])
+    seconds = sum(result.get("seconds", 0.0) for result in results.values())
+
+    suites = ET.Element("testsuites", name=SUITE_NAME, tests=str(len(results) + len(missing) + len(skipped)),
+                        failures=str(failures), errors=str(len(missing)), time=f"{seconds:.2f}")
+    suite = ET.SubElement(suites, "testsuite", name=suite_name, tests=suites.get("tests"),
+                          failures=str(failures), errors=str(len(missing)), skipped=str(len(skipped)),
+                          time=f"{seconds:.2f}", timestamp=report["created"], hostname=report.get("host", ""))
+    for distro_key, result in results.items():
+        case = ET.SubElement(suite, "testcase", classname=SUITE_NAME, name=f"{distro_key} ({result['name']})",
+                             time=f"{result.get('seconds', 0.0):.2f}")
+        messages = failure_messages(result)
+        if messages:
+            failure = ET.SubElement(case, "failure", message=messages[0])
+            failure.text = "\n".join(messages)
+        if result.get("image_fresh") is False:
+            ET.SubElement(case, "system-out").text = "Image is older than its build context"
+    for distro_key in missing:
+        case = ET.SubElement(suite, "testcase", classname=SUITE_NAME, name=distro_key, time="0.00")
+        ET.SubElement(case, "error", message="No shard reported this distribution")
+    for distro_key in skipped:
+        case = ET.SubElement(suite, "testcase", classname=SUITE_NAME, name=distro_key, time="0.00")
+        ET.SubElement(case, "skipped", message="Dockerfile missing")
+    return ET.ElementTree(suites)
+
+
+def write_junit(report: Dict, path: Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tree = to_junit(report)
+    if hasattr(ET, "indent"):  # Python 3.9+
+        ET.indent(tree)
+    tree.write(path, encoding="utf-8", xml_declaration=True)
+
+
+def merge_reports(reports: List[Dict]) -> Tuple[Dict, List[str]]:
+    """Combine shard reports into one; returns it with warnings about overlaps and gaps.
+
+    The merged report lists under "missing" every distribution that no shard
+    tested or skipped, e.g. because a runner died before writing its report.
+    """
+    warnings = []
+    all_distros, seen_shards, results, skipped = set(), set(), {}, set()
+    for report in reports:
+        shard = report["shard"]
+        if (shard["index"], shard["count"]) in seen_shards:
+            warnings.append(f"shard {shard['index']}/{shard['count']} reported more than once")
+        seen_shards.add((shard["index"], shard["count"]))
+        all_distros.update(report["all_distros"])
+        skipped.update(report.get("skipped", []))
+        for distro_key, result in report["results"].items():
+            if distro_key in results:
+                warnings.append(f"{distro_key} reported by more than one shard; keeping the last")
+            results[distro_key] = result
+
+    counts = {count for _, count in seen_shards}
+    if len(counts) > 1:
+        warnings.append(f"reports come from different shard counts: {sorted(counts)}")
+    order = sorted(all_distros)
+    merged = {
+        "version": REPORT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "host": platform.node(),
+        "shard": {"index": 1, "count": 1},
+        "merged_from": [{"index": index, "count": count} for index, count in sorted(seen_shards)],
+        "selected": order,
+        "all_distros": order,
+        "results": {key: results[key] for key in order if key in results},
+        "skipped": [key for key in order if key in skipped and key not in results],
+        "missing": [key for key in order if key not in results and key not in skipped],
+    }
+    return merged, warnings
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Docker Inventory Cache
+One bulk snapshot of volumes, containers and images, fetched with one cheap
+list call each (/volumes, /containers/json?all=1, /images/json) and held in a
+short TTL cache, so a menu render costs a few round-trips instead of one query
+per item. Volume sizes need the slow disk-usage scan, so they are fetched only
+when first asked for. Images are indexed by every repository:tag and by ID.
+"""
+
+import json
+import subprocess
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from docker_api import DockerAPIError, get_client
+
+
+def _parse_label_string(labels: str) -> Dict[str, str]:
+    """Parse the CLI's "k=v,k2=v2" label rendering"""
+    parsed = {}
+    for pair in (labels or "").split(","):
+        if "=" in pair:
+            key, value = pair.split("=", 1)
+            parsed[key] = value
+    return parsed
+
+
+def _cli_json_lines(args: List[str]) -> Optional[List[Dict]]:
+    try:
+        result = subprocess.run(args, capture_output=True, text=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    rows = []
+    for line in result.stdout.splitlines():
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            continue
+    return rows
+
+
+def _parse_cli_timestamp(text: str) -> float:
+    """Epoch seconds from the CLI's "2024-05-01 10:00:00 +0200 CEST" rendering (0 if unparseable)"""
+    try:
+        return datetime.strptime(text[:25], "%Y-%m-%d %H:%M:%S %z").timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _index_images(images: List[Dict]) -> Dict[str, Dict]:
+    """Key each image by its full ID, short ID and every repository:tag"""
+    index = {}
+    for image in images:
+        image_id = image["Id"]
+        index[image_id] = image
+        index[image_id.split(":", 1)[-1][:12]] = image
+        for ref in image["RepoTags"]:
+            index[ref] = image
+    return index
+
+
+def normalize_image_ref(ref: str) -> str:
+    """Add the implicit :latest tag; IDs and digests are left alone"""
+    if ref.startswith("sha256:") or "@" in ref:
+        return ref
+    if ":" in ref[ref.rfind("/") + 1:]:
+        return ref
+    return f"{ref}:latest"
+
+
+class Inventory:
+    """Point-in-time view of Docker volumes, containers and images"""
+
+    def __init__(self, volumes: Dict[str, Dict], containers: Dict[str, Dict],
+                 images: Optional[List[Dict]] = None):
+        self.volumes = volumes
+        self.containers = containers
+        self.images = _index_images(images or [])
+        self.fetched_at = time.time()
+        self._sizes_loaded = False
+
+    def has_volume(self, name: str) -> bool:
+        return name in self.volumes
+
+    def volume(self, name: str) -> Optional[Dict]:
+        return self.volumes.get(name)
+
+    def volume_names(self, prefix: str = "") -> List[str]:
+        return sorted(name for name in self.volumes if name.startswith(prefix))
+
+    def volume_size(self, name: str) -> int:
+        """Size in bytes, or -1 when the daemon did not report it"""
+        if not self._sizes_loaded:
+            self.load_volume_sizes()
+        volume = self.volumes.get(name) or {}
+        return volume.get("Size", -1)
+
+    def load_volume_sizes(self) -> None:
+        """Fill in volume sizes and ref counts from one /system/df volume scan"""
+        self._sizes_loaded = True
+        client = get_client()
+        if not client:
+            return
+        try:
+            # Daemons before API 1.42 ignore type and scan everything
+            usage = client.request("GET", "/system/df", params={"type": "volume"})
+        except (DockerAPIError, OSError):
+            return
+        for volume in usage.get("Volumes") or []:
+            if volume["Name"] in self.volumes:
+                self.volumes[volume["Name"]]["Size"] = (volume.get("UsageData") or {}).get("Size", -1)
+                self.volumes[volume["Name"]]["RefCount"] = (volume.get("UsageData") or {}).get("RefCount", -1)
+
+    def volumes_with_sizes(self) -> List[Dict]:
+        if not self._sizes_loaded:
+            self.load_volume_sizes()
+        return list(self.volumes.values())
+
+    def container(self, name: str) -> Optional[Dict]:
+        return self.containers.get(name)
+
+    def container_running(self, name: str) -> bool:
+        container = self.containers.get(name)
+        return bool(container and container.get("State") == "running")
+
+    def image(self, ref: str) -> Optional[Dict]:
+        """Exact lookup by repository[:tag] (tag defaults to latest), full ID or short ID"""
+        return self.images.get(normalize_image_ref(ref)) or self.images.get(ref)
+
+    def has_image(self, ref: str) -> bool:
+        return self.image(ref) is not None
+
+    @classmethod
+    def fetch(cls, volumes: bool = True, containers: bool = True, images: bool = True) -> "Inventory":
+        """Fetch the requested parts with one list call each (CLI listings as fallback)"""
+        client = get_client()
+        if client:
+            try:
+                return cls._from_api(client, volumes, containers, images)
+            except (DockerAPIError, OSError):
+                pass
+        return cls._from_cli(volumes, containers, images)
+
+    @classmethod
+    def _from_api(cls, client, want_volumes: bool, want_containers: bool, want_images: bool) -> "Inventory":
+        volumes = {}
+        for volume in client.list_volumes() if want_volumes else []:
+            volumes[volume["Name"]] = {
+                "Name": volume["Name"],
+                "Labels": volume.get("Labels") or {},
+                "CreatedAt": volume.get("CreatedAt", ""),
+                "Mountpoint": volume.get("Mountpoint", ""),
+                "Options": volume.get("Options") or {},
+                "Size": -1,
+                "RefCount": -1,
+            }
+        containers = {}
+        for container in client.list_containers(all=True) if want_containers else []:
+            for name in container.get("Names") or []:
+                containers[name.lstrip("/")] = {
+                    "Id": container.get("Id", ""),
+                    "Image": container.get("Image", ""),
+                    "State": container.get("State", ""),
+                    "Status": container.get("Status", ""),
+                    "Labels": container.get("Labels") or {},
+                }
+        images = []
+        for image in client.request("GET", "/images/json") if want_images else []:
+            images.append({
+                "Id": image.get("Id", ""),
+                "RepoTags": [tag for tag in image.get("RepoTags") or [] if tag != "<none>:<none>"],
+                "Created": float(image.get("Created") or 0),
+                "Size": image.get("Size", -1),
+                "Labels": image.get("Labels") or {},
+            })
+        return cls(volumes, containers, images)
+
+    @classmethod
+    def _from_cli(cls, want_volumes: bool, want_containers: bool, want_images: bool) -> "Inventory":
+        volumes = {}
+        rows = _cli_json_lines(["docker", "volume", "ls", "--format", "{{json .}}"]) if want_volumes else []
+        for row in rows or []:
+            volumes[row["Name"]] = {
+                "Name": row["Name"],
+                "Labels": _parse_label_string(row.get("Labels", "")),
+                "CreatedAt": "",
+                "Mountpoint": row.get("Mountpoint", ""),
+                "Size": -1,
+                "RefCount": -1,
+            }
+        containers = {}
+        rows = _cli_json_lines(["docker", "ps", "-a", "--format", "{{json .}}"]) if want_containers else []
+        for row in rows or []:
+            for name in row.get("Names", "").split(","):
+                containers[name] = {
+                    "Id": row.get("ID", ""),
+                    "Image": row.get("Image", ""),
+                    "State": row.get("State", ""),
+                    "Status": row.get("Status", ""),
+                    "Labels": _parse_label_string(row.get("Labels", "")),
+                }
+        # The CLI lists an image once per tag; fold the rows back into one entry per ID
+        images = {}
+        rows = _cli_json_lines(["docker", "images", "--no-trunc", "--format", "{{json .}}"]) if want_images else []
+        for row in rows or []:
+            image = images.setdefault(row.get("ID", ""), {
+                "Id": row.get("ID", ""),
+                "RepoTags": [],
+                "Created": _parse_cli_timestamp(row.get("CreatedAt", "")),
+                "Size": -1,
+                "Labels": {},
+            })
+            if row.get("Repository", "<none>") != "<none>" and row.get("Tag", "<none>") != "<none>":
+                image["RepoTags"].append(f"{row['Repository']}:{row['Tag']}")
+        return cls(volumes, containers, list(images.values()))
+
+
+class InventoryCache:
+    """TTL cache around Inventory.fetch; call invalidate() after any mutation"""
+
+    def __init__(self, ttl: float = 10.0, images: bool = True):
+        self.ttl = ttl
+        self.images = images
+        self._inventory = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Inventory:
+        with self._lock:
+            if self._inventory is None or time.time() - self._inventory.fetched_at > self.ttl:
+                self._inventory = Inventory.fetch(images=self.images)
+            return self._inventory
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._inventory = None
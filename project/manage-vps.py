@@ -9,17 +9,7 @@ import subprocess
 import argparse
 from typing import Tuple
 
-# Linux distribution configurations (simplified for management)
-DISTRO_CONFIG = {
-    "ubuntu": {"container": "ubuntu-vps", "port": 2201},
-    "debian": {"container": "debian-vps", "port": 2202},
-    "rocky": {"container": "rocky-vps", "port": 2203},
-    "centos": {"container": "centos-vps", "port": 2204},
-    "alpine": {"container": "alpine-vps", "port": 2205},
-    "opensuse": {"container": "opensuse-vps", "port": 2206},
-    "arch": {"container": "arch-vps", "port": 2207},
-    "slackware": {"container": "slackware-vps", "port": 2208}
-}
+from family_registry import DISTRIBUTIONS as DISTRO_CONFIG, REGISTRY
 
 class Colors:
     RED = '\033[91m'
@@ -58,7 +48,8 @@ def show_status():
         if len(lines) > 1:  # Has header + data
             print(f"{Colors.WHITE}{lines[0]}{Colors.RESET}")  # Header
             for line in lines[1:]:
-                if any(distro in line for distro in DISTRO_CONFIG.keys()):
+                name = line.split()[0] if line.split() else ""
+                if REGISTRY.by_container(name):
                     if "Up" in line:
                         print(f"{Colors.GREEN}{line}{Colors.RESET}")
                     else:
@@ -69,13 +60,15 @@ def show_status():
         print(f"{Colors.RED}Error checking container status: {output}{Colors.RESET}")
 
 def connect_to_vps(distro: str):
-    """Connect to a VPS via SSH"""
-    if distro not in DISTRO_CONFIG:
+    """Connect to a VPS via SSH (by distribution, container name or SSH port)"""
+    config = DISTRO_CONFIG.get(distro) or REGISTRY.by_container(distro)
+    if not config and distro.isdigit():
+        config = REGISTRY.by_port(int(distro))
+    if not config:
         print(f"{Colors.RED}Unknown distribution: {distro}{Colors.RESET}")
         print(f"{Colors.YELLOW}Available: {', '.join(DISTRO_CONFIG.keys())}{Colors.RESET}")
         return
-    
-    config = DISTRO_CONFIG[distro]
+    distro = config["key"]
     
     # Check if container is running
     success, output = run_command(f'docker ps --filter "name={config["container"]}" --format "{{{{.Names}}}}"')
@@ -114,7 +107,7 @@ def main():
     
     # Connect command
     connect_parser = subparsers.add_parser('connect', help='Connect to a VPS via SSH')
-    connect_parser.add_argument('distro', help='Distribution to connect to')
+    connect_parser.add_argument('distro', help='Distribution, container name or SSH port')
     
     # Stop command
     subparsers.add_parser('stop', help='Stop all VPS containers')
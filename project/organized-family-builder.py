@@ -5,21 +5,50 @@ Modular build system with family-specific units and organized structure
 """
 
 import os
+import re
 import sys
-import subprocess
+import argparse
+import threading
 import time
-import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+from base_image_prefetch import BaseImagePrefetcher
+from build_cache import DEFAULT_PKG_CACHE_URL, PKG_CACHE_ENV, BuildReport, build_if_changed
+from build_profiler import PLAIN_PROGRESS_ENV, BuildProfile, estimated_build_seconds, load_history
+from command_runner import run_streaming
+from exec_batch import format_matrix, run_test_batch
+from family_registry import FamilyRegistry
+from preflight import run_preflight
+from readiness import wait_for_vps_ready
+
 class OrganizedFamilyBuilder:
-    def __init__(self):
-        self.project_root = Path(__file__).parent
+    def __init__(self, force=False, build_timeout=3600, idle_timeout=600, prefetch=True, registry=None):
+        self.force = force
+        self.prefetch = prefetch
+        self.registry = registry
+        self.prefetcher = None
+        self.build_timeout = build_timeout
+        self.idle_timeout = idle_timeout
+        self.build_report = BuildReport()
+        self.test_results = {}  # family key -> per-command results of its test batch
+        self.matrix_results = {}  # distro key -> outcome of a full-matrix build
+        self.matrix_estimates = {}
+        self.project_root = Path(__file__).resolve().parent.parent
         self.families_dir = self.project_root / "project" / "families"
+        self.log_root = self.project_root / "project" / ".vps-state" / "build-logs"
         self.families = {}
         self.results = {}
+        self.run_stats = {}
         self.start_time = None
         
+        # Parallel builds send each family's output to its own log file
+        self._local = threading.local()
+        self._status = {}
+        self._progress = {}
+        self._status_lock = threading.Lock()
+        
         # Load all family configurations
         self.load_family_configurations()
 
@@ -35,108 +64,104 @@ class OrganizedFamilyBuilder:
         }
         reset = "\033[0m"
         color = colors.get(level, "")
+        log_file = getattr(self._local, "log_file", None)
+        if log_file:
+            log_file.write(f"[{timestamp}] {level}: {message}\n")
+            log_file.flush()
+            return
         print(f"{color}[{timestamp}] {level}: {message}{reset}")
 
     def load_family_configurations(self):
-        """Dynamically load all family configurations"""
+        """Load all family configurations through the cached registry"""
         self.log("Loading family configurations...", "HEADER")
         
         if not self.families_dir.exists():
             self.log(f"Families directory not found: {self.families_dir}", "ERROR")
             return
             
-        for family_dir in self.families_dir.iterdir():
-            if family_dir.is_dir() and (family_dir / "family_config.py").exists():
-                try:
-                    # Load family configuration module
-                    config_path = family_dir / "family_config.py"
-                    spec = importlib.util.spec_from_file_location("family_config", config_path)
-                    config_module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(config_module)
-                    
-                    # Extract family information
-                    family_key = family_dir.name
-                    self.families[family_key] = {
-                        "name": getattr(config_module, "family_name", family_key.title()),
-                        "package_manager": getattr(config_module, "package_manager", "unknown"),
-                        "description": getattr(config_module, "description", ""),
-                        "distributions": getattr(config_module, "distributions", {}),
-                        "build_commands": getattr(config_module, "build_commands", []),
-                        "test_commands": getattr(config_module, "test_commands", []),
-                        "ssh_config": getattr(config_module, "ssh_config", {}),
-                        "config_path": config_path
-                    }
-                    
-                    # Find representative distribution
-                    representative = None
-                    for distro_key, distro_config in self.families[family_key]["distributions"].items():
-                        if distro_config.get("representative", False):
-                            representative = distro_key
-                            break
-                    
-                    self.families[family_key]["representative"] = representative
-                    
-                    self.log(f"Loaded {self.families[family_key]['name']} ({len(self.families[family_key]['distributions'])} distributions)", "SUCCESS")
-                    
-                except Exception as e:
-                    self.log(f"Failed to load {family_dir.name}: {e}", "ERROR")
+        registry = FamilyRegistry(self.families_dir)
+        self.families = dict(registry.families())
+        for family_key, family in self.families.items():
+            self.log(f"Loaded {family['name']} ({len(family['distributions'])} distributions)", "SUCCESS")
+        for family_key, error in registry.errors.items():
+            self.log(f"Failed to load {family_key}: {error}", "ERROR")
         
         self.log(f"Loaded {len(self.families)} families", "HEADER")
 
-    def run_cmd(self, cmd, show_output=True, timeout=300):
-        """Execute command with optional output and timeout"""
+    def run_cmd(self, cmd, show_output=True, timeout=300, idle_timeout=None, on_line=None, env=None):
+        """Execute command with optional output and timeouts.
+
+        Output is streamed: only a bounded tail is kept in memory and returned,
+        while shown commands tee their full output to a log file. Quiet
+        commands return stdout alone; their stderr only reaches the log. `timeout`
+        limits total run time and `idle_timeout` the time without output.
+        `on_line` also receives every output line; `env` adds variables.
+        """
+        log_file = getattr(self._local, "log_file", None)
+        family_key = getattr(self._local, "family", None)
+        own_log = None
+        if show_output and not log_file:
+            slug = re.sub(r"[^A-Za-z0-9]+", "-", cmd)[:40].strip("-")
+            log_path = self.log_root / "commands" / f"{datetime.now():%Y%m%d-%H%M%S}-{slug}.log"
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            own_log = log_file = open(log_path, "w")
+        
         try:
-            if show_output:
-                process = subprocess.Popen(
-                    cmd, shell=True, stdout=subprocess.PIPE, 
-                    stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1
-                )
-                
-                output_lines = []
-                while True:
-                    output = process.stdout.readline()
-                    if output == '' and process.poll() is not None:
-                        break
-                    if output:
-                        print(output.strip())
-                        output_lines.append(output.strip())
-                
-                return process.poll() == 0, '\n'.join(output_lines)
-            else:
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=timeout)
-                return result.returncode == 0, result.stdout.strip()
-        except subprocess.TimeoutExpired:
-            self.log(f"Command timed out: {cmd}", "ERROR")
-            return False, "Timeout"
+            if log_file:
+                log_file.write(f"$ {cmd}\n")
+            # Parallel builds only write to the family log; progress feeds the status line
+            echo = print if show_output and not family_key else None
+            callbacks = [callback for callback in (echo, on_line) if callback]
+            progress = (lambda lines, _: self.set_progress(family_key, lines)) if family_key and show_output else None
+            result = run_streaming(cmd, timeout=timeout, idle_timeout=idle_timeout, log_file=log_file,
+                                   on_line=(lambda line: [callback(line) for callback in callbacks]) if callbacks else None,
+                                   on_progress=progress, env=env, merge_stderr=show_output)
         except Exception as e:
             self.log(f"Command failed: {e}", "ERROR")
             return False, str(e)
+        finally:
+            if own_log:
+                own_log.close()
+        
+        if result.timed_out:
+            reason = f"no output for {idle_timeout}s" if result.timed_out == "idle" else f"exceeded {timeout}s"
+            self.log(f"Command timed out ({reason}): {cmd}", "ERROR")
+            return False, "Timeout"
+        if own_log and not result.success:
+            self.log(f"Full output: {own_log.name}", "INFO")
+        return result.success, result.output.strip()
 
     def check_prerequisites(self):
         """Check system prerequisites"""
         self.log("Checking prerequisites...", "HEADER")
         
-        # Check Docker
-        success, output = self.run_cmd("docker --version", show_output=False)
-        if not success:
-            self.log("Docker not found", "ERROR")
-            return False
-        self.log(f"Docker: {output}", "SUCCESS")
-        
-        # Check Docker daemon
-        success, _ = self.run_cmd("docker info", show_output=False, timeout=10)
-        if not success:
-            self.log("Docker daemon not running", "ERROR")
-            return False
-        self.log("Docker daemon running", "SUCCESS")
+        # Daemon, CLI tools and compose file are checked concurrently and cached for the session
+        report = run_preflight(self.project_root / "docker-compose.yml")
+        for check in report.checks:
+            self.log(check.detail, "SUCCESS" if check.ok else "ERROR")
+        self.log(report.timing(), "INFO")
+        return report.ok
+
+    def build_distribution(self, family_key, distro_key):
+        """Build one distribution's image unless its context hash is unchanged; returns the action"""
+        family = self.families[family_key]
+        distro_config = family["distributions"][distro_key]
         
-        # Check docker-compose.yml
-        if not (self.project_root / "docker-compose.yml").exists():
-            self.log("docker-compose.yml not found", "ERROR")
-            return False
-        self.log("docker-compose.yml found", "SUCCESS")
+        def run_build(build_cmd):
+            if self.prefetcher:
+                # Wait only for this distro's own base image if it is still being pulled
+                self.prefetcher.wait(distro_key)
+            self.log(f"Executing: {build_cmd}", "INFO")
+            # Plain BuildKit progress gives per-step timings for the profiler
+            profile = BuildProfile(distro_key)
+            build_start = time.time()
+            success = self.run_cmd(build_cmd, show_output=True, timeout=self.build_timeout,
+                                   idle_timeout=self.idle_timeout, on_line=profile.feed, env=PLAIN_PROGRESS_ENV)[0]
+            profile.record(success, time.time() - build_start)
+            return success
         
-        return True
+        return build_if_changed(distro_key, distro_config, family["config_path"], run_build,
+                                self.build_report, force=self.force)
 
     def build_family_unit(self, family_key):
         """Build unit for a specific family"""
@@ -158,13 +183,13 @@ class OrganizedFamilyBuilder:
         self.log(f"Container: {distro_config['container']}", "INFO")
         self.log(f"Package Manager: {family['package_manager']}", "INFO")
         
-        # Build the representative distribution
-        build_cmd = f"docker compose build {distro_config['container']}"
-        self.log(f"Executing: {build_cmd}", "INFO")
+        # Build the representative distribution, unless its context hash is unchanged
+        action = self.build_distribution(family_key, representative)
         
-        success, output = self.run_cmd(build_cmd, show_output=True)
-        
-        if success:
+        if action == "skipped":
+            self.log(f"{family['name']} unit is up to date (context unchanged), skipping build", "SUCCESS")
+            return True
+        elif action == "rebuilt":
             self.log(f"Successfully built {family['name']} unit", "SUCCESS")
             return True
         else:
@@ -183,7 +208,7 @@ class OrganizedFamilyBuilder:
         self.log(f"Testing {family['name']} unit...", "HEADER")
         
         # Start container
-        start_cmd = f"docker compose --profile {representative} up -d"
+        start_cmd = f"docker compose --profile {distro_config['profile']} up -d --no-deps {distro_config['service']}"
         success, _ = self.run_cmd(start_cmd, show_output=False)
         
         if not success:
@@ -192,7 +217,11 @@ class OrganizedFamilyBuilder:
             
         # Wait for initialization
         self.log("Waiting for container initialization...", "INFO")
-        time.sleep(15)
+        readiness = wait_for_vps_ready(distro_config["container"], distro_config["port"])
+        if readiness.ready:
+            self.log(f"SSH ready after {readiness.elapsed:.1f}s", "SUCCESS")
+        else:
+            self.log(f"Not ready after {readiness.elapsed:.1f}s: {readiness.detail}", "WARNING")
         
         # Check if running
         check_cmd = f'docker ps --filter "name={distro_config["container"]}" --format "{{{{.Names}}}}"'
@@ -201,26 +230,125 @@ class OrganizedFamilyBuilder:
         if success and distro_config["container"] in output:
             self.log(f"{distro_config['container']} is running", "SUCCESS")
             
-            # Test package manager
+            # Run every declared test command in one exec session
             if family["test_commands"]:
-                for test_cmd in family["test_commands"][:1]:  # Test first command
-                    exec_cmd = f'docker exec {distro_config["container"]} {test_cmd}'
-                    test_success, test_output = self.run_cmd(exec_cmd, show_output=False)
-                    if test_success:
-                        self.log(f"Package manager test passed: {test_cmd}", "SUCCESS")
+                results = run_test_batch(distro_config["container"], family["test_commands"],
+                                         log_file=getattr(self._local, "log_file", None))
+                self.test_results[family_key] = results
+                for result in results:
+                    if result.passed:
+                        self.log(f"Test passed ({result.seconds:.2f}s): {result.command}", "SUCCESS")
                     else:
-                        self.log(f"Package manager test failed: {test_cmd}", "WARNING")
+                        if result.exec_error:
+                            self.log(f"Could not run tests ({result.describe()}): {result.command}", "ERROR")
+                        else:
+                            self.log(f"Test failed ({result.describe()}): {result.command}", "WARNING")
+                        for line in result.output[-5:]:
+                            self.log(f"    {line}", "INFO")
             
             # Stop container
-            stop_cmd = f"docker compose --profile {representative} down"
+            stop_cmd = f"docker compose --profile {distro_config['profile']} rm -s -f {distro_config['service']}"
             self.run_cmd(stop_cmd, show_output=False)
             return True
         else:
             self.log(f"{distro_config['container']} failed health check", "ERROR")
             return False
 
-    def build_all_family_units(self):
-        """Build all family units (representatives)"""
+    def set_status(self, family_key, status):
+        with self._status_lock:
+            self._status[family_key] = (status, time.time())
+            self._progress[family_key] = 0
+
+    def set_progress(self, family_key, lines):
+        """Output lines seen so far in the family's current step"""
+        with self._status_lock:
+            self._progress[family_key] = lines
+
+    def render_status(self, started):
+        """One multiplexed status line covering every family"""
+        with self._status_lock:
+            parts = [f"{key}: {status}" + (f" ({self._progress[key]} lines)" if self._progress.get(key) else "")
+                     for key, (status, _) in self._status.items()]
+        return f"[{time.time() - started:6.1f}s] " + " | ".join(parts)
+
+    def build_and_test_family(self, family_key, log_dir):
+        """Scheduler job: build one family, then test it straight away, logging to its own file"""
+        log_path = log_dir / f"{family_key}.log"
+        with open(log_path, "w") as log_file:
+            self._local.log_file = log_file
+            self._local.family = family_key
+            try:
+                self.set_status(family_key, "building")
+                build_start = time.time()
+                build_success = self.build_family_unit(family_key)
+                build_time = time.time() - build_start
+                
+                test_success = False
+                test_time = 0.0
+                if build_success:
+                    self.set_status(family_key, "testing")
+                    test_start = time.time()
+                    test_success = self.test_family_unit(family_key)
+                    test_time = time.time() - test_start
+            finally:
+                self._local.log_file = None
+                self._local.family = None
+        
+        self.set_status(family_key, "PASS" if build_success and test_success else "FAIL")
+        return {
+            "name": self.families[family_key]["name"],
+            "representative": self.families[family_key]["representative"],
+            "build_success": build_success,
+            "test_success": test_success,
+            "overall_success": build_success and test_success,
+            "build_time": build_time,
+            "test_time": test_time,
+            "log_file": str(log_path),
+        }
+
+    def run_with_status(self, jobs, workers, on_error):
+        """Run {key: job} on `workers` threads, in order, under the shared status line.
+
+        Returns ({key: result} in job order, wall time). A job that raises gets
+        on_error(key, exception) as its result.
+        """
+        started = time.time()
+        interactive = sys.stdout.isatty()
+        done = threading.Event()
+        
+        def show_progress():
+            last_line = ""
+            while not done.wait(0.5):
+                line = self.render_status(started)
+                if interactive:
+                    print(f"\r\033[K{line}", end="", flush=True)
+                elif line.split("] ", 1)[1] != last_line.split("] ", 1)[-1]:
+                    print(line, flush=True)
+                last_line = line
+        
+        progress = threading.Thread(target=show_progress, daemon=True)
+        progress.start()
+        results = {}
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {key: pool.submit(job) for key, job in jobs.items()}
+                for key, future in futures.items():
+                    try:
+                        results[key] = future.result()
+                    except Exception as e:
+                        results[key] = on_error(key, e)
+        finally:
+            done.set()
+            progress.join()
+            print(f"\r\033[K{self.render_status(started)}" if interactive else self.render_status(started))
+        return results, time.time() - started
+
+    def build_all_family_units(self, max_parallel=None):
+        """Build all family units (representatives), several families at once.
+
+        Each family's test starts as soon as its own build finishes; output goes
+        to per-family log files while a single status line shows progress.
+        """
         self.start_time = datetime.now()
         
         self.log("Building All Family Units", "HEADER")
@@ -228,22 +356,195 @@ class OrganizedFamilyBuilder:
         
         if not self.check_prerequisites():
             return False
-            
-        for family_key in self.families.keys():
-            print(f"\n{'=' * 60}")
-            build_success = self.build_family_unit(family_key)
-            test_success = False
-            
-            if build_success:
-                test_success = self.test_family_unit(family_key)
-                
-            self.results[family_key] = {
+        
+        family_keys = list(self.families.keys())
+        if not family_keys:
+            return False
+        workers = max(1, min(max_parallel or os.cpu_count() or 1, len(family_keys)))
+        log_dir = self.log_root / self.start_time.strftime("%Y%m%d-%H%M%S")
+        log_dir.mkdir(parents=True, exist_ok=True)
+        self.log(f"Building {len(family_keys)} families, {workers} at a time (logs: {log_dir})", "INFO")
+        
+        for family_key in family_keys:
+            self.set_status(family_key, "queued")
+        self.start_prefetch([self.families[key]["representative"] for key in family_keys
+                             if self.families[key]["representative"]])
+        
+        def failed(family_key, error):
+            self.set_status(family_key, "FAIL")
+            return {
                 "name": self.families[family_key]["name"],
                 "representative": self.families[family_key]["representative"],
-                "build_success": build_success,
-                "test_success": test_success,
-                "overall_success": build_success and test_success
+                "build_success": False, "test_success": False, "overall_success": False,
+                "build_time": 0.0, "test_time": 0.0,
+                "log_file": str(log_dir / f"{family_key}.log"), "error": str(error),
             }
+        
+        tasks = {family_key: (lambda key=family_key: self.build_and_test_family(key, log_dir))
+                 for family_key in family_keys}
+        results, wall_time = self.run_with_status(tasks, workers, failed)
+        self.results.update(results)
+        
+        # Wall time vs. the longest single family chain (the best any schedule can do)
+        chains = {key: r["build_time"] + r["test_time"] for key, r in self.results.items()}
+        critical_job = max(chains, key=chains.get)
+        self.run_stats = {
+            "wall_time": wall_time,
+            "serial_time": sum(chains.values()),
+            "critical_path": chains[critical_job],
+            "critical_job": critical_job,
+            "workers": workers,
+        }
+        return all(r["overall_success"] for r in self.results.values())
+
+    def start_prefetch(self, distro_keys):
+        """Pull missing base images for these distributions in the background, in build order"""
+        if not self.prefetch:
+            return
+        dockerfiles = {}
+        for family in self.families.values():
+            for distro_key, distro in family["distributions"].items():
+                if distro_key in distro_keys:
+                    dockerfiles[distro_key] = Path(distro["context_dir"]) / "Dockerfile"
+        ordered = {key: dockerfiles[key] for key in distro_keys if key in dockerfiles}
+        self.prefetcher = BaseImagePrefetcher(ordered, self.registry, log=lambda message: self.log(message, "INFO"))
+        self.prefetcher.start()
+
+    def show_prefetch_summary(self):
+        if self.prefetcher and self.prefetcher.results:
+            self.prefetcher.join()
+            print()
+            for line in self.prefetcher.lines():
+                print(line)
+
+    def available_memory(self):
+        """Bytes of memory available for new work, or None if unknown"""
+        try:
+            with open("/proc/meminfo") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        try:
+            return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (ValueError, OSError, AttributeError):
+            return None
+
+    def matrix_workers(self, job_count, max_parallel=None, mem_per_build=2.0):
+        """Concurrent builds allowed by CPU count and available memory (GiB per build)"""
+        limits = {"cpu": os.cpu_count() or 1, "jobs": job_count}
+        if max_parallel:
+            limits["requested"] = max_parallel
+        memory = self.available_memory()
+        if memory and mem_per_build > 0:
+            limits["memory"] = int(memory // (mem_per_build * 1024 ** 3))
+        workers = max(1, min(limits.values()))
+        limiting = min(limits, key=limits.get)
+        return workers, limiting
+
+    def build_matrix_job(self, family_key, distro_key, log_dir):
+        """Scheduler job: build one distribution of the full matrix, logging to its own file"""
+        log_path = log_dir / f"{distro_key}.log"
+        with open(log_path, "w") as log_file:
+            self._local.log_file = log_file
+            self._local.family = distro_key
+            try:
+                self.set_status(distro_key, "building")
+                build_start = time.time()
+                action = self.build_distribution(family_key, distro_key)
+                build_time = time.time() - build_start
+            finally:
+                self._local.log_file = None
+                self._local.family = None
+        
+        self.set_status(distro_key, "FAIL" if action == "failed" else action)
+        return {"family": family_key, "action": action, "build_time": build_time, "log_file": str(log_path)}
+
+    def build_full_matrix(self, max_parallel=None, mem_per_build=2.0):
+        """Build every distribution of every family, longest expected build first.
+
+        Durations recorded by earlier runs order the queue so the slowest
+        images start first instead of stretching the tail; distros without
+        history are assumed to be as slow as the slowest known one.
+        """
+        self.start_time = datetime.now()
+        
+        self.log("Building Full Distribution Matrix", "HEADER")
+        self.log("=" * 60, "HEADER")
+        
+        if not self.check_prerequisites():
+            return False
+        
+        jobs = [(family_key, distro_key) for family_key, family in self.families.items()
+                for distro_key in family["distributions"]]
+        if not jobs:
+            return False
+        
+        estimates = estimated_build_seconds(load_history())
+        default_estimate = max(estimates.values(), default=0.0)
+        self.matrix_estimates = {distro_key: estimates.get(distro_key, default_estimate) for _, distro_key in jobs}
+        jobs.sort(key=lambda job: -self.matrix_estimates[job[1]])
+        
+        workers, limiting = self.matrix_workers(len(jobs), max_parallel, mem_per_build)
+        log_dir = self.log_root / f"matrix-{self.start_time:%Y%m%d-%H%M%S}"
+        log_dir.mkdir(parents=True, exist_ok=True)
+        self.log(f"Building {len(jobs)} distributions, {workers} at a time (limited by {limiting}; logs: {log_dir})", "INFO")
+        self.log("Order: " + ", ".join(distro_key for _, distro_key in jobs), "INFO")
+        
+        for _, distro_key in jobs:
+            self.set_status(distro_key, "queued")
+        self.start_prefetch([distro_key for _, distro_key in jobs])
+        
+        family_of = {distro_key: family_key for family_key, distro_key in jobs}
+        
+        def failed(distro_key, error):
+            self.set_status(distro_key, "FAIL")
+            return {"family": family_of[distro_key], "action": "failed", "build_time": 0.0,
+                    "log_file": str(log_dir / f"{distro_key}.log"), "error": str(error)}
+        
+        # The executor starts jobs in submission order, so the queue stays longest-first
+        tasks = {distro_key: (lambda family_key=family_key, distro_key=distro_key:
+                              self.build_matrix_job(family_key, distro_key, log_dir))
+                 for family_key, distro_key in jobs}
+        results, wall_time = self.run_with_status(tasks, workers, failed)
+        self.matrix_results.update(results)
+        
+        builds = {key: r["build_time"] for key, r in self.matrix_results.items()}
+        critical_job = max(builds, key=builds.get)
+        self.run_stats = {
+            "wall_time": wall_time,
+            "serial_time": sum(builds.values()),
+            "critical_path": builds[critical_job],
+            "critical_job": critical_job,
+            "workers": workers,
+        }
+        return all(r["action"] != "failed" for r in self.matrix_results.values())
+
+    def show_matrix_summary(self):
+        """Show the outcome of a full-matrix build in schedule order"""
+        print(f"\n{'=' * 70}")
+        self.log("FULL MATRIX BUILD SUMMARY", "HEADER")
+        print(f"{'=' * 70}")
+        
+        print(f"{'Distro':<12} {'Family':<10} {'Action':<9} {'Expected':>9} {'Time':>8}")
+        print("-" * 70)
+        for distro_key, result in self.matrix_results.items():
+            estimate = self.matrix_estimates.get(distro_key, 0.0)
+            expected = f"{estimate:.1f}s" if estimate else "-"
+            print(f"{distro_key:<12} {result['family']:<10} {result['action']:<9} {expected:>9} {result['build_time']:>7.1f}s")
+            if result["action"] == "failed":
+                print(f"  log: {result['log_file']}")
+        
+        print("-" * 70)
+        failed = sum(1 for result in self.matrix_results.values() if result["action"] == "failed")
+        print(f"Results: {len(self.matrix_results) - failed}/{len(self.matrix_results)} distributions built")
+        if self.run_stats:
+            stats = self.run_stats
+            print(f"Wall time: {stats['wall_time']:.1f}s with {stats['workers']} parallel builds "
+                  f"(serial total {stats['serial_time']:.1f}s)")
+            print(f"Longest build: {stats['critical_job']} {stats['critical_path']:.1f}s")
+        self.show_prefetch_summary()
 
     def show_family_summary(self):
         """Show organized summary of all families"""
@@ -257,7 +558,7 @@ class OrganizedFamilyBuilder:
         passed = 0
         total = len(self.results)
         
-        print(f"{'Family':<18} {'Representative':<12} {'Build':<8} {'Test':<8} {'Status':<8}")
+        print(f"{'Family':<18} {'Representative':<12} {'Build':<8} {'Test':<8} {'Status':<8} {'Time':>8}")
         print("-" * 70)
         
         for family_key, result in self.results.items():
@@ -268,7 +569,10 @@ class OrganizedFamilyBuilder:
             test_status = "PASS" if result["test_success"] else "FAIL"
             overall_status = "PASS" if result["overall_success"] else "FAIL"
             
-            print(f"{result['name'][:17]:<18} {result['representative']:<12} {build_status:<8} {test_status:<8} {overall_status:<8}")
+            elapsed = result.get("build_time", 0.0) + result.get("test_time", 0.0)
+            print(f"{result['name'][:17]:<18} {result['representative']:<12} {build_status:<8} {test_status:<8} {overall_status:<8} {elapsed:>7.1f}s")
+            if not result["overall_success"] and result.get("log_file"):
+                print(f"  log: {result['log_file']}")
             
             if result["overall_success"]:
                 passed += 1
@@ -276,6 +580,22 @@ class OrganizedFamilyBuilder:
         print("-" * 70)
         print(f"Results: {passed}/{total} family units successful")
         print(f"Duration: {duration}")
+        if self.run_stats:
+            stats = self.run_stats
+            print(f"Wall time: {stats['wall_time']:.1f}s with {stats['workers']} parallel builds "
+                  f"(serial total {stats['serial_time']:.1f}s)")
+            print(f"Critical path: {stats['critical_job']} build+test {stats['critical_path']:.1f}s")
+        
+        if self.build_report.entries:
+            print()
+            for line in self.build_report.lines():
+                print(line)
+        self.show_prefetch_summary()
+        
+        if self.test_results:
+            print()
+            for line in format_matrix(self.test_results):
+                print(line)
         
         # Connection information
         if passed > 0:
@@ -314,6 +634,7 @@ class OrganizedFamilyBuilder:
             print("[3] Test specific family unit") 
             print("[4] Show family details")
             print("[5] Check prerequisites")
+            print("[6] Build full matrix (every distribution)")
             print("[q] Quit")
             
             choice = input(f"\nSelect option: ").strip().lower()
@@ -335,12 +656,18 @@ class OrganizedFamilyBuilder:
                 family_key = input("Enter family key: ").strip().lower()
                 if family_key in self.families:
                     self.test_family_unit(family_key)
+                    if family_key in self.test_results:
+                        for line in format_matrix({family_key: self.test_results[family_key]}):
+                            print(line)
                 else:
                     self.log("Invalid family key", "ERROR")
             elif choice == '4':
                 self.show_family_details()
             elif choice == '5':
                 self.check_prerequisites()
+            elif choice == '6':
+                self.build_full_matrix()
+                self.show_matrix_summary()
             else:
                 self.log("Invalid choice", "ERROR")
 
@@ -366,15 +693,38 @@ class OrganizedFamilyBuilder:
 
 def main():
     """Main execution function"""
-    builder = OrganizedFamilyBuilder()
+    parser = argparse.ArgumentParser(description="Organized Family Build System")
+    parser.add_argument("--build-all", action="store_true", help="Build and test every family unit non-interactively")
+    parser.add_argument("--matrix", action="store_true", help="Build every distribution of every family, longest first")
+    parser.add_argument("--jobs", "-j", type=int, help="Builds to run at once (default: CPU count)")
+    parser.add_argument("--mem-per-build", type=float, default=2.0,
+                        help="GiB of available memory reserved per concurrent matrix build")
+    parser.add_argument("--force", action="store_true", help="Rebuild images even when their context hash is unchanged")
+    parser.add_argument("--pkg-cache", nargs="?", const=DEFAULT_PKG_CACHE_URL, metavar="URL",
+                        help="Route package downloads through the package cache sidecar")
+    parser.add_argument("--no-prefetch", action="store_true", help="Do not pull base images ahead of the builds")
+    parser.add_argument("--registry-mirror", metavar="HOST:PORT",
+                        help="Prefetch base images from this registry (e.g. a local registry:2) and retag them")
+    parser.add_argument("--build-timeout", type=int, default=3600, help="Seconds before a build is killed")
+    parser.add_argument("--idle-timeout", type=int, default=600, help="Seconds without build output before it is killed")
+    args = parser.parse_args()
+    if args.pkg_cache:
+        os.environ[PKG_CACHE_ENV] = args.pkg_cache
+    
+    builder = OrganizedFamilyBuilder(force=args.force, build_timeout=args.build_timeout,
+                                     idle_timeout=args.idle_timeout, prefetch=not args.no_prefetch,
+                                     registry=args.registry_mirror)
     
     if len(builder.families) == 0:
         print("No family configurations found. Please check the project/families directory.")
         return
         
     # Check if running non-interactively
-    if len(sys.argv) > 1 and sys.argv[1] == '--build-all':
-        builder.build_all_family_units()
+    if args.matrix:
+        builder.build_full_matrix(args.jobs, args.mem_per_build)
+        builder.show_matrix_summary()
+    elif args.build_all:
+        builder.build_all_family_units(args.jobs)
         builder.show_family_summary()
     else:
         builder.interactive_menu()
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Package Cache Proxy
+A small caching HTTP forward proxy for distro package downloads. Image builds
+reach it through the `http_proxy` build arg; package files (.deb, .rpm, .apk,
+.pkg.tar.*, .txz ...) are cached forever, repository metadata for a short
+TTL, and HTTPS is tunneled uncached. Each package family gets its own cache
+store, and hit/miss statistics are served at /_stats.
+
+Self-contained on purpose: the compose sidecar mounts only this file into a
+stock Python image.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import select
+import socket
+import hashlib
+import argparse
+import tempfile
+import threading
+import http.client
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_PORT = 3142
+DEFAULT_HOST = "127.0.0.1"
+TUNNEL_PORT = 443
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".vps-state" / "pkg-cache"
+DEFAULT_METADATA_TTL = 300
+CHUNK_SIZE = 64 * 1024
+UPSTREAM_TIMEOUT = 60
+
+# Mirror hosts of each family's default repositories
+HOST_FAMILIES = {
+    "deb.debian.org": "debian", "security.debian.org": "debian", "archive.ubuntu.com": "debian",
+    "security.ubuntu.com": "debian", "ports.ubuntu.com": "debian",
+    "dl.rockylinux.org": "redhat", "mirrors.rockylinux.org": "redhat", "mirror.stream.centos.org": "redhat",
+    "mirrors.centos.org": "redhat", "dl.fedoraproject.org": "redhat", "mirrors.fedoraproject.org": "redhat",
+    "dl-cdn.alpinelinux.org": "alpine",
+    "download.opensuse.org": "suse", "cdn.opensuse.org": "suse",
+    "geo.mirror.pkgbuild.com": "arch", "mirror.pkgbuild.com": "arch",
+    "mirrors.slackware.com": "slackware", "slackware.osuosl.org": "slackware",
+}
+# Fallback for other mirrors (and the local fake repository used by selftest)
+PATH_FAMILIES = [
+    (re.compile(r"\.u?deb$|/dists/"), "debian"),
+    (re.compile(r"\.d?rpm$|/repodata/"), "rpm"),
+    (re.compile(r"\.apk$|/APKINDEX\.tar\.gz$"), "alpine"),
+    (re.compile(r"\.pkg\.tar\.(zst|xz|gz)(\.sig)?$"), "arch"),
+    (re.compile(r"\.t[xgbl]z$"), "slackware"),
+]
+# Package files never change under the same URL; metadata does
+PACKAGE_FILE = re.compile(r"\.(u?deb|d?rpm|apk|t[xgbl]z|pkg\.tar\.(zst|xz|gz)(\.sig)?)$")
+METADATA_FILE = re.compile(
+    r"(/InRelease|/Release(\.gpg)?|/Packages(\.\w+)?|/Sources(\.\w+)?|/Translation-[\w.]+|"
+    r"/repomd\.xml(\.asc)?|/repodata/.+\.(xml|sqlite)(\.\w+)?|/APKINDEX\.tar\.gz|"
+    r"\.(db|files)(\.sig)?|/CHECKSUMS\.md5(\.asc)?|/FILELIST\.TXT|/PACKAGES\.TXT)$")
+# Every store classify() can return; purge touches nothing else under the cache directory
+STORES = sorted(set(HOST_FAMILIES.values()) | {family for _, family in PATH_FAMILIES} | {"other"})
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-connection", "proxy-authorization", "te",
+              "trailers", "transfer-encoding", "upgrade"}
+
+
+def classify(url: str) -> str:
+    """Cache store (package family) a URL belongs to"""
+    parts = urlsplit(url)
+    family = HOST_FAMILIES.get((parts.hostname or "").lower())
+    if family:
+        return family
+    for pattern, family in PATH_FAMILIES:
+        if pattern.search(parts.path):
+            return family
+    return "other"
+
+
+def cache_policy(url: str, metadata_ttl: float) -> Optional[float]:
+    """Seconds a response may be reused: inf for packages, the TTL for metadata, None if uncached"""
+    path = urlsplit(url).path
+    if PACKAGE_FILE.search(path):
+        return float("inf")
+    if metadata_ttl > 0 and METADATA_FILE.search(path):
+        return metadata_ttl
+    return None
+
+
+def format_size(size_bytes: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size_bytes < 1024:
+            return f"{size_bytes:.1f}{unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.1f}TB"
+
+
+class CacheStats:
+    """Per-family hit/miss counters, persisted next to the cache"""
+
+    FIELDS = ("hits", "misses", "passthrough", "errors", "bytes_from_cache", "bytes_from_upstream")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.families: Dict[str, Dict[str, int]] = {}
+        self.tunnels = 0
+        self.started = time.time()
+        if path.exists():
+            try:
+                saved = json.loads(path.read_text())
+                self.families = saved.get("families", {})
+                self.tunnels = saved.get("tunnels", 0)
+            except ValueError:
+                pass
+
+    def add(self, family: str, **counts) -> None:
+        with self.lock:
+            row = self.families.setdefault(family, dict.fromkeys(self.FIELDS, 0))
+            for field, value in counts.items():
+                row[field] = row.get(field, 0) + value
+
+    def add_tunnel(self) -> None:
+        with self.lock:
+            self.tunnels += 1
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            families = {family: dict(row) for family, row in sorted(self.families.items())}
+            tunnels = self.tunnels
+        for row in families.values():
+            lookups = row["hits"] + row["misses"]
+            row["hit_ratio"] = round(row["hits"] / lookups, 3) if lookups else 0.0
+        return {"families": families, "tunnels": tunnels, "uptime": round(time.time() - self.started, 1)}
+
+    def save(self) -> None:
+        data = self.snapshot()
+        tmp_path = self.path.with_name(f".{self.path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps({"families": data["families"], "tunnels": data["tunnels"]}, indent=2))
+        os.replace(tmp_path, self.path)
+
+
+class PackageCache:
+    """On-disk store: <cache_dir>/<family>/<sha[:2]>/<sha> plus a .json metadata file"""
+
+    def __init__(self, cache_dir: Path, metadata_ttl: float = DEFAULT_METADATA_TTL):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.metadata_ttl = metadata_ttl
+        self.stats = CacheStats(self.cache_dir / "stats.json")
+        self.opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))  # Never loop through ourselves
+
+    def entry_path(self, family: str, url: str) -> Path:
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / family / digest[:2] / digest
+
+    def lookup(self, family: str, url: str, max_age: float) -> Optional[Tuple[Path, Dict]]:
+        path = self.entry_path(family, url)
+        try:
+            meta = json.loads(path.with_suffix(".json").read_text())
+        except (OSError, ValueError):
+            return None
+        if not path.exists() or time.time() - meta["fetched"] > max_age:
+            return None
+        return path, meta
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    server_version = "vps-pkg-cache/1.0"
+    protocol_version = "HTTP/1.1"
+    cache: PackageCache = None
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # Forward proxy requests arrive with an absolute URI
+    def do_GET(self):
+        self._handle(head=False)
+
+    def do_HEAD(self):
+        self._handle(head=True)
+
+    def _handle(self, head: bool) -> None:
+        if not self.path.startswith("http://"):
+            if self.path.rstrip("/") == "/_stats":
+                body = json.dumps(self.cache.stats.snapshot(), indent=2).encode()
+                self._send_head(200, {"Content-Type": "application/json", "Content-Length": str(len(body))})
+                if not head:
+                    self.wfile.write(body)
+            else:
+                self.send_error(400, "Expected an absolute http:// URL (use this server as http_proxy)")
+            return
+
+        url = self.path
+        family = classify(url)
+        max_age = cache_policy(url, self.cache.metadata_ttl)
+        if max_age is None or "Range" in self.headers:
+            self._forward(url, family, head)
+            return
+
+        cached = self.cache.lookup(family, url, max_age)
+        if cached:
+            path, meta = cached
+            size = path.stat().st_size
+            # Counted before sending, so a client that asks for /_stats right after sees it
+            self.cache.stats.add(family, hits=1, bytes_from_cache=0 if head else size)
+            self._send_head(200, {"Content-Type": meta.get("content_type", "application/octet-stream"),
+                                  "Content-Length": str(size), "X-Cache": "HIT"})
+            if not head:
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, self.wfile, CHUNK_SIZE)
+        elif head:
+            self._forward(url, family, head)
+        else:
+            self._fetch_and_store(url, family)
+        self.cache.stats.save()
+
+    def _send_head(self, status: int, headers: Dict[str, str]) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _open_upstream(self, url: str, head: bool):
+        headers = {name: value for name, value in self.headers.items()
+                   if name.lower() not in HOP_BY_HOP and name.lower() != "host"}
+        request = urllib.request.Request(url, headers=headers, method="HEAD" if head else "GET")
+        try:
+            return self.cache.opener.open(request, timeout=UPSTREAM_TIMEOUT)
+        except urllib.error.HTTPError as e:
+            return e  # Relay upstream errors (404s etc.) unchanged
+
+    def _relay_headers(self, response, extra: Dict[str, str]) -> Dict[str, str]:
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in HOP_BY_HOP}
+        headers.update(extra)
+        if "Content-Length" not in headers:
+            headers["Connection"] = "close"
+            self.close_connection = True
+        return headers
+
+    def _forward(self, url: str, family: str, head: bool) -> None:
+        """Pass a request through without caching"""
+        try:
+            response = self._open_upstream(url, head)
+        except (urllib.error.URLError, OSError) as e:
+            self.cache.stats.add(family, errors=1)
+            self.send_error(502, f"Upstream error: {e}")
+            return
+        with response:
+            self._send_head(response.status, self._relay_headers(response, {"X-Cache": "PASS"}))
+            copied = 0 if head else self._copy(response, [self.wfile])
+        self.cache.stats.add(family, passthrough=1, bytes_from_upstream=copied)
+
+    def _fetch_and_store(self, url: str, family: str) -> None:
+        """Stream a miss to the client while writing it into the cache"""
+        try:
+            response = self._open_upstream(url, head=False)
+        except (urllib.error.URLError, OSError) as e:
+            self.cache.stats.add(family, errors=1)
+            self.send_error(502, f"Upstream error: {e}")
+            return
+        with response:
+            if response.status != 200:
+                self._send_head(response.status, self._relay_headers(response, {"X-Cache": "PASS"}))
+                self.cache.stats.add(family, errors=1, bytes_from_upstream=self._copy(response, [self.wfile]))
+                return
+
+            path = self.cache.entry_path(family, url)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".partial-")
+            self._send_head(200, self._relay_headers(response, {"X-Cache": "MISS"}))
+            try:
+                # The last block is held back until the entry is committed: a client that
+                # re-requests the URL as soon as its response completes must get a hit
+                copied, pending = 0, b""
+                with os.fdopen(fd, "wb") as tmp_file:
+                    for block in iter(lambda: response.read(CHUNK_SIZE), b""):
+                        tmp_file.write(block)
+                        self.wfile.write(pending)
+                        pending = block
+                        copied += len(block)
+                expected = response.headers.get("Content-Length")
+                if expected is not None and int(expected) != copied:
+                    raise OSError(f"short read ({copied} of {expected} bytes)")
+                meta = {"url": url, "fetched": time.time(), "size": copied,
+                        "content_type": response.headers.get("Content-Type", "application/octet-stream")}
+                # Concurrent misses for one URL each write their own file; the last rename wins
+                os.replace(tmp_name, path)
+                meta_tmp = path.with_name(f".partial-{path.name}-{threading.get_ident()}.json")
+                meta_tmp.write_text(json.dumps(meta))
+                os.replace(meta_tmp, path.with_suffix(".json"))
+                self.cache.stats.add(family, misses=1, bytes_from_upstream=copied)
+                self.wfile.write(pending)
+            except OSError:
+                if os.path.exists(tmp_name):
+                    os.unlink(tmp_name)
+                self.cache.stats.add(family, errors=1)
+                self.close_connection = True
+
+    @staticmethod
+    def _copy(response, targets) -> int:
+        copied = 0
+        for block in iter(lambda: response.read(CHUNK_SIZE), b""):
+            for target in targets:
+                target.write(block)
+            copied += len(block)
+        return copied
+
+    def do_CONNECT(self):
+        """Tunnel HTTPS untouched (it cannot be cached without intercepting TLS)"""
+        host, _, port = self.path.rpartition(":")
+        if not host or port != str(TUNNEL_PORT):
+            # Anything but HTTPS would turn the proxy into a relay for arbitrary TCP
+            self.send_error(403, f"Tunnels are only allowed to port {TUNNEL_PORT}")
+            return
+        try:
+            upstream = socket.create_connection((host.strip("[]"), TUNNEL_PORT), timeout=UPSTREAM_TIMEOUT)
+        except OSError as e:
+            self.send_error(502, f"Tunnel failed: {e}")
+            return
+        self.cache.stats.add_tunnel()
+        self.send_response(200, "Connection Established")
+        self.end_headers()
+        sockets = [self.connection, upstream]
+        try:
+            while True:
+                readable, _, errored = select.select(sockets, [], sockets, UPSTREAM_TIMEOUT)
+                if errored or not readable:
+                    break
+                for sock in readable:
+                    data = sock.recv(CHUNK_SIZE)
+                    if not data:
+                        return
+                    (upstream if sock is self.connection else self.connection).sendall(data)
+        except OSError:
+            pass
+        finally:
+            upstream.close()
+            self.close_connection = True
+
+
+def make_server(host: str, port: int, cache: PackageCache, verbose: bool = False) -> ThreadingHTTPServer:
+    handler = type("BoundProxyHandler", (ProxyHandler,), {"cache": cache})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    return server
+
+
+def print_stats(stats: Dict) -> None:
+    print(f"{'Family':<11} {'Hits':>6} {'Misses':>7} {'Pass':>6} {'Errors':>7} {'Hit ratio':>10} "
+          f"{'From cache':>11} {'Downloaded':>11}")
+    for family, row in stats["families"].items():
+        print(f"{family:<11} {row['hits']:>6} {row['misses']:>7} {row['passthrough']:>6} {row['errors']:>7} "
+              f"{row['hit_ratio']:>9.0%} {format_size(row['bytes_from_cache']):>11} "
+              f"{format_size(row['bytes_from_upstream']):>11}")
+    print(f"HTTPS tunnels (uncached): {stats['tunnels']}")
+
+
+def selftest() -> bool:
+    """Serve a fake package repository locally and check misses, hits and stats offline"""
+    import http.server
+    import functools
+
+    with tempfile.TemporaryDirectory() as workdir:
+        repo = Path(workdir) / "repo"
+        package = repo / "pool" / "main" / "h" / "hello" / "hello_1.0_amd64.deb"
+        package.parent.mkdir(parents=True)
+        package.write_bytes(os.urandom(256 * 1024))
+        release = repo / "dists" / "stable" / "InRelease"
+        release.parent.mkdir(parents=True)
+        release.write_text("Origin: fake\n")
+        (repo / "README").write_text("not cacheable\n")
+
+        class QuietHandler(http.server.SimpleHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+        repo_handler = functools.partial(QuietHandler, directory=str(repo))
+        repo_server = ThreadingHTTPServer(("127.0.0.1", 0), repo_handler)
+        proxy_server = make_server("127.0.0.1", 0, PackageCache(Path(workdir) / "cache"))
+        for server in (repo_server, proxy_server):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        repo_url = f"http://127.0.0.1:{repo_server.server_address[1]}"
+
+        def get(path: str) -> Tuple[int, str, bytes]:
+            conn = http.client.HTTPConnection("127.0.0.1", proxy_server.server_address[1], timeout=10)
+            conn.request("GET", path if path.startswith("/_") else repo_url + path)
+            response = conn.getresponse()
+            body = response.read()
+            conn.close()
+            return response.status, response.getheader("X-Cache", ""), body
+
+        checks = []
+        first = get("/pool/main/h/hello/hello_1.0_amd64.deb")
+        checks.append(("package miss", first[:2] == (200, "MISS") and first[2] == package.read_bytes()))
+        package.unlink()  # A hit must not need the repository any more
+        second = get("/pool/main/h/hello/hello_1.0_amd64.deb")
+        checks.append(("package hit offline", second[:2] == (200, "HIT") and second[2] == first[2]))
+        checks.append(("metadata miss", get("/dists/stable/InRelease")[1] == "MISS"))
+        checks.append(("metadata hit within TTL", get("/dists/stable/InRelease")[1] == "HIT"))
+        checks.append(("other files pass through", get("/README")[1] == "PASS"))
+        checks.append(("missing files relayed", get("/pool/missing.deb")[0] == 404))
+        stats = json.loads(get("/_stats")[2])["families"]["debian"]
+        checks.append(("stats counted", (stats["hits"], stats["misses"]) == (2, 2)))
+
+        for server in (repo_server, proxy_server):
+            server.shutdown()
+            server.server_close()
+
+    for name, passed in checks:
+        print(f"{'PASS' if passed else 'FAIL'}  {name}")
+    return all(passed for _, passed in checks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caching proxy for distro package downloads")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the proxy")
+    serve_parser.add_argument("--host", default=DEFAULT_HOST,
+                              help="Address to listen on (the compose sidecar passes 0.0.0.0 inside its container)")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR))
+    serve_parser.add_argument("--metadata-ttl", type=float, default=DEFAULT_METADATA_TTL,
+                              help="Seconds to reuse repository metadata (0 disables)")
+    serve_parser.add_argument("--verbose", action="store_true", help="Log every request")
+
+    stats_parser = subparsers.add_parser("stats", help="Show hit/miss statistics of a running proxy")
+    stats_parser.add_argument("--url", default=f"http://localhost:{DEFAULT_PORT}")
+
+    purge_parser = subparsers.add_parser("purge", help="Delete cached files")
+    purge_parser.add_argument("family", nargs="?", choices=STORES, help="Only this family's store")
+    purge_parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR))
+
+    subparsers.add_parser("selftest", help="Verify caching against a local fake repository")
+
+    args = parser.parse_args()
+
+    if args.action == "serve":
+        cache = PackageCache(Path(args.cache_dir), args.metadata_ttl)
+        server = make_server(args.host, args.port, cache, args.verbose)
+        print(f"Package cache listening on {args.host}:{args.port} (store: {args.cache_dir})", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            cache.stats.save()
+    elif args.action == "stats":
+        try:
+            with urllib.request.urlopen(args.url.rstrip("/") + "/_stats", timeout=5) as response:
+                print_stats(json.loads(response.read()))
+        except (urllib.error.URLError, OSError) as e:
+            print(f"Package cache not reachable at {args.url}: {e}")
+            sys.exit(1)
+    elif args.action == "purge":
+        cache_dir = Path(args.cache_dir)
+        targets = [cache_dir / family for family in ([args.family] if args.family else STORES)
+                   if (cache_dir / family).is_dir()]
+        for target in targets:
+            shutil.rmtree(target, ignore_errors=True)
+        print(f"Purged {len(targets)} cache store(s)")
+    elif args.action == "selftest":
+        sys.exit(0 if selftest() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Fast Pre-flight Checks
+Replaces the serial `docker --version` / `docker info` / `docker-compose config`
+round-trips with one Engine API _ping + version call, PATH lookups for the
+CLI tools and an in-process validation of docker-compose.yml (falling back to
+`docker compose config` for YAML it cannot read). The checks run concurrently
+and each is timed. Passing tools and compose results are cached for the
+session, but the daemon is pinged on every run.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from docker_api import DockerAPIError, get_client
+
+PROJECT_DIR = Path(__file__).resolve().parent
+COMPOSE_FILE = PROJECT_DIR.parent / "docker-compose.yml"
+CACHE_FILE = PROJECT_DIR / ".vps-state" / "preflight.json"
+CACHE_TTL = 300  # Seconds passing tools/compose results are reused across invocations
+SLOW_CHECK = 0.5  # Checks slower than this are flagged in the timing breakdown
+COMPOSE_PLUGIN_DIRS = [os.path.join(os.environ.get("DOCKER_CONFIG", "~/.docker"), "cli-plugins"),
+                       "/usr/local/lib/docker/cli-plugins", "/usr/local/libexec/docker/cli-plugins",
+                       "/usr/lib/docker/cli-plugins", "/usr/libexec/docker/cli-plugins",
+                       "/Applications/Docker.app/Contents/Resources/cli-plugins",
+                       r"C:\Program Files\Docker\cli-plugins"]
+
+
+class ComposeError(Exception):
+    """docker-compose.yml could not be parsed or is invalid"""
+
+    def __init__(self, message: str, line: Optional[int] = None):
+        super().__init__(f"line {line}: {message}" if line else message)
+        self.line = line
+
+
+class YAMLSubsetError(ComposeError):
+    """The file uses YAML the subset parser does not read (or is not YAML at all)"""
+
+
+# Minimal YAML subset: block mappings and sequences, quoted and plain scalars,
+# flow sequences and comments. Enough for docker-compose.yml; anchors, tags and
+# multi-line scalars are rejected rather than misread, and check_compose then
+# leaves the file to `docker compose config`.
+
+def _quote_end(text: str, start: int) -> int:
+    """Index of the quote closing the quoted scalar that opens at start, or -1"""
+    quote = text[start]
+    index = start + 1
+    while index < len(text):
+        char = text[index]
+        if quote == '"' and char == "\\":
+            index += 2
+            continue
+        if char == quote:
+            if quote == "'" and text[index + 1:index + 2] == "'":  # '' is an escaped quote
+                index += 2
+                continue
+            return index
+        index += 1
+    return -1
+
+
+def _unquoted(text: str) -> Iterator[Tuple[int, str]]:
+    """(index, char) for every character outside quoted scalars"""
+    index = 0
+    while index < len(text):
+        char = text[index]
+        # Quotes only open a scalar at its start; it's in a plain scalar is an apostrophe
+        if char in "'\"" and (index == 0 or text[index - 1] in " \t[,{"):
+            end = _quote_end(text, index)
+            if end < 0:
+                return  # Unterminated; _scalar reports it
+            index = end + 1
+            continue
+        yield index, char
+        index += 1
+
+
+def _strip_comment(text: str) -> str:
+    for index, char in _unquoted(text):
+        if char == "#" and (index == 0 or text[index - 1] in " \t"):
+            return text[:index].rstrip()
+    return text.rstrip()
+
+
+def _split_key(text: str) -> Optional[Tuple[str, str]]:
+    """Split 'key: value' outside quotes; None if the text is not a mapping entry"""
+    for index, char in _unquoted(text):
+        if char == ":" and (index + 1 == len(text) or text[index + 1] == " "):
+            return _scalar(text[:index].strip(), None), text[index + 1:].strip()
+    return None
+
+
+def _scalar(text: str, line: Optional[int]) -> Any:
+    if not text:
+        return None
+    if text[0] in "&*!|>":
+        raise YAMLSubsetError(f"unsupported YAML construct: {text}", line)
+    if text[0] in "'\"":
+        end = _quote_end(text, 0)
+        if end < 0:
+            raise YAMLSubsetError(f"unterminated string: {text}", line)
+        if end != len(text) - 1:
+            raise YAMLSubsetError(f"unexpected text after string: {text}", line)
+        if text[0] == "'":
+            return text[1:-1].replace("''", "'")
+        try:
+            return json.loads(text)  # Covers the common escapes: \\ \" \n \t \uXXXX
+        except ValueError:
+            raise YAMLSubsetError(f"unsupported escape in string: {text}", line)
+    if text.startswith("["):
+        if not text.endswith("]"):
+            raise YAMLSubsetError(f"unterminated flow sequence: {text}", line)
+        inner = text[1:-1].strip()
+        if not inner:
+            return []
+        separators = [index for index, char in _unquoted(inner) if char == ","]
+        if any(char in "[{" for _, char in _unquoted(inner)):
+            raise YAMLSubsetError(f"unsupported nested flow collection: {text}", line)
+        bounds = [-1] + separators + [len(inner)]
+        items = [inner[low + 1:high].strip() for low, high in zip(bounds, bounds[1:])]
+        if separators and not items[-1]:
+            items.pop()  # Trailing comma
+        return [_scalar(item, line) for item in items]
+    if text.startswith("{"):
+        if text == "{}":
+            return {}
+        raise YAMLSubsetError(f"unsupported flow mapping: {text}", line)
+    return text
+
+
+def parse_yaml(text: str) -> Any:
+    lines = []
+    for number, raw in enumerate(text.splitlines(), 1):
+        if raw.lstrip(" ").startswith("\t"):
+            raise YAMLSubsetError("tabs are not allowed for indentation", number)
+        content = _strip_comment(raw)
+        if content.strip() and content.strip() != "---":
+            lines.append([len(content) - len(content.lstrip(" ")), content.strip(), number])
+    if not lines:
+        return None
+    value, index = _parse_block(lines, 0, lines[0][0])
+    if index < len(lines):
+        raise YAMLSubsetError("unexpected indentation", lines[index][2])
+    return value
+
+
+def _parse_block(lines: List[list], index: int, indent: int) -> Tuple[Any, int]:
+    if lines[index][1].startswith("- ") or lines[index][1] == "-":
+        return _parse_sequence(lines, index, indent)
+    return _parse_mapping(lines, index, indent)
+
+
+def _parse_nested(lines: List[list], index: int, indent: int) -> Tuple[Any, int]:
+    """Value of a 'key:' or '-' with nothing after it: a deeper block, a same-level sequence, or null"""
+    if index < len(lines):
+        next_indent, next_text, _ = lines[index]
+        if next_indent > indent or (next_indent == indent and (next_text.startswith("- ") or next_text == "-")):
+            return _parse_block(lines, index, next_indent)
+    return None, index
+
+
+def _parse_sequence(lines: List[list], index: int, indent: int) -> Tuple[List, int]:
+    items = []
+    while index < len(lines) and lines[index][0] == indent and (lines[index][1].startswith("- ") or lines[index][1] == "-"):
+        _, text, number = lines[index]
+        content = text[1:].strip()
+        if not content:
+            value, index = _parse_nested(lines, index + 1, indent + 1)
+        elif _split_key(content) and not content.startswith(("'", '"', "[")):
+            # "- key: value" starts a mapping whose keys line up after the dash
+            lines[index] = [indent + 2, content, number]
+            value, index = _parse_mapping(lines, index, indent + 2)
+        else:
+            value, index = _scalar(content, number), index + 1
+        items.append(value)
+    return items, index
+
+
+def _parse_mapping(lines: List[list], index: int, indent: int) -> Tuple[Dict, int]:
+    mapping = {}
+    while index < len(lines) and lines[index][0] == indent:
+        _, text, number = lines[index]
+        if text.startswith("- ") or text == "-":
+            raise YAMLSubsetError("sequence item where a mapping key was expected", number)
+        entry = _split_key(text)
+        if not entry:
+            raise YAMLSubsetError(f"expected 'key: value', got: {text}", number)
+        key, rest = entry
+        if key in mapping:
+            raise YAMLSubsetError(f"duplicate key: {key}", number)
+        if rest:
+            mapping[key], index = _scalar(rest, number), index + 1
+        else:
+            mapping[key], index = _parse_nested(lines, index + 1, indent)
+    if index < len(lines) and lines[index][0] > indent:
+        raise YAMLSubsetError("unexpected indentation", lines[index][2])
+    return mapping, index
+
+
+def validate_compose(compose_file: Path = COMPOSE_FILE) -> Dict:
+    """Parse and sanity-check the compose file; returns {"services": n, "profiles": [...]}"""
+    compose_file = Path(compose_file)
+    if not compose_file.exists():
+        raise ComposeError(f"{compose_file} not found")
+    data = parse_yaml(compose_file.read_text())
+    if not isinstance(data, dict) or not isinstance(data.get("services"), dict):
+        raise ComposeError("no services defined")
+
+    declared_volumes = set(data.get("volumes") or {})
+    declared_networks = set(data.get("networks") or {})
+    containers, host_ports, profiles, problems = {}, {}, set(), []
+    for name, service in data["services"].items():
+        if not isinstance(service, dict):
+            problems.append(f"{name}: service definition must be a mapping")
+            continue
+        if "image" not in service and "build" not in service:
+            problems.append(f"{name}: needs 'image' or 'build'")
+        build = service.get("build")
+        context = build.get("context") if isinstance(build, dict) else build
+        if context and not (compose_file.parent / context).is_dir():
+            problems.append(f"{name}: build context {context} does not exist")
+        container = service.get("container_name")
+        if container:
+            if container in containers:
+                problems.append(f"{name}: container_name {container} also used by {containers[container]}")
+            containers[container] = name
+        for port in service.get("ports") or []:
+            host_port = str(port).rsplit(":", 1)[0] if ":" in str(port) else None
+            if host_port:
+                if host_port in host_ports:
+                    problems.append(f"{name}: host port {host_port} also published by {host_ports[host_port]}")
+                host_ports[host_port] = name
+        for volume in service.get("volumes") or []:
+            source = str(volume).split(":", 1)[0]
+            if ":" in str(volume) and not source.startswith((".", "/", "~", "$")) and source not in declared_volumes:
+                problems.append(f"{name}: volume {source} is not declared under top-level volumes")
+        networks = service.get("networks") or []
+        for network in (networks if isinstance(networks, list) else list(networks)):
+            if network not in declared_networks:
+                problems.append(f"{name}: network {network} is not declared under top-level networks")
+        profiles.update(service.get("profiles") or [])
+    if problems:
+        raise ComposeError("; ".join(problems))
+    return {"services": len(data["services"]), "profiles": sorted(profiles)}
+
+
+class CheckResult:
+    """Outcome and duration of one pre-flight check"""
+
+    def __init__(self, name: str, ok: bool, detail: str, seconds: float):
+        self.name = name
+        self.ok = ok
+        self.detail = detail
+        self.seconds = seconds
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "ok": self.ok, "detail": self.detail, "seconds": self.seconds}
+
+
+class PreflightReport:
+    """All check results plus whether they came from the session cache"""
+
+    def __init__(self, checks: List[CheckResult], elapsed: float, cached: bool = False):
+        self.checks = checks
+        self.elapsed = elapsed
+        self.cached = cached
+
+    @property
+    def ok(self) -> bool:
+        return all(check.ok for check in self.checks)
+
+    def check(self, name: str) -> Optional[CheckResult]:
+        return next((check for check in self.checks if check.name == name), None)
+
+    def timing(self) -> str:
+        """One-line timing breakdown, flagging slow checks"""
+        parts = [f"{check.name} {check.seconds * 1000:.0f}ms" + (" (slow)" if check.seconds > SLOW_CHECK else "")
+                 for check in self.checks]
+        source = "cached" if self.cached else "total"
+        return f"Pre-flight {self.elapsed * 1000:.0f}ms {source}: " + ", ".join(parts)
+
+
+def check_daemon() -> Tuple[bool, str]:
+    """One _ping + version over the API socket; `docker version` only when no socket is reachable"""
+    client = get_client()
+    if client:
+        try:
+            version = client.version()
+            return True, f"Docker Engine {version.get('Version', '?')} (API {version.get('ApiVersion', '?')})"
+        except (DockerAPIError, OSError) as e:
+            return False, f"Docker daemon error: {e}"
+    if not shutil.which("docker"):
+        return False, "Docker is not installed or not in PATH"
+    try:
+        result = subprocess.run(["docker", "version", "--format", "{{.Server.Version}}"],
+                                capture_output=True, text=True, timeout=10)
+    except subprocess.TimeoutExpired:
+        return False, "Docker daemon did not answer within 10s"
+    if result.returncode != 0:
+        return False, "Docker daemon is not running"
+    return True, f"Docker Engine {result.stdout.strip()}"
+
+
+def check_tools() -> Tuple[bool, str]:
+    """Docker CLI and a compose implementation on PATH (no processes spawned)"""
+    if not shutil.which("docker"):
+        return False, "docker CLI not found in PATH"
+    found = []
+    plugin_names = ("docker-compose", "docker-compose.exe")
+    if any(Path(os.path.expanduser(directory), name).exists()
+           for directory in COMPOSE_PLUGIN_DIRS for name in plugin_names):
+        found.append("docker compose")
+    if shutil.which("docker-compose"):
+        found.append("docker-compose")
+    if not found:
+        return False, "neither 'docker compose' nor docker-compose found"
+    return True, "docker CLI, " + " and ".join(found)
+
+
+def compose_config_check(compose_file: Path) -> Tuple[bool, str]:
+    """`docker compose config -q` (or docker-compose), for files the subset parser cannot read"""
+    for command in (["docker", "compose"], ["docker-compose"]):
+        if not shutil.which(command[0]):
+            continue
+        try:
+            result = subprocess.run(command + ["-f", str(compose_file), "config", "-q"],
+                                    capture_output=True, text=True, timeout=30)
+        except (subprocess.TimeoutExpired, OSError):
+            continue
+        if result.returncode == 0:
+            return True, f"docker-compose.yml valid (checked by {' '.join(command)} config)"
+        error = (result.stderr or result.stdout).strip()
+        if command == ["docker", "compose"] and "compose" in error and "is not a docker command" in error:
+            continue  # No compose plugin; try the standalone binary
+        return False, f"docker-compose.yml: {error.splitlines()[-1] if error else 'invalid'}"
+    return False, "docker-compose.yml: cannot validate (no compose implementation found)"
+
+
+def check_compose(compose_file: Path) -> Tuple[bool, str]:
+    try:
+        info = validate_compose(compose_file)
+    except YAMLSubsetError:
+        return compose_config_check(compose_file)
+    except (ComposeError, OSError) as e:
+        return False, f"docker-compose.yml: {e}"
+    return True, f"docker-compose.yml valid ({info['services']} services, {len(info['profiles'])} profiles)"
+
+
+def _cache_key(compose_file: Path) -> str:
+    try:
+        mtime = compose_file.stat().st_mtime_ns
+    except OSError:
+        mtime = 0
+    return f"{compose_file}|{mtime}|{os.environ.get('DOCKER_HOST', '')}"
+
+
+# Passing tools and compose results; the daemon is never cached
+_session: Dict[str, List[CheckResult]] = {}
+
+
+def _timed(name: str, check, *args) -> CheckResult:
+    check_start = time.time()
+    ok, detail = check(*args)
+    return CheckResult(name, ok, detail, time.time() - check_start)
+
+
+def _cached_checks(key: str) -> Optional[List[CheckResult]]:
+    if key in _session:
+        return _session[key]
+    try:
+        entry = json.loads(CACHE_FILE.read_text())
+        if entry.get("key") == key and time.time() - entry["timestamp"] < CACHE_TTL:
+            checks = _session[key] = [CheckResult(**check) for check in entry["checks"]
+                                      if check["name"] != "daemon"]
+            return checks
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def run_preflight(compose_file: Path = COMPOSE_FILE, use_cache: bool = True) -> PreflightReport:
+    """Run all checks concurrently.
+
+    The daemon is pinged on every call, since it can stop at any time; passing
+    tools and compose results are reused in-process and for CACHE_TTL on disk.
+    """
+    compose_file = Path(compose_file).resolve()
+    key = _cache_key(compose_file)
+    start = time.time()
+    cached = _cached_checks(key) if use_cache else None
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(_timed, "daemon", check_daemon)]
+        if cached is None:
+            futures += [pool.submit(_timed, "tools", check_tools),
+                        pool.submit(_timed, "compose", check_compose, compose_file)]
+        checks = [future.result() for future in futures] + (cached or [])
+    report = PreflightReport(checks, time.time() - start, cached=cached is not None)
+
+    fresh = checks[1:]
+    if cached is None and all(check.ok for check in fresh):
+        _session[key] = fresh
+        try:
+            CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            CACHE_FILE.write_text(json.dumps({"key": key, "timestamp": time.time(),
+                                              "checks": [check.to_dict() for check in fresh]}))
+        except OSError:
+            pass
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast Docker environment pre-flight checks")
+    parser.add_argument("--compose-file", default=str(COMPOSE_FILE))
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the session cache")
+    parser.add_argument("--json", action="store_true", help="Machine-readable output")
+    args = parser.parse_args()
+
+    report = run_preflight(Path(args.compose_file), use_cache=not args.no_cache)
+    if args.json:
+        print(json.dumps({"ok": report.ok, "cached": report.cached, "elapsed": report.elapsed,
+                          "checks": [check.to_dict() for check in report.checks]}, indent=2))
+    else:
+        for check in report.checks:
+            print(f"{'OK  ' if check.ok else 'FAIL'} {check.name:<8} {check.detail}")
+        print(report.timing())
+    sys.exit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
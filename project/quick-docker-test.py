@@ -5,6 +5,8 @@ Quick Docker Test - Simple verification script
 import os
 import subprocess
 
+from preflight import run_preflight
+
 def run_cmd(cmd):
     """Run command and return output"""
     try:
@@ -17,47 +19,22 @@ def main():
     print("🧪 Quick Docker Test")
     print("=" * 30)
     
-    # Test 1: Docker version
-    print("\n1. Testing Docker installation...")
-    success, output, error = run_cmd("docker --version")
-    if success:
-        print(f"✅ Docker found: {output}")
-    else:
-        print(f"❌ Docker not found: {error}")
+    # Tests 1-3: Docker CLI, daemon and Compose, checked concurrently in one pre-flight run
+    print("\n1. Testing Docker installation, daemon and Compose...")
+    report = run_preflight(use_cache=False)
+    for name in ("tools", "daemon"):
+        check = report.check(name)
+        print(f"{'✅' if check.ok else '❌'} {check.detail}")
+    print(f"⏱️  {report.timing()}")
+    if not report.check("daemon").ok:
         return
     
-    # Test 2: Docker daemon
-    print("\n2. Testing Docker daemon...")
-    success, output, error = run_cmd("docker info")
-    if success:
-        print("✅ Docker daemon is running")
-    else:
-        print(f"❌ Docker daemon issue: {error}")
-        return
+    # Test 2: Check project structure
+    print("\n2. Checking project structure...")
     
-    # Test 3: Docker Compose
-    print("\n3. Testing Docker Compose...")
-    success, output, error = run_cmd("docker-compose --version")
-    if success:
-        print(f"✅ Docker Compose found: {output}")
-    else:
-        print(f"❌ Docker Compose issue: {error}")
-    
-    # Test 4: Check project structure
-    print("\n4. Checking project structure...")
-    
-    # Check for docker-compose.yml
-    if os.path.exists("docker-compose.yml"):
-        print("✅ docker-compose.yml found")
-        
-        # Validate syntax
-        success, output, error = run_cmd("docker-compose config --quiet")
-        if success:
-            print("✅ docker-compose.yml syntax is valid")
-        else:
-            print(f"❌ docker-compose.yml has errors: {error}")
-    else:
-        print("❌ docker-compose.yml not found")
+    # docker-compose.yml was validated in-process by the pre-flight run
+    compose = report.check("compose")
+    print(f"{'✅' if compose.ok else '❌'} {compose.detail}")
     
     # Check for distros directory
     if os.path.exists("project/distros"):
@@ -74,8 +51,8 @@ def main():
     else:
         print("❌ project/distros directory not found")
     
-    # Test 5: List existing images
-    print("\n5. Checking existing Docker images...")
+    # Test 3: List existing images
+    print("\n3. Checking existing Docker images...")
     success, output, error = run_cmd("docker images --format 'table {{.Repository}}\t{{.Tag}}\t{{.Size}}'")
     if success and output:
         print("✅ Existing Docker images:")
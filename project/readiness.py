@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Container Readiness Detection
+Waits for a VPS container to become usable instead of sleeping a fixed time:
+container start/health events from the Engine API, then an SSH banner probe
+on the published port with adaptive backoff, all bounded by one deadline.
+"""
+
+import json
+import socket
+import subprocess
+import time
+from typing import Optional
+
+from docker_api import DockerAPIError, get_client
+
+SSH_BANNER_PREFIXES = (b"SSH-2.0", b"SSH-1.99")
+
+
+class ReadinessResult:
+    """Outcome of a readiness wait"""
+
+    def __init__(self, ready: bool, elapsed: float, stage: str, detail: str = ""):
+        self.ready = ready
+        self.elapsed = elapsed
+        self.stage = stage  # "container" or "ssh"
+        self.detail = detail
+
+    def __bool__(self):
+        return self.ready
+
+    def __repr__(self):
+        return f"ReadinessResult(ready={self.ready}, elapsed={self.elapsed:.2f}, stage={self.stage!r}, detail={self.detail!r})"
+
+
+def backoff_delays(initial: float = 0.1, factor: float = 1.6, maximum: float = 2.0):
+    """Yield exponentially growing delays capped at maximum"""
+    delay = initial
+    while True:
+        yield delay
+        delay = min(delay * factor, maximum)
+
+
+def read_ssh_banner(host: str, port: int, timeout: float = 2.0) -> Optional[bytes]:
+    """Connect and return the server identification line, or None if none arrived.
+
+    Docker's port proxy accepts connections before sshd listens, so a bare TCP
+    connect is not enough; only a real SSH banner counts.
+    """
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            sock.settimeout(timeout)
+            data = b""
+            while b"\n" not in data and len(data) < 255:
+                chunk = sock.recv(255)
+                if not chunk:
+                    break
+                data += chunk
+            line = data.split(b"\n", 1)[0].rstrip(b"\r")
+            return line or None
+    except OSError:
+        return None
+
+
+def _container_state_cli(container: str) -> Optional[dict]:
+    """Fetch container State via the docker CLI"""
+    try:
+        result = subprocess.run(["docker", "inspect", "--format", "{{json .State}}", container],
+                                capture_output=True, text=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)
+    except ValueError:
+        return None
+
+
+def _state_verdict(state: Optional[dict]) -> Optional[str]:
+    """Map a container State to 'ready', 'failed' or None (still waiting)"""
+    if not state:
+        return None
+    if state.get("Running"):
+        health = (state.get("Health") or {}).get("Status")
+        if health == "unhealthy":
+            return "failed"
+        if health in (None, "healthy"):
+            return "ready"
+        return None
+    if state.get("Status") in ("exited", "dead"):
+        return "failed"
+    return None
+
+
+def wait_for_container(container: str, deadline: float, since: float) -> ReadinessResult:
+    """Wait until the container is running (and healthy, if it has a healthcheck)"""
+    start = time.time()
+    client = get_client()
+
+    if client:
+        try:
+            info = client.inspect_container(container)
+            verdict = _state_verdict(info and info.get("State"))
+            if verdict:
+                return ReadinessResult(verdict == "ready", time.time() - start, "container", "state")
+
+            # Replay from `since` so an event fired between inspect and subscribe is not lost
+            filters = {"type": ["container"], "container": [container],
+                       "event": ["start", "health_status", "die"]}
+            for event in client.events(filters=filters, since=since, until=deadline,
+                                       timeout=max(deadline - time.time(), 0.1)):
+                action = event.get("Action") or event.get("status") or ""
+                if action == "die":
+                    return ReadinessResult(False, time.time() - start, "container", "container exited")
+                if action.startswith("health_status"):
+                    status = action.split(":", 1)[-1].strip()
+                    if status in ("healthy", "unhealthy"):
+                        return ReadinessResult(status == "healthy", time.time() - start, "container", action)
+                if action == "start":
+                    info = client.inspect_container(container)
+                    verdict = _state_verdict(info and info.get("State"))
+                    if verdict:
+                        return ReadinessResult(verdict == "ready", time.time() - start, "container", "start event")
+                if time.time() >= deadline:
+                    break
+            return ReadinessResult(False, time.time() - start, "container", "timed out waiting for start")
+        except (DockerAPIError, OSError):
+            pass  # Fall through to CLI polling
+
+    for delay in backoff_delays(initial=0.25):
+        verdict = _state_verdict(_container_state_cli(container))
+        if verdict:
+            return ReadinessResult(verdict == "ready", time.time() - start, "container", "state")
+        if time.time() + delay >= deadline:
+            return ReadinessResult(False, time.time() - start, "container", "timed out waiting for start")
+        time.sleep(delay)
+
+
+def wait_for_ssh(port: int, deadline: float, host: str = "127.0.0.1") -> ReadinessResult:
+    """Probe the SSH port until a real SSH banner arrives or the deadline passes"""
+    start = time.time()
+    for delay in backoff_delays():
+        remaining = deadline - time.time()
+        banner = read_ssh_banner(host, port, timeout=max(min(remaining, 2.0), 0.1))
+        if banner and banner.startswith(SSH_BANNER_PREFIXES):
+            return ReadinessResult(True, time.time() - start, "ssh", banner.decode(errors="replace"))
+        if time.time() + delay >= deadline:
+            detail = f"no SSH banner on port {port}" if not banner else f"unexpected banner {banner[:40]!r}"
+            return ReadinessResult(False, time.time() - start, "ssh", detail)
+        time.sleep(delay)
+
+
+def wait_for_vps_ready(container: str, port: int, timeout: float = 120,
+                       host: str = "127.0.0.1") -> ReadinessResult:
+    """Return as soon as the container is running and sshd answers with a banner"""
+    start = time.time()
+    deadline = start + timeout
+
+    result = wait_for_container(container, deadline, since=start - 1)
+    if not result.ready:
+        result.elapsed = time.time() - start
+        return result
+
+    result = wait_for_ssh(port, deadline, host=host)
+    result.elapsed = time.time() - start
+    return result
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Snapshot Metadata Index
+SQLite index of every known snapshot (store snapshots and legacy snapshot
+volumes), written when a snapshot is created so listing, filtering and
+restore selection are single indexed queries instead of volume scans.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    distro        TEXT NOT NULL,
+    name          TEXT NOT NULL,
+    created_at    TEXT NOT NULL,
+    source_volume TEXT NOT NULL DEFAULT '',
+    size          INTEGER NOT NULL DEFAULT -1,
+    file_count    INTEGER NOT NULL DEFAULT -1,
+    content_hash  TEXT NOT NULL DEFAULT '',
+    kind          TEXT NOT NULL DEFAULT 'store',
+    location      TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (distro, name)
+);
+CREATE INDEX IF NOT EXISTS snapshots_by_created ON snapshots (distro, created_at);
+CREATE INDEX IF NOT EXISTS snapshots_by_size ON snapshots (distro, size);
+"""
+
+COLUMNS = ("distro", "name", "created_at", "source_volume", "size", "file_count",
+           "content_hash", "kind", "location")
+INSERT_SQL = (f"INSERT OR REPLACE INTO snapshots ({', '.join(COLUMNS)}) "
+              f"VALUES ({', '.join('?' for _ in COLUMNS)})")
+SORT_COLUMNS = {"created": "created_at", "size": "size", "name": "name"}
+
+# Snapshot kinds
+KIND_STORE = "store"    # Manifest in the deduplicated chunk store
+KIND_VOLUME = "volume"  # Legacy <distro>-snapshot-<name> volume
+
+
+def _row(snapshot: Dict) -> Tuple:
+    """Column tuple for a snapshot dict, defaulting missing fields"""
+    return tuple(snapshot.get(column, -1 if column in ("size", "file_count") else "") for column in COLUMNS)
+
+
+def parse_size(text: str) -> int:
+    """Parse sizes like '512', '200K', '1.5G' into bytes"""
+    text = text.strip().upper().rstrip("B")
+    multipliers = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    if text and text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(float(text))
+
+
+class SnapshotIndex:
+    """SQLite-backed snapshot metadata index"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def record(self, snapshot: Dict) -> None:
+        """Insert or replace one snapshot row"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(INSERT_SQL, _row(snapshot))
+            conn.commit()
+
+    def remove(self, distro: str, name: str) -> bool:
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute("DELETE FROM snapshots WHERE distro = ? AND name = ?", (distro, name))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def get(self, distro: str, name: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT * FROM snapshots WHERE distro = ? AND name = ?", (distro, name)).fetchone()
+        return dict(row) if row else None
+
+    def query(self, distro: Optional[str] = None, kind: Optional[str] = None,
+              max_age_days: Optional[float] = None, min_size: Optional[int] = None,
+              max_size: Optional[int] = None, sort: str = "created",
+              descending: bool = False) -> List[Dict]:
+        """Filter and sort snapshots in one indexed query"""
+        clauses, params = [], []
+        if distro:
+            clauses.append("distro = ?")
+            params.append(distro)
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if max_age_days is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+            clauses.append("created_at >= ?")
+            params.append(cutoff.isoformat(timespec="seconds"))
+        if min_size is not None:
+            clauses.append("size >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            clauses.append("size >= 0 AND size <= ?")
+            params.append(max_size)
+
+        sql = "SELECT * FROM snapshots"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {SORT_COLUMNS.get(sort, 'created_at')} {'DESC' if descending else 'ASC'}, name"
+        with self._lock:
+            rows = self._connection().execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def rebuild(self, snapshots: Iterable[Dict]) -> Tuple[int, int, int]:
+        """Replace the index contents with `snapshots`; return (added, removed, kept)"""
+        snapshots = list(snapshots)
+        with self._lock:
+            conn = self._connection()
+            before = {(row["distro"], row["name"]) for row in conn.execute("SELECT distro, name FROM snapshots")}
+            after = {(s["distro"], s["name"]) for s in snapshots}
+            conn.execute("DELETE FROM snapshots")
+            conn.executemany(INSERT_SQL, [_row(s) for s in snapshots])
+            conn.commit()
+        return len(after - before), len(before - after), len(after & before)
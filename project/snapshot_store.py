@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Deduplicated Snapshot Store
+Content-addressed chunk store for VPS volume snapshots. Volume contents are
+streamed out of Docker as a tar archive, split into fixed-size chunks and
+stored once per unique SHA-256 on the host, so each new snapshot only writes
+chunks that changed and identical content is shared across snapshots and
+distributions.
+"""
+
+import os
+import re
+import sys
+import json
+import zlib
+import hashlib
+import tarfile
+import argparse
+import subprocess
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from snapshot_index import KIND_STORE, KIND_VOLUME, SnapshotIndex, parse_size
+
+STATE_DIR = Path(__file__).resolve().parent / ".vps-state"
+DEFAULT_STORE = STATE_DIR / "snapshots"
+CHUNK_SIZE = 1024 * 1024  # 1 MiB
+HELPER_IMAGE = "alpine"
+# Distribution keys and snapshot names become path components
+SAFE_NAME = re.compile(r"[A-Za-z0-9._-]+")
+
+
+class SnapshotStoreError(Exception):
+    """Raised when a snapshot cannot be created or restored"""
+
+
+def format_size(size: float) -> str:
+    """Human readable byte count"""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+
+
+def validate_name(name: str, what: str = "snapshot name") -> str:
+    """Reject names that could leave the manifests directory (slashes, '..', etc.)"""
+    if not isinstance(name, str) or not SAFE_NAME.fullmatch(name) or set(name) == {"."}:
+        raise SnapshotStoreError(f"Invalid {what} {name!r}: use letters, digits, '.', '_' and '-'")
+    return name
+
+
+def _read_stderr(stderr_file) -> str:
+    stderr_file.seek(0)
+    return stderr_file.read().decode(errors="replace").strip()
+
+
+def legacy_volume_snapshots(volumes: Iterable[Dict]) -> List[Dict]:
+    """Index rows for legacy <distro>-snapshot-<name> volumes"""
+    rows = []
+    for volume in volumes:
+        if "-snapshot-" not in volume["Name"]:
+            continue
+        distro_key, name = volume["Name"].split("-snapshot-", 1)
+        rows.append({
+            "distro": distro_key,
+            "name": name,
+            "created_at": volume.get("CreatedAt") or "",
+            "size": volume.get("Size", -1),
+            "kind": KIND_VOLUME,
+            "location": volume["Name"],
+        })
+    return rows
+
+
+class _ChunkReader:
+    """File-like object that reads a file's content back from its chunk list"""
+
+    def __init__(self, store: "SnapshotStore", chunks: List[str]):
+        self.store = store
+        self.chunks = iter(chunks)
+        self.buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self.buffer) < size:
+            digest = next(self.chunks, None)
+            if digest is None:
+                break
+            self.buffer += self.store.read_chunk(digest)
+        if size < 0:
+            data, self.buffer = self.buffer, b""
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+class SnapshotStore:
+    """Content-addressed snapshot storage on the host"""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else DEFAULT_STORE
+        self.objects_dir = self.root / "objects"
+        self.manifests_dir = self.root / "manifests"
+        self.index = SnapshotIndex(self.root / "index.db")
+
+    # Chunk objects
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def write_chunk(self, data: bytes) -> Tuple[str, bool]:
+        """Store a chunk and return (digest, newly_written)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if path.exists():
+            return digest, False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(zlib.compress(data, 1))
+        os.replace(tmp_path, path)
+        return digest, True
+
+    def read_chunk(self, digest: str) -> bytes:
+        try:
+            with open(self._object_path(digest), "rb") as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error) as e:
+            raise SnapshotStoreError(f"Chunk {digest[:12]} is missing or corrupt: {e}")
+
+    # Manifests
+
+    def _manifest_path(self, distro_key: str, name: str) -> Path:
+        return self.manifests_dir / validate_name(distro_key, "distribution") / f"{validate_name(name)}.json"
+
+    def has_snapshot(self, distro_key: str, name: str) -> bool:
+        try:
+            return self._manifest_path(distro_key, name).exists()
+        except SnapshotStoreError:
+            return False
+
+    def load_manifest(self, distro_key: str, name: str) -> Dict:
+        path = self._manifest_path(distro_key, name)
+        if not path.exists():
+            raise SnapshotStoreError(f"Snapshot '{name}' not found for {distro_key}")
+        with open(path) as f:
+            return json.load(f)
+
+    def list_snapshots(self, distro_key: Optional[str] = None, **filters) -> List[Dict]:
+        """Return indexed snapshots (store and legacy volumes), oldest first.
+
+        Accepts the SnapshotIndex.query filters (kind, max_age_days, min_size,
+        max_size, sort, descending).
+        """
+        return self.index.query(distro=distro_key, **filters)
+
+    def scan_manifests(self) -> Iterator[Dict]:
+        """Yield index rows for every manifest on disk (slow; used to rebuild the index)"""
+        if not self.manifests_dir.exists():
+            return
+        for path in sorted(self.manifests_dir.glob("*/*.json")):
+            with open(path) as f:
+                manifest = json.load(f)
+            yield self._index_row(manifest, path)
+
+    @staticmethod
+    def _index_row(manifest: Dict, path: Path) -> Dict:
+        return {
+            "distro": manifest["distro"],
+            "name": manifest["name"],
+            "created_at": manifest["created_at"],
+            "source_volume": manifest["source_volume"],
+            "size": manifest["logical_size"],
+            "file_count": manifest["file_count"],
+            "content_hash": manifest["content_hash"],
+            "kind": KIND_STORE,
+            "location": str(path),
+        }
+
+    def reindex(self, volumes: Iterable[Dict] = (), retained: Iterable[Dict] = ()) -> Tuple[int, int, int]:
+        """Rebuild the index from manifests on disk plus snapshot volumes.
+
+        `volumes` are inventory volume dicts (Name, CreatedAt, Size); legacy
+        <distro>-snapshot-<name> volumes are indexed, as are `retained` rows
+        (e.g. pre-restore volumes) whose volume still exists.
+        Returns (added, removed, kept).
+        """
+        volumes = list(volumes)
+        existing = {volume["Name"] for volume in volumes}
+        rows = {(row["distro"], row["name"]): row for row in legacy_volume_snapshots(volumes)}
+        rows.update({(row["distro"], row["name"]): row for row in retained if row["location"] in existing})
+        # Store snapshots win over a legacy volume with the same name
+        rows.update({(row["distro"], row["name"]): row for row in self.scan_manifests()})
+        return self.index.rebuild(rows.values())
+
+    # Snapshot / restore
+
+    def _check_new(self, distro_key: str, name: str) -> None:
+        if self._manifest_path(distro_key, name).exists():
+            raise SnapshotStoreError(f"Snapshot '{name}' already exists for {distro_key}; delete it first")
+
+    def ingest_tar(self, stream, distro_key: str, name: str, source_volume: str, commit: bool = True) -> Dict:
+        """Chunk a tar stream into the store and write its manifest.
+
+        Existing snapshots are never replaced. With commit=False the manifest
+        is only returned; commit_manifest() writes it once the source succeeded.
+        """
+        self._check_new(distro_key, name)
+        entries = []
+        logical_size = 0
+        written_bytes = 0
+        new_chunks = 0
+        total_chunks = 0
+
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            for member in tar:
+                entry = {
+                    "path": member.name,
+                    "type": member.type.decode(),
+                    "mode": member.mode,
+                    "uid": member.uid,
+                    "gid": member.gid,
+                    "uname": member.uname,
+                    "gname": member.gname,
+                    "mtime": member.mtime,
+                }
+                if member.issym() or member.islnk():
+                    entry["linkname"] = member.linkname
+                if member.ischr() or member.isblk():
+                    entry["devmajor"] = member.devmajor
+                    entry["devminor"] = member.devminor
+                if member.pax_headers:
+                    entry["pax_headers"] = member.pax_headers
+                if member.isreg():
+                    chunks = []
+                    fileobj = tar.extractfile(member)
+                    while True:
+                        data = fileobj.read(CHUNK_SIZE)
+                        if not data:
+                            break
+                        digest, is_new = self.write_chunk(data)
+                        chunks.append(digest)
+                        total_chunks += 1
+                        if is_new:
+                            new_chunks += 1
+                            written_bytes += len(data)
+                    entry["size"] = member.size
+                    entry["chunks"] = chunks
+                    logical_size += member.size
+                entries.append(entry)
+
+        content_hash = hashlib.sha256(json.dumps(entries, sort_keys=True).encode()).hexdigest()
+        manifest = {
+            "distro": distro_key,
+            "name": name,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "source_volume": source_volume,
+            "logical_size": logical_size,
+            "file_count": sum(1 for e in entries if "chunks" in e),
+            "content_hash": content_hash,
+            "new_bytes": written_bytes,
+            "new_chunks": new_chunks,
+            "total_chunks": total_chunks,
+            "entries": entries,
+        }
+
+        if commit:
+            self.commit_manifest(manifest)
+        return manifest
+
+    def commit_manifest(self, manifest: Dict) -> None:
+        """Write a manifest from ingest_tar and index it"""
+        self._check_new(manifest["distro"], manifest["name"])
+        path = self._manifest_path(manifest["distro"], manifest["name"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+        self.index.record(self._index_row(manifest, path))
+
+    def iter_tarinfos(self, manifest: Dict) -> Iterator:
+        """Yield (TarInfo, fileobj) pairs that recreate a snapshot"""
+        for entry in manifest["entries"]:
+            info = tarfile.TarInfo(entry["path"])
+            info.type = entry["type"].encode()
+            info.mode = entry["mode"]
+            info.uid = entry["uid"]
+            info.gid = entry["gid"]
+            info.uname = entry["uname"]
+            info.gname = entry["gname"]
+            info.mtime = entry["mtime"]
+            info.linkname = entry.get("linkname", "")
+            info.devmajor = entry.get("devmajor", 0)
+            info.devminor = entry.get("devminor", 0)
+            info.pax_headers = entry.get("pax_headers", {})
+            fileobj = None
+            if "chunks" in entry:
+                info.size = entry["size"]
+                fileobj = _ChunkReader(self, entry["chunks"])
+            yield info, fileobj
+
+    def write_tar(self, manifest: Dict, stream) -> None:
+        """Write a snapshot as a tar stream"""
+        with tarfile.open(fileobj=stream, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            for info, fileobj in self.iter_tarinfos(manifest):
+                tar.addfile(info, fileobj)
+
+    def create_snapshot(self, distro_key: str, name: str, volume: str) -> Dict:
+        """Snapshot a Docker volume into the store"""
+        self._check_new(distro_key, name)  # Before starting the container
+        cmd = ["docker", "run", "--rm", "-v", f"{volume}:/source:ro", HELPER_IMAGE,
+               "tar", "-C", "/source", "-cf", "-", "."]
+        # stderr goes to a file: an undrained pipe would fill up and stall tar mid-stream
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+            try:
+                manifest = self.ingest_tar(process.stdout, distro_key, name, volume, commit=False)
+            except tarfile.TarError as e:
+                process.kill()
+                process.wait()
+                raise SnapshotStoreError(f"Failed to read volume {volume}: {e}")
+            finally:
+                process.stdout.close()
+            if process.wait() != 0:
+                raise SnapshotStoreError(f"Failed to read volume {volume}: {_read_stderr(stderr_file)}")
+        self.commit_manifest(manifest)
+        return manifest
+
+    def restore_snapshot(self, distro_key: str, name: str, volume: str) -> Dict:
+        """Write a stored snapshot into a (normally empty) Docker volume"""
+        manifest = self.load_manifest(distro_key, name)
+        helper = f"snapshot-restore-{uuid.uuid4().hex[:12]}"
+        cmd = ["docker", "run", "--rm", "-i", "--name", helper, "-v", f"{volume}:/target", HELPER_IMAGE,
+               "tar", "--numeric-owner", "-C", "/target", "-xpf", "-"]
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=stderr_file)
+            try:
+                self.write_tar(manifest, process.stdin)
+            except BrokenPipeError:
+                pass
+            except SnapshotStoreError:
+                # Unreadable chunk: stop tar before it finishes a partial restore
+                subprocess.run(["docker", "rm", "-f", helper], capture_output=True)
+                process.kill()
+                process.wait()
+                raise
+            finally:
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+            if process.wait() != 0:
+                raise SnapshotStoreError(f"Failed to restore into {volume}: {_read_stderr(stderr_file)}")
+        return manifest
+
+    # Maintenance
+
+    def delete_manifest(self, distro_key: str, name: str) -> bool:
+        self.index.remove(distro_key, name)
+        if not self.has_snapshot(distro_key, name):
+            return False
+        self._manifest_path(distro_key, name).unlink()
+        return True
+
+    def referenced_chunks(self) -> Set[str]:
+        referenced = set()
+        if not self.manifests_dir.exists():
+            return referenced
+        for path in self.manifests_dir.glob("*/*.json"):
+            with open(path) as f:
+                for entry in json.load(f)["entries"]:
+                    referenced.update(entry.get("chunks", ()))
+        return referenced
+
+    def garbage_collect(self) -> Tuple[int, int]:
+        """Delete chunks no manifest references; return (objects, bytes) freed"""
+        referenced = self.referenced_chunks()
+        freed_objects = 0
+        freed_bytes = 0
+        if not self.objects_dir.exists():
+            return freed_objects, freed_bytes
+        for path in self.objects_dir.glob("*/*"):
+            if path.name.startswith(".tmp-"):
+                continue
+            if path.parent.name + path.name not in referenced:
+                freed_bytes += path.stat().st_size
+                path.unlink()
+                freed_objects += 1
+        return freed_objects, freed_bytes
+
+    def stats(self) -> Dict:
+        """Report logical snapshot size against physical bytes on disk"""
+        snapshots = self.list_snapshots(kind=KIND_STORE)
+        logical = sum(s["size"] for s in snapshots)
+        physical = 0
+        objects = 0
+        if self.objects_dir.exists():
+            for path in self.objects_dir.glob("*/*"):
+                physical += path.stat().st_size
+                objects += 1
+        manifest_bytes = sum(p.stat().st_size for p in self.manifests_dir.glob("*/*.json")) \
+            if self.manifests_dir.exists() else 0
+        per_distro = {}
+        for s in snapshots:
+            distro = per_distro.setdefault(s["distro"], {"snapshots": 0, "logical_size": 0})
+            distro["snapshots"] += 1
+            distro["logical_size"] += s["size"]
+        return {
+            "snapshots": len(snapshots),
+            "objects": objects,
+            "logical_size": logical,
+            "physical_size": physical + manifest_bytes,
+            "dedup_ratio": logical / (physical + manifest_bytes) if physical + manifest_bytes else 0.0,
+            "per_distro": per_distro,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicated VPS snapshot store")
+    parser.add_argument("--store", help=f"Store directory (default: {DEFAULT_STORE})")
+    subparsers = parser.add_subparsers(dest='action', help='Available actions')
+
+    list_parser = subparsers.add_parser('list', help='List indexed snapshots')
+    list_parser.add_argument('distro', nargs='?', help='Only show this distribution')
+    list_parser.add_argument('--max-age', type=float, metavar='DAYS', help='Only snapshots newer than DAYS')
+    list_parser.add_argument('--min-size', type=parse_size, help='Minimum size (e.g. 100M)')
+    list_parser.add_argument('--max-size', type=parse_size, help='Maximum size (e.g. 2G)')
+    list_parser.add_argument('--sort', choices=['created', 'size', 'name'], default='created')
+    list_parser.add_argument('--desc', action='store_true', help='Sort descending')
+
+    subparsers.add_parser('reindex', help='Rebuild the index from manifests and snapshot volumes')
+
+    subparsers.add_parser('stats', help='Show logical vs. physical store size')
+
+    delete_parser = subparsers.add_parser('delete', help='Delete a snapshot, free unshared chunks and unused volumes')
+    delete_parser.add_argument('distro')
+    delete_parser.add_argument('name')
+
+    subparsers.add_parser('gc', help='Remove chunks no snapshot references')
+
+    args = parser.parse_args()
+    store = SnapshotStore(args.store)
+    if args.action in ('list', 'stats') and not store.index.exists:
+        store.reindex()
+
+    if args.action == 'list':
+        snapshots = store.list_snapshots(args.distro, max_age_days=args.max_age, min_size=args.min_size,
+                                         max_size=args.max_size, sort=args.sort, descending=args.desc)
+        for s in snapshots:
+            size = format_size(s['size']) if s['size'] >= 0 else "?"
+            files = f"{s['file_count']} files" if s['file_count'] >= 0 else ""
+            print(f"{s['distro']:<12} {s['name']:<24} {s['created_at']:<26} {size:>10}  {s['kind']:<7} {files}")
+    elif args.action == 'reindex':
+        from inventory import Inventory
+        from volume_state import VolumeState
+        added, removed, kept = store.reindex(Inventory.fetch(images=False).volumes_with_sizes(), VolumeState().retained())
+        print(f"Index rebuilt: {added} added, {removed} removed, {kept} unchanged")
+    elif args.action == 'stats':
+        stats = store.stats()
+        print(f"Snapshots:      {stats['snapshots']}")
+        print(f"Chunk objects:  {stats['objects']}")
+        print(f"Logical size:   {format_size(stats['logical_size'])}")
+        print(f"Physical size:  {format_size(stats['physical_size'])}")
+        print(f"Dedup ratio:    {stats['dedup_ratio']:.2f}x")
+        for distro, info in sorted(stats["per_distro"].items()):
+            print(f"  {distro:<12} {info['snapshots']} snapshots, {format_size(info['logical_size'])} logical")
+    elif args.action == 'delete':
+        from family_registry import REGISTRY
+        from volume_cleanup import forget_snapshot, prune_volumes
+        from volume_state import VolumeState
+        state = VolumeState()
+        row = store.index.get(args.distro, args.name)
+        # Volume snapshots (legacy and pre-restore) have no manifest, only their volume
+        volume = forget_snapshot(args.distro, args.name, state, store.index) \
+            if row and row["kind"] == KIND_VOLUME else None
+        if not store.delete_manifest(args.distro, args.name) and not volume:
+            print(f"Snapshot '{args.name}' not found for {args.distro}")
+            sys.exit(1)
+        objects, freed = store.garbage_collect()
+        distro = REGISTRY.distribution(args.distro) or {}
+        removed = prune_volumes(args.distro, distro.get("volume", ""), state, store, [volume] if volume else [])
+        print(f"Deleted {args.distro}/{args.name}; freed {objects} chunks ({format_size(freed)}), "
+              f"removed {len(removed)} volume(s)")
+    elif args.action == 'gc':
+        objects, freed = store.garbage_collect()
+        print(f"Freed {objects} chunks ({format_size(freed)})")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
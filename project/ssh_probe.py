@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+SSH Handshake Latency Probe
+Opens TCP connections to each distribution's published SSH port and times
+the connect and the server banner; with paramiko installed it can also time
+key exchange and password authentication as the family's SSH user. Repeats
+N times per distribution and reports p50/p95/p99 for each phase. Works the
+same on every image, systemd or not, since it only talks to the port.
+"""
+
+import sys
+import json
+import time
+import socket
+import argparse
+from typing import Dict, List, Optional
+
+from family_registry import DISTRIBUTIONS, REGISTRY
+from readiness import SSH_BANNER_PREFIXES
+
+try:
+    import paramiko
+except ImportError:
+    paramiko = None
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_ITERATIONS = 10
+PHASES = ("connect", "banner", "kex", "auth")
+PERCENTILES = (50, 95, 99)
+
+
+class ProbeSample:
+    """Latencies of one connection attempt, in seconds per completed phase"""
+
+    def __init__(self):
+        self.latencies: Dict[str, float] = {}
+        self.banner = ""
+        self.error = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Linearly interpolated percentile (None for no values)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _peek_banner(sock: socket.socket) -> bytes:
+    """Wait for the identification line without consuming it, so paramiko can still read it"""
+    deadline = time.perf_counter() + (sock.gettimeout() or DEFAULT_TIMEOUT)
+    while True:
+        data = sock.recv(255, socket.MSG_PEEK)  # blocks only while nothing is buffered
+        if not data or b"\n" in data or len(data) >= 255:
+            break
+        if time.perf_counter() >= deadline:
+            raise socket.timeout("partial banner")
+        time.sleep(0.001)
+    return data.split(b"\n", 1)[0].rstrip(b"\r")
+
+
+def ssh_credentials(distro_key: str) -> Dict[str, str]:
+    """User and password from the distribution's family ssh_config"""
+    family = REGISTRY.family(REGISTRY.family_of(distro_key) or "") or {}
+    ssh_config = family.get("ssh_config") or {}
+    return {"user": ssh_config.get("user", "vpsuser"), "password": ssh_config.get("password", "vpsuser123")}
+
+
+def probe_once(port: int, host: str = DEFAULT_HOST, timeout: float = DEFAULT_TIMEOUT,
+               auth: bool = False, user: str = "vpsuser", password: str = "vpsuser123") -> ProbeSample:
+    """One connection: connect, banner and, with auth, key exchange and password auth"""
+    sample = ProbeSample()
+    start = time.perf_counter()
+    try:
+        sock = socket.create_connection((host, port), timeout=timeout)
+    except OSError as e:
+        sample.error = f"connect: {e}"
+        return sample
+    sample.latencies["connect"] = time.perf_counter() - start
+
+    try:
+        sock.settimeout(timeout)
+        start = time.perf_counter()
+        banner = _peek_banner(sock)
+        if not banner.startswith(SSH_BANNER_PREFIXES):
+            # Docker's port proxy accepts before sshd listens, then closes with no banner
+            sample.error = f"banner: {banner[:40]!r}" if banner else "banner: connection closed"
+            return sample
+        sample.latencies["banner"] = time.perf_counter() - start
+        sample.banner = banner.decode(errors="replace")
+        if auth:
+            _probe_auth(sock, sample, timeout, user, password)
+        return sample
+    except OSError as e:
+        sample.error = f"banner: {e}"
+        return sample
+    finally:
+        sock.close()
+
+
+def _probe_auth(sock: socket.socket, sample: ProbeSample, timeout: float, user: str, password: str) -> None:
+    """Key exchange and password auth through paramiko on the already connected socket"""
+    transport = paramiko.Transport(sock)
+    transport.banner_timeout = timeout
+    try:
+        start = time.perf_counter()
+        transport.start_client(timeout=timeout)
+        sample.latencies["kex"] = time.perf_counter() - start
+        start = time.perf_counter()
+        transport.auth_password(user, password)
+        sample.latencies["auth"] = time.perf_counter() - start
+    except paramiko.AuthenticationException:
+        sample.error = "auth: rejected"
+    except (paramiko.SSHException, OSError, EOFError) as e:
+        sample.error = f"{'auth' if 'kex' in sample.latencies else 'kex'}: {e}"
+    finally:
+        transport.close()
+
+
+class DistroProbe:
+    """All samples of one distribution"""
+
+    def __init__(self, distro_key: str, port: int):
+        self.distro_key = distro_key
+        self.port = port
+        self.samples: List[ProbeSample] = []
+
+    @property
+    def successes(self) -> int:
+        return sum(1 for sample in self.samples if sample.ok)
+
+    def phase_stats(self, phase: str) -> Dict[str, Optional[float]]:
+        values = [sample.latencies[phase] for sample in self.samples if sample.ok and phase in sample.latencies]
+        return {f"p{pct}": percentile(values, pct) for pct in PERCENTILES}
+
+    def errors(self) -> List[str]:
+        return sorted({sample.error for sample in self.samples if sample.error})
+
+    def to_dict(self) -> Dict:
+        phases = [phase for phase in PHASES if any(phase in sample.latencies for sample in self.samples)]
+        return {
+            "distro": self.distro_key,
+            "port": self.port,
+            "iterations": len(self.samples),
+            "successes": self.successes,
+            "banner": next((sample.banner for sample in self.samples if sample.banner), ""),
+            "latency_ms": {phase: {name: (round(value * 1000, 2) if value is not None else None)
+                                   for name, value in self.phase_stats(phase).items()}
+                           for phase in phases},
+            "errors": self.errors(),
+        }
+
+
+def probe_distro(distro_key: str, iterations: int = DEFAULT_ITERATIONS, host: str = DEFAULT_HOST,
+                 timeout: float = DEFAULT_TIMEOUT, auth: bool = False, interval: float = 0.0) -> DistroProbe:
+    distro = DISTRIBUTIONS[distro_key]
+    credentials = ssh_credentials(distro_key) if auth else {}
+    result = DistroProbe(distro_key, distro["port"])
+    for index in range(iterations):
+        if index and interval:
+            time.sleep(interval)
+        result.samples.append(probe_once(distro["port"], host, timeout, auth, **credentials))
+    return result
+
+
+def format_report(results: List[DistroProbe]) -> List[str]:
+    """One row per distribution and phase: success count and p50/p95/p99 in milliseconds"""
+    rows = [f"{'Distro':<12} {'Port':>5} {'OK':>7}  {'Phase':<8} {'p50':>9} {'p95':>9} {'p99':>9}"]
+    for result in results:
+        summary = result.to_dict()
+        ok = f"{result.successes}/{len(result.samples)}"
+        phases = summary["latency_ms"] or {"-": {f"p{pct}": None for pct in PERCENTILES}}
+        for index, (phase, stats) in enumerate(phases.items()):
+            cells = " ".join(f"{stats[f'p{pct}']:>7.1f}ms" if stats[f"p{pct}"] is not None else f"{'-':>9}"
+                             for pct in PERCENTILES)
+            lead = f"{result.distro_key:<12} {result.port:>5} {ok:>7}" if index == 0 else " " * 26
+            rows.append(f"{lead}  {phase:<8} {cells}")
+        for error in summary["errors"]:
+            rows.append(f"{'':<26}  ! {error}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure SSH connect, banner and auth latency per distribution")
+    parser.add_argument("distros", nargs="*", help="Distributions (default: all)")
+    parser.add_argument("-n", "--iterations", type=int, default=DEFAULT_ITERATIONS, help="Connections per distribution")
+    parser.add_argument("--auth", action="store_true", help="Also time key exchange and password auth (needs paramiko)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Host the SSH ports are published on")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Per-phase timeout in seconds")
+    parser.add_argument("--interval", type=float, default=0.0, help="Pause between connections in seconds")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    unknown = [key for key in args.distros if key not in DISTRIBUTIONS]
+    if unknown:
+        print(f"Unknown distribution(s): {', '.join(unknown)}")
+        sys.exit(1)
+    if args.auth and paramiko is None:
+        print("--auth needs paramiko (pip install paramiko)")
+        sys.exit(1)
+
+    results = [probe_distro(key, args.iterations, args.host, args.timeout, args.auth, args.interval)
+               for key in args.distros or list(DISTRIBUTIONS)]
+    if args.json:
+        print(json.dumps([result.to_dict() for result in results], indent=2))
+    else:
+        for line in format_report(results):
+            print(line)
+    sys.exit(0 if all(result.successes for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,23 @@ import sys
 import subprocess
 import json
 import time
+import asyncio
+import argparse
+from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
-# Import configuration from advanced-launcher
+from build_cache import service_image_names
+from family_registry import LINUX_FAMILIES
+from image_test_report import (build_report, load_report, merge_reports, parse_shard,
+                               shard_keys, write_json, write_junit)
+from inventory import Inventory
+from preflight import run_preflight
+from readiness import wait_for_vps_ready
+from ssh_probe import paramiko, probe_once, ssh_credentials
+
+# Import helpers from advanced-launcher
 try:
-    from advanced_launcher import LINUX_FAMILIES, Colors, run_command
+    from advanced_launcher import Colors, run_command
 except ImportError:
     # If import fails, define the essential components locally
     class Colors:
@@ -43,43 +55,7 @@ except ImportError:
             if not suppress_errors:
                 print(f"Error executing command: {e}")
             return False, str(e)
-    
-    # Define Linux families locally
-    LINUX_FAMILIES = {
-        "debian": {
-            "name": "Debian Family",
-            "distributions": {
-                "ubuntu": {"name": "Ubuntu 22.04 LTS", "container": "ubuntu-vps", "port": 2201},
-                "debian": {"name": "Debian 12 (Bookworm)", "container": "debian-vps", "port": 2202}
-            }
-        },
-        "redhat": {
-            "name": "Red Hat Family", 
-            "distributions": {
-                "rocky": {"name": "Rocky Linux 9", "container": "rocky-vps", "port": 2203},
-                "centos": {"name": "CentOS Stream 9", "container": "centos-vps", "port": 2204}
-            }
-        },
-        "alpine": {
-            "name": "Alpine Family",
-            "distributions": {
-                "alpine": {"name": "Alpine Linux 3.18", "container": "alpine-vps", "port": 2205}
-            }
-        },
-        "suse": {
-            "name": "SUSE Family",
-            "distributions": {
-                "opensuse": {"name": "openSUSE Leap 15.5", "container": "opensuse-vps", "port": 2206}
-            }
-        },
-        "arch": {
-            "name": "Arch Family",
-            "distributions": {
-                "arch": {"name": "Arch Linux", "container": "arch-vps", "port": 2207},
-                "slackware": {"name": "Slackware 15.0", "container": "slackware-vps", "port": 2208}
-            }
-        }
-    }
+
 
 class DockerImageTester:
     """Test and validate Docker images for VPS environments"""
@@ -87,6 +63,10 @@ class DockerImageTester:
     def __init__(self):
         self.test_results = {}
         self.failed_tests = []
+        self.inventory: Optional[Inventory] = None
+        self.image_freshness: Dict[str, bool] = {}
+        self.distro_failures: Dict[str, List[str]] = {}
+        self.durations: Dict[str, float] = {}
         
     def show_header(self):
         """Display testing header"""
@@ -101,61 +81,87 @@ class DockerImageTester:
         """Check if Docker is installed and running"""
         print(f"{Colors.YELLOW}🔍 Checking Docker installation...{Colors.RESET}")
         
-        # Check if Docker command exists
-        success, output = run_command("docker --version")
-        if not success:
-            print(f"{Colors.RED}❌ Docker is not installed or not in PATH{Colors.RESET}")
-            print(f"{Colors.GRAY}Please install Docker Desktop from https://docker.com{Colors.RESET}")
-            return False
-        
-        print(f"{Colors.GREEN}✅ Docker found: {output}{Colors.RESET}")
-        
-        # Check if Docker daemon is running
-        success, output = run_command("docker info")
-        if not success:
-            print(f"{Colors.RED}❌ Docker daemon is not running{Colors.RESET}")
-            print(f"{Colors.GRAY}Please start Docker Desktop{Colors.RESET}")
-            return False
-        
-        print(f"{Colors.GREEN}✅ Docker daemon is running{Colors.RESET}")
+        report = run_preflight()
+        for name in ("tools", "daemon"):
+            check = report.check(name)
+            if not check.ok:
+                print(f"{Colors.RED}❌ {check.detail}{Colors.RESET}")
+                print(f"{Colors.GRAY}Please install and start Docker Desktop from https://docker.com{Colors.RESET}")
+                return False
+            print(f"{Colors.GREEN}✅ {check.detail}{Colors.RESET}")
+        print(f"{Colors.GRAY}   {report.timing()}{Colors.RESET}")
         return True
 
     def check_docker_compose_file(self) -> bool:
         """Verify docker-compose.yml exists and is valid"""
         print(f"{Colors.YELLOW}🔍 Checking docker-compose.yml...{Colors.RESET}")
         
-        compose_file = "../docker-compose.yml"
-        if not os.path.exists(compose_file):
-            print(f"{Colors.RED}❌ docker-compose.yml not found at {compose_file}{Colors.RESET}")
+        # Validated in-process by the same (cached) pre-flight run
+        check = run_preflight().check("compose")
+        if not check.ok:
+            print(f"{Colors.RED}❌ {check.detail}{Colors.RESET}")
             return False
         
-        print(f"{Colors.GREEN}✅ docker-compose.yml found{Colors.RESET}")
-        
-        # Validate docker-compose syntax
-        success, output = run_command("docker-compose -f ../docker-compose.yml config --quiet")
-        if not success:
-            print(f"{Colors.RED}❌ docker-compose.yml has syntax errors:{Colors.RESET}")
-            print(f"{Colors.RED}{output}{Colors.RESET}")
+        print(f"{Colors.GREEN}✅ {check.detail}{Colors.RESET}")
+        return True
+
+    def image_inventory(self) -> Inventory:
+        """One bulk image listing per test run, shared by every existence and freshness check"""
+        if self.inventory is None:
+            self.inventory = Inventory.fetch(volumes=False, containers=False)
+        return self.inventory
+
+    @staticmethod
+    def context_mtime(dockerfile: str) -> float:
+        """Newest modification time in the build context (the Dockerfile's directory)"""
+        newest = 0.0
+        for root, _, files in os.walk(os.path.dirname(dockerfile)):
+            for name in files:
+                try:
+                    newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+                except OSError:
+                    continue
+        return newest
+
+    def check_image(self, distro_key: str, config: Dict, emit) -> bool:
+        """Look the image up in the shared listing and compare its age with the build context"""
+        emit(f"{Colors.YELLOW}🔍 Checking image: {config['name']}...{Colors.RESET}")
+        inventory = self.image_inventory()
+        ref = next((name for name in config["image_names"] if inventory.has_image(name)), None)
+        if not ref:
+            emit(f"{Colors.RED}❌ Image not found: {config['name']}{Colors.RESET}")
             return False
-        
-        print(f"{Colors.GREEN}✅ docker-compose.yml syntax is valid{Colors.RESET}")
+
+        image = inventory.image(ref)
+        emit(f"{Colors.GREEN}✅ Image exists: {config['name']}{Colors.RESET}")
+        emit(f"{Colors.GRAY}   Image: {ref} ({image['Id'].split(':', 1)[-1][:12]}){Colors.RESET}")
+        fresh = not image["Created"] or image["Created"] >= self.context_mtime(config["dockerfile"])
+        self.image_freshness[distro_key] = fresh
+        if not fresh:
+            built = time.strftime("%Y-%m-%d %H:%M", time.localtime(image["Created"]))
+            emit(f"{Colors.YELLOW}⚠️  Image built {built} is older than its build context; rebuild to pick up changes{Colors.RESET}")
         return True
 
-    def list_available_images(self) -> Dict[str, str]:
-        """List all available VPS image configurations"""
+    def list_available_images(self, distro_keys: Optional[List[str]] = None) -> Dict[str, str]:
+        """List all available VPS image configurations (optionally only the given distributions)"""
         print(f"{Colors.YELLOW}🔍 Scanning available VPS configurations...{Colors.RESET}")
         
         images = {}
         for family_key, family in LINUX_FAMILIES.items():
             for distro_key, distro in family["distributions"].items():
-                image_name = f"devcontainer_server_docker_{distro['container']}"
-                dockerfile_path = f"../distros/{distro_key}/Dockerfile"
+                if distro_keys is not None and distro_key not in distro_keys:
+                    continue
+                image_names = service_image_names(distro["service"])
+                dockerfile_path = os.path.join(distro["context_dir"], "Dockerfile")
                 
                 if os.path.exists(dockerfile_path):
                     images[distro_key] = {
                         "name": distro["name"],
                         "container": distro["container"],
-                        "image_name": image_name,
+                        "service": distro["service"],
+                        "profile": distro["profile"],
+                        "image_name": image_names[0],
+                        "image_names": image_names,
                         "dockerfile": dockerfile_path,
                         "port": distro["port"]
                     }
@@ -166,129 +172,153 @@ class DockerImageTester:
         print(f"{Colors.CYAN}Found {len(images)} available configurations{Colors.RESET}")
         return images
 
-    def test_image_build(self, distro_key: str, config: Dict) -> bool:
-        """Test building a specific Docker image"""
-        print(f"{Colors.YELLOW}🔨 Testing build: {config['name']}...{Colors.RESET}")
-        
-        # Build the image
-        build_cmd = f"docker-compose -f ../docker-compose.yml build {config['container']}"
-        print(f"{Colors.GRAY}Running: {build_cmd}{Colors.RESET}")
-        
-        success, output = run_command(build_cmd, capture_output=False)
-        
-        if success:
-            print(f"{Colors.GREEN}✅ Build successful: {config['name']}{Colors.RESET}")
-            return True
-        else:
-            print(f"{Colors.RED}❌ Build failed: {config['name']}{Colors.RESET}")
-            if output:
-                print(f"{Colors.RED}Error: {output}{Colors.RESET}")
-            self.failed_tests.append(f"Build failed for {config['name']}")
+    @staticmethod
+    def start_command(config: Dict) -> str:
+        """Start only this distribution's service, so concurrent tests leave each other alone"""
+        return f"docker-compose -f ../docker-compose.yml --profile {config['profile']} up -d --no-deps {config['service']}"
+
+    @staticmethod
+    def stop_command(config: Dict) -> str:
+        return f"docker-compose -f ../docker-compose.yml --profile {config['profile']} rm -s -f {config['service']}"
+
+    def check_ssh(self, distro_key: str, config: Dict, emit, failures: List[str]) -> bool:
+        """Connect to the published SSH port like a client would (logging in too when paramiko is installed)"""
+        emit(f"{Colors.YELLOW}🔑 Testing SSH connectivity...{Colors.RESET}")
+        auth = paramiko is not None
+        credentials = ssh_credentials(distro_key) if auth else {}
+        sample = probe_once(config["port"], auth=auth, **credentials)
+        if not sample.ok:
+            emit(f"{Colors.RED}❌ SSH check failed on port {config['port']}: {sample.error}{Colors.RESET}")
+            failures.append(f"SSH check failed for {config['name']}")
             return False
+        timings = ", ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in sample.latencies.items())
+        emit(f"{Colors.GREEN}✅ SSH {'login' if auth else 'banner'} OK: {sample.banner} ({timings}){Colors.RESET}")
+        return True
 
-    def test_image_exists(self, config: Dict) -> bool:
-        """Check if Docker image exists locally"""
-        print(f"{Colors.YELLOW}🔍 Checking image: {config['name']}...{Colors.RESET}")
-        
-        # Check if image exists (cross-platform approach)
-        success, output = run_command('docker images --format "{{.Repository}}:{{.Tag}}"')
-        
-        if success and config["image_name"] in output:
-            print(f"{Colors.GREEN}✅ Image exists: {config['name']}{Colors.RESET}")
-            print(f"{Colors.GRAY}   Image: {output}{Colors.RESET}")
+    # Serial and concurrent runs share one implementation: the coroutines below test each
+    # distribution, at most `parallel` at a time. A serial run prints as it goes and shows
+    # build output live; a concurrent run buffers each distribution's output and prints it
+    # as one block when the distribution finishes.
+
+    async def run_command_async(self, command: str, capture_output: bool = True) -> Tuple[bool, str]:
+        """Async counterpart of run_command"""
+        pipe = asyncio.subprocess.PIPE if capture_output else None
+        process = await asyncio.create_subprocess_shell(command, stdout=pipe, stderr=pipe)
+        stdout, stderr = await process.communicate()
+        success = process.returncode == 0
+        if not capture_output:
+            return success, ""
+        return success, (stdout if success else stderr).decode(errors="replace").strip()
+
+    async def test_image_build(self, config: Dict, emit, failures: List[str], live: bool = False) -> bool:
+        """Test building a specific Docker image"""
+        build_cmd = f"docker-compose -f ../docker-compose.yml build {config['service']}"
+        emit(f"{Colors.YELLOW}🔨 Testing build: {config['name']}...{Colors.RESET}")
+        emit(f"{Colors.GRAY}Running: {build_cmd}{Colors.RESET}")
+        success, output = await self.run_command_async(build_cmd, capture_output=not live)
+        if success:
+            emit(f"{Colors.GREEN}✅ Build successful: {config['name']}{Colors.RESET}")
             return True
-        else:
-            print(f"{Colors.RED}❌ Image not found: {config['name']}{Colors.RESET}")
-            return False
+        emit(f"{Colors.RED}❌ Build failed: {config['name']}{Colors.RESET}")
+        if output:
+            emit(f"{Colors.RED}Error: {output[-2000:]}{Colors.RESET}")
+        failures.append(f"Build failed for {config['name']}")
+        return False
 
-    def test_container_start(self, distro_key: str, config: Dict) -> bool:
+    async def test_container_start(self, distro_key: str, config: Dict, emit, failures: List[str]) -> bool:
         """Test starting and basic functionality of container"""
-        print(f"{Colors.YELLOW}🚀 Testing container start: {config['name']}...{Colors.RESET}")
-        
-        # Stop any existing container
-        run_command(f"docker-compose -f ../docker-compose.yml --profile {distro_key} down")
-        
-        # Start the container
-        success, output = run_command(f"docker-compose -f ../docker-compose.yml --profile {distro_key} up -d")
-        
+        emit(f"{Colors.YELLOW}🚀 Testing container start: {config['name']}...{Colors.RESET}")
+        await self.run_command_async(self.stop_command(config))
+        success, _ = await self.run_command_async(self.start_command(config))
+        if not success:
+            # Concurrent first starts can race to create the shared network; retry once
+            success, _ = await self.run_command_async(self.start_command(config))
         if not success:
-            print(f"{Colors.RED}❌ Failed to start container: {config['name']}{Colors.RESET}")
-            self.failed_tests.append(f"Container start failed for {config['name']}")
+            emit(f"{Colors.RED}❌ Failed to start container: {config['name']}{Colors.RESET}")
+            failures.append(f"Container start failed for {config['name']}")
             return False
-        
-        print(f"{Colors.GREEN}✅ Container started: {config['name']}{Colors.RESET}")
-        
-        # Wait for container to initialize
-        print(f"{Colors.GRAY}   Waiting for services to initialize...{Colors.RESET}")
-        time.sleep(15)
-        
-        # Test SSH connectivity
-        print(f"{Colors.YELLOW}🔑 Testing SSH connectivity...{Colors.RESET}")
-        ssh_test_cmd = f'docker exec {config["container"]} systemctl is-active sshd'
-        success, output = run_command(ssh_test_cmd)
-        
-        if success and "active" in output:
-            print(f"{Colors.GREEN}✅ SSH service is running{Colors.RESET}")
+        emit(f"{Colors.GREEN}✅ Container started: {config['name']}{Colors.RESET}")
+
+        # Readiness polling and the SSH probe block, so they run on the default thread pool
+        emit(f"{Colors.GRAY}   Waiting for services to initialize...{Colors.RESET}")
+        loop = asyncio.get_running_loop()
+        readiness = await loop.run_in_executor(None, wait_for_vps_ready, config["container"], config["port"])
+        if readiness.ready:
+            emit(f"{Colors.GRAY}   Ready after {readiness.elapsed:.1f}s{Colors.RESET}")
         else:
-            print(f"{Colors.YELLOW}⚠️  SSH service status unclear{Colors.RESET}")
-        
-        # Test if container is healthy
-        container_check_cmd = f'docker ps --filter "name={config["container"]}" --format "{{{{.Status}}}}"'
-        success, status = run_command(container_check_cmd)
-        
+            emit(f"{Colors.YELLOW}⚠️  Not ready after {readiness.elapsed:.1f}s: {readiness.detail}{Colors.RESET}")
+
+        ssh_ok = await loop.run_in_executor(None, self.check_ssh, distro_key, config, emit, failures)
+
+        success, status = await self.run_command_async(
+            f'docker ps --filter "name={config["container"]}" --format "{{{{.Status}}}}"')
         if success and status:
-            print(f"{Colors.GREEN}✅ Container status: {status}{Colors.RESET}")
-            
-            # Stop the test container
-            run_command(f"docker-compose -f ../docker-compose.yml --profile {distro_key} down")
-            return True
-        else:
-            print(f"{Colors.RED}❌ Container health check failed{Colors.RESET}")
-            self.failed_tests.append(f"Container health check failed for {config['name']}")
-            return False
+            emit(f"{Colors.GREEN}✅ Container status: {status}{Colors.RESET}")
+            await self.run_command_async(self.stop_command(config))
+            return ssh_ok
+        emit(f"{Colors.RED}❌ Container health check failed{Colors.RESET}")
+        failures.append(f"Container health check failed for {config['name']}")
+        return False
+
+    async def test_distro(self, distro_key: str, config: Dict, build_missing: bool,
+                          semaphore: asyncio.Semaphore, live: bool) -> Tuple[Dict, List[str], float]:
+        out = []
+        emit = print if live else out.append
+        failures = []
+        async with semaphore:
+            started = time.time()
+            if not live:
+                print(f"{Colors.GRAY}▶ {distro_key} started{Colors.RESET}", flush=True)
+            emit(f"{Colors.BOLD}{Colors.CYAN}Testing: {config['name']} ({distro_key}){Colors.RESET}")
+            emit(f"{Colors.CYAN}{'='*50}{Colors.RESET}")
+            image_exists = self.check_image(distro_key, config, emit)
+            if not image_exists and build_missing:
+                image_exists = await self.test_image_build(config, emit, failures, live)
+                if image_exists:
+                    self.image_freshness[distro_key] = True
+            container_test = await self.test_container_start(distro_key, config, emit, failures) if image_exists else False
+        result = {"name": config["name"], "image_exists": image_exists,
+                  "container_test": container_test, "overall": container_test}
+        seconds = time.time() - started
+        emit(f"{Colors.GRAY}   {distro_key} finished in {seconds:.1f}s{Colors.RESET}")
+        print("\n".join(out + [""]), flush=True)
+        return result, failures, seconds
+
+    def test_all_images(self, build_missing: bool = False, distro_keys: Optional[List[str]] = None,
+                        parallel: int = 1) -> None:
+        """Test all available images, at most `parallel` at a time.
 
-    def test_all_images(self, build_missing: bool = False) -> None:
-        """Test all available images"""
-        print(f"{Colors.CYAN}🧪 Running comprehensive image tests...{Colors.RESET}")
+        test_results and failed_tests are recorded in configuration order, so a
+        concurrent run leaves them exactly as a serial one would.
+        """
+        at_a_time = f" ({parallel} at a time)" if parallel > 1 else ""
+        print(f"{Colors.CYAN}🧪 Running comprehensive image tests{at_a_time}...{Colors.RESET}")
         print()
-        
-        images = self.list_available_images()
+
+        images = self.list_available_images(distro_keys)
         if not images:
             print(f"{Colors.RED}❌ No image configurations found{Colors.RESET}")
             return
-        
+        self.inventory = None
         print()
-        
-        for distro_key, config in images.items():
-            print(f"{Colors.BOLD}{Colors.CYAN}Testing: {config['name']} ({distro_key}){Colors.RESET}")
-            print(f"{Colors.CYAN}{'='*50}{Colors.RESET}")
-            
-            # Check if image exists
-            image_exists = self.test_image_exists(config)
-            
-            # Build if missing and requested
-            if not image_exists and build_missing:
-                build_success = self.test_image_build(distro_key, config)
-                if build_success:
-                    image_exists = True
-            
-            # Test container functionality if image exists
-            if image_exists:
-                container_test = self.test_container_start(distro_key, config)
-                self.test_results[distro_key] = {
-                    "name": config["name"],
-                    "image_exists": True,
-                    "container_test": container_test,
-                    "overall": container_test
-                }
-            else:
-                self.test_results[distro_key] = {
-                    "name": config["name"],
-                    "image_exists": False,
-                    "container_test": False,
-                    "overall": False
-                }
-            
+
+        self.image_inventory()  # fetched up front so the event loop never blocks on it
+
+        async def run_all():
+            semaphore = asyncio.Semaphore(max(1, parallel))
+            return await asyncio.gather(*(self.test_distro(distro_key, config, build_missing, semaphore,
+                                                           live=parallel <= 1)
+                                          for distro_key, config in images.items()))
+
+        started = time.time()
+        outcomes = asyncio.run(run_all())
+        for distro_key, (result, failures, seconds) in zip(images, outcomes):
+            self.test_results[distro_key] = result
+            self.failed_tests.extend(failures)
+            self.distro_failures[distro_key] = failures
+            self.durations[distro_key] = seconds
+        if parallel > 1:
+            print(f"{Colors.CYAN}Tested {len(images)} images in {time.time() - started:.1f}s{Colors.RESET}")
             print()
 
     def show_test_summary(self) -> None:
@@ -311,6 +341,8 @@ class DockerImageTester:
                 print(f"   {Colors.GRAY}└─ Image not built{Colors.RESET}")
             elif not result["container_test"]:
                 print(f"   {Colors.GRAY}└─ Container test failed{Colors.RESET}")
+            if self.image_freshness.get(distro_key) is False:
+                print(f"   {Colors.YELLOW}└─ Image is older than its build context{Colors.RESET}")
             
             if result["overall"]:
                 passed += 1
@@ -325,8 +357,103 @@ class DockerImageTester:
         
         print()
 
+def all_distro_keys() -> List[str]:
+    return [key for family in LINUX_FAMILIES.values() for key in family["distributions"]]
+
+
+def run_non_interactive(args) -> int:
+    """Test this shard's distributions without prompts; returns the exit code"""
+    tester = DockerImageTester()
+    if not (tester.check_docker_installed() and tester.check_docker_compose_file()):
+        return 1
+    print()
+
+    all_keys = all_distro_keys()
+    selected = shard_keys(all_keys, *args.shard) if args.shard else all_keys
+    if args.shard:
+        print(f"{Colors.CYAN}Shard {args.shard[0]}/{args.shard[1]}: {', '.join(selected) or 'nothing to test'}{Colors.RESET}")
+        print()
+    if selected:
+        tester.test_all_images(args.build_missing, distro_keys=selected, parallel=args.parallel or 1)
+    tester.show_test_summary()
+
+    report = build_report(tester.test_results, tester.distro_failures, tester.durations, tester.image_freshness,
+                          selected, all_keys, args.shard or (1, 1))
+    if args.json:
+        write_json(report, args.json)
+        print(f"{Colors.GRAY}JSON results written to {args.json}{Colors.RESET}")
+    if args.junit:
+        write_junit(report, args.junit)
+        print(f"{Colors.GRAY}JUnit results written to {args.junit}{Colors.RESET}")
+    return 0 if all(result["overall"] for result in tester.test_results.values()) else 1
+
+
+def run_merge(args) -> int:
+    """Combine shard JSON reports, print one summary and optionally write merged JSON/JUnit"""
+    try:
+        reports = [load_report(path) for path in args.reports]
+    except (OSError, ValueError) as e:
+        print(f"{Colors.RED}❌ {e}{Colors.RESET}")
+        return 1
+    merged, warnings = merge_reports(reports)
+    for warning in warnings:
+        print(f"{Colors.YELLOW}⚠️  {warning}{Colors.RESET}")
+
+    tester = DockerImageTester()
+    for distro_key, result in merged["results"].items():
+        tester.test_results[distro_key] = {key: result[key] for key in ("name", "image_exists", "container_test", "overall")}
+        tester.failed_tests.extend(result.get("failures", []))
+        if result.get("image_fresh") is not None:
+            tester.image_freshness[distro_key] = result["image_fresh"]
+    print(f"{Colors.CYAN}Merged {len(reports)} report(s) covering {len(merged['results'])}/{len(merged['all_distros'])} "
+          f"distributions{Colors.RESET}")
+    print()
+    tester.show_test_summary()
+    if merged["missing"]:
+        print(f"{Colors.RED}No results for: {', '.join(merged['missing'])}{Colors.RESET}")
+        print()
+
+    if args.json:
+        write_json(merged, args.json)
+        print(f"{Colors.GRAY}JSON results written to {args.json}{Colors.RESET}")
+    if args.junit:
+        write_junit(merged, args.junit)
+        print(f"{Colors.GRAY}JUnit results written to {args.junit}{Colors.RESET}")
+    passed = all(result["overall"] for result in merged["results"].values())
+    return 0 if passed and not merged["missing"] else 1
+
+
+def shard_argument(text: str):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
 def main():
     """Main testing function"""
+    parser = argparse.ArgumentParser(
+        description="Docker image testing and validation (interactive when run without options)")
+    parser.add_argument("--non-interactive", action="store_true",
+                        help="Test all images without prompts (implied by any option below)")
+    parser.add_argument("--parallel", type=int, metavar="N", help="Test N distributions at a time")
+    parser.add_argument("--build-missing", action="store_true", help="Build images that are missing before testing")
+    parser.add_argument("--shard", type=shard_argument, metavar="I/N",
+                        help="Only test the I-th of N deterministic slices of the distributions")
+    parser.add_argument("--json", type=Path, metavar="FILE", help="Write results as JSON")
+    parser.add_argument("--junit", type=Path, metavar="FILE", help="Write results as JUnit XML")
+    subparsers = parser.add_subparsers(dest="command")
+    merge_parser = subparsers.add_parser("merge", help="Combine shard JSON reports into one summary")
+    merge_parser.add_argument("reports", nargs="+", type=Path, help="JSON reports written with --json")
+    merge_parser.add_argument("--json", type=Path, metavar="FILE", help="Write the merged results as JSON")
+    merge_parser.add_argument("--junit", type=Path, metavar="FILE", help="Write the merged results as JUnit XML")
+    args = parser.parse_args()
+
+    if args.command == "merge":
+        sys.exit(run_merge(args))
+    if args.non_interactive or args.parallel or args.build_missing or args.shard or args.json or args.junit:
+        sys.exit(run_non_interactive(args))
+
     tester = DockerImageTester()
     tester.show_header()
     
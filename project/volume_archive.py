@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Compressed Volume Archives
+Streams a Docker volume or stored snapshot to a compressed tar archive and
+back, so VPS states can move between hosts. Data flows through fixed-size
+buffers between the helper container, the compressor and the archive file;
+nothing is staged in memory or on disk. Uses the zstd CLI (multi-threaded)
+when installed and falls back to in-process gzip.
+"""
+
+import os
+import gzip
+import time
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Callable, Optional
+
+from snapshot_store import HELPER_IMAGE, format_size
+
+PUMP_SIZE = 1024 * 1024  # 1 MiB
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_MAGIC = b"\x1f\x8b"
+DEFAULT_LEVELS = {"zstd": 3, "gzip": 6}
+EXTENSIONS = {"zstd": ".tar.zst", "gzip": ".tar.gz"}
+
+
+class ArchiveError(Exception):
+    """Raised when an archive cannot be written or read"""
+
+
+class TransferStats:
+    """Byte counts and timing for one export or import"""
+
+    def __init__(self, codec: str, level: int, threads: int):
+        self.codec = codec
+        self.level = level
+        self.threads = threads
+        self.raw_bytes = 0
+        self.archive_bytes = 0
+        self.elapsed = 0.0
+
+    @property
+    def ratio(self) -> float:
+        """Uncompressed size divided by archive size"""
+        return self.raw_bytes / self.archive_bytes if self.archive_bytes else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Uncompressed MB/s"""
+        return self.raw_bytes / (1024 * 1024) / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        level = f" level {self.level}" if self.level else ""
+        threads = f", {self.threads or 'all'} threads" if self.codec == "zstd" and self.level else ""
+        return (f"{self.codec}{level}{threads}: {format_size(self.raw_bytes)} -> "
+                f"{format_size(self.archive_bytes)} (ratio {self.ratio:.2f}x) "
+                f"in {self.elapsed:.1f}s, {self.throughput:.1f} MB/s")
+
+
+def zstd_available() -> bool:
+    return shutil.which("zstd") is not None
+
+
+def choose_codec(requested: str = "auto") -> str:
+    """Resolve 'auto' to zstd when the CLI is installed, otherwise gzip"""
+    if requested == "auto":
+        return "zstd" if zstd_available() else "gzip"
+    if requested == "zstd" and not zstd_available():
+        raise ArchiveError("zstd compression requested but the zstd command is not installed")
+    return requested
+
+
+def default_archive_path(distro_key: str, name: str, codec: str) -> Path:
+    return Path(f"{distro_key}-{name}{EXTENSIONS[codec]}")
+
+
+def detect_codec(path: Path) -> str:
+    """Identify an archive's compression from its magic bytes"""
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    if magic.startswith(ZSTD_MAGIC):
+        return "zstd"
+    if magic.startswith(GZIP_MAGIC):
+        return "gzip"
+    raise ArchiveError(f"{path} is not a zstd or gzip archive")
+
+
+class _CompressingWriter:
+    """File-like sink that compresses into an archive file and counts raw bytes"""
+
+    def __init__(self, path: Path, stats: TransferStats):
+        self.stats = stats
+        self._file = open(path, "wb")
+        self._process = None
+        if stats.codec == "zstd":
+            self._process = subprocess.Popen(
+                ["zstd", "-q", f"-{stats.level}", f"-T{stats.threads}", "-c", "-"],
+                stdin=subprocess.PIPE, stdout=self._file, stderr=subprocess.PIPE)
+            self._sink = self._process.stdin
+        else:
+            self._sink = gzip.GzipFile(fileobj=self._file, mode="wb", compresslevel=stats.level)
+
+    def write(self, data: bytes) -> int:
+        self._sink.write(data)
+        self.stats.raw_bytes += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        self._sink.flush()
+
+    def close(self) -> None:
+        try:
+            self._sink.close()
+            if self._process:
+                stderr = self._process.stderr.read().decode(errors="replace").strip()
+                if self._process.wait() != 0:
+                    raise ArchiveError(f"zstd failed: {stderr}")
+        finally:
+            self._file.close()
+
+
+class _DecompressingReader:
+    """File-like source that decompresses an archive file and counts raw bytes"""
+
+    def __init__(self, path: Path, stats: TransferStats):
+        self.stats = stats
+        self._process = None
+        if stats.codec == "zstd":
+            self._process = subprocess.Popen(
+                ["zstd", "-d", "-q", "-c", str(path)],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            self._source = self._process.stdout
+        else:
+            self._source = gzip.open(path, "rb")
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._source.read(size)
+        self.stats.raw_bytes += len(data)
+        return data
+
+    def close(self) -> None:
+        self._source.close()
+        if self._process:
+            stderr = self._process.stderr.read().decode(errors="replace").strip()
+            if self._process.wait() != 0:
+                raise ArchiveError(f"zstd failed: {stderr}")
+
+
+def _pump(source, sink) -> None:
+    while True:
+        data = source.read(PUMP_SIZE)
+        if not data:
+            break
+        sink.write(data)
+
+
+def export_archive(write_tar: Callable[[object], None], path: Path, codec: str = "auto",
+                   level: Optional[int] = None, threads: int = 0) -> TransferStats:
+    """Compress the tar stream produced by `write_tar(sink)` into `path`.
+
+    The archive is written to a .partial file and renamed when complete, so a
+    failed export never leaves a truncated archive behind.
+    """
+    codec = choose_codec(codec)
+    stats = TransferStats(codec, level if level is not None else DEFAULT_LEVELS[codec], threads)
+    path = Path(path)
+    partial = path.with_name(path.name + ".partial")
+    start = time.time()
+    writer = _CompressingWriter(partial, stats)
+    try:
+        try:
+            write_tar(writer)
+        finally:
+            writer.close()
+        os.replace(partial, path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    stats.elapsed = time.time() - start
+    stats.archive_bytes = path.stat().st_size
+    return stats
+
+
+def import_archive(read_tar: Callable[[object], None], path: Path) -> TransferStats:
+    """Decompress `path` and hand the tar stream to `read_tar(source)`"""
+    path = Path(path)
+    if not path.exists():
+        raise ArchiveError(f"Archive not found: {path}")
+    codec = detect_codec(path)
+    stats = TransferStats(codec, 0, 0)
+    stats.archive_bytes = path.stat().st_size
+    start = time.time()
+    reader = _DecompressingReader(path, stats)
+    try:
+        read_tar(reader)
+        # Drain trailing tar padding so the decompressor exits cleanly
+        while reader.read(PUMP_SIZE):
+            pass
+    finally:
+        reader.close()
+    stats.elapsed = time.time() - start
+    return stats
+
+
+def volume_tar_writer(volume: str) -> Callable[[object], None]:
+    """Return a write_tar callable that streams a volume out of a helper container"""
+    def write_tar(sink) -> None:
+        cmd = ["docker", "run", "--rm", "-v", f"{volume}:/source:ro", HELPER_IMAGE,
+               "tar", "-C", "/source", "-cf", "-", "."]
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            _pump(process.stdout, sink)
+        finally:
+            process.stdout.close()
+        stderr = process.stderr.read().decode(errors="replace").strip()
+        if process.wait() != 0:
+            raise ArchiveError(f"Failed to read volume {volume}: {stderr}")
+    return write_tar
+
+
+def volume_tar_reader(volume: str) -> Callable[[object], None]:
+    """Return a read_tar callable that extracts a tar stream into a volume"""
+    def read_tar(source) -> None:
+        cmd = ["docker", "run", "--rm", "-i", "-v", f"{volume}:/target", HELPER_IMAGE,
+               "tar", "--numeric-owner", "-C", "/target", "-xpf", "-"]
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            _pump(source, process.stdin)
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+        stderr = process.stderr.read().decode(errors="replace").strip()
+        if process.wait() != 0:
+            raise ArchiveError(f"Failed to extract into {volume}: {stderr}")
+    return read_tar
+
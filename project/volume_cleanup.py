@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Restore Volume Cleanup
+Restores leave volumes behind: the clone that was active before, its overlay
+upper (-rw) volume and the base volume a store snapshot was materialized
+into. This module works out which of a distribution's volumes are still
+needed, directly or as a lower layer of an overlay clone, and removes the rest.
+"""
+
+import json
+import subprocess
+from typing import Dict, Iterable, List, Optional, Set
+
+from docker_api import DockerAPIError, get_client
+from snapshot_index import KIND_VOLUME, SnapshotIndex
+from volume_state import VolumeState
+
+# Overlay lower dirs a clone may stack before a restore copies instead; the
+# whole chain has to fit into one page of mount options
+MAX_OVERLAY_DEPTH = 8
+# Automatic pre-restore snapshots kept per distribution
+PRE_RESTORE_KEEP = 3
+PRE_RESTORE_PREFIX = "pre-restore-"
+
+
+def overlay_layers(volume_info: Dict) -> List[str]:
+    """Host directories holding a volume's data, top-most first.
+
+    Overlay clones keep their data in an upper dir on top of their lower dirs,
+    so cloning a clone stacks the same directories rather than copying them.
+    """
+    options = volume_info.get("Options") or {}
+    if options.get("type") == "overlay":
+        opts = dict(item.split("=", 1) for item in options.get("o", "").split(",") if "=" in item)
+        return [opts["upperdir"]] + opts["lowerdir"].split(":")
+    return [volume_info["Mountpoint"]]
+
+
+def list_volumes(prefix: str) -> Dict[str, Dict]:
+    """Volumes whose name starts with prefix, with mountpoint and driver options"""
+    client = get_client()
+    if client:
+        try:
+            volumes = client.list_volumes(filters={"name": [prefix]})
+            return {v["Name"]: v for v in volumes if v["Name"].startswith(prefix)}
+        except (DockerAPIError, OSError):
+            pass
+    result = subprocess.run(["docker", "volume", "ls", "-q", "--filter", f"name={prefix}"],
+                            capture_output=True, text=True)
+    names = [name for name in result.stdout.split() if name.startswith(prefix)]
+    if result.returncode != 0 or not names:
+        return {}
+    result = subprocess.run(["docker", "volume", "inspect"] + names, capture_output=True, text=True)
+    try:
+        return {v["Name"]: v for v in json.loads(result.stdout)}
+    except ValueError:
+        return {}
+
+
+def remove_volume(name: str) -> bool:
+    client = get_client()
+    if client:
+        try:
+            client.remove_volume(name)
+            return True
+        except DockerAPIError as e:
+            if e.status in (404, 409):  # Gone, or still mounted by a container
+                return False
+        except OSError:
+            pass
+    return subprocess.run(["docker", "volume", "rm", name], capture_output=True).returncode == 0
+
+
+def _data_dirs(name: str, volumes: Dict[str, Dict]) -> List[str]:
+    """Host directories with data owned by a volume: its own, or an overlay clone's -rw volume"""
+    dirs = []
+    for volume in (name, f"{name}-rw"):
+        info = volumes.get(volume)
+        if info and (info.get("Options") or {}).get("type") != "overlay" and info.get("Mountpoint"):
+            dirs.append(info["Mountpoint"].rstrip("/"))
+    return dirs
+
+
+def live_volumes(distro_key: str, default_volume: str, state: VolumeState) -> Set[str]:
+    """The active volume plus every volume kept as a snapshot"""
+    live = {state.active_volume(distro_key, default_volume)}
+    live.update(row["location"] for row in state.retained() if row["distro"] == distro_key)
+    return live
+
+
+def _snapbase_current(name: str, distro_key: str, store) -> bool:
+    """Whether a <distro>-snapbase-<state>-<hash> volume still matches its store snapshot"""
+    state_name, _, content_hash = name[len(f"{distro_key}-snapbase-"):].rpartition("-")
+    if not state_name or not store.has_snapshot(distro_key, state_name):
+        return False
+    return store.load_manifest(distro_key, state_name)["content_hash"].startswith(content_hash)
+
+
+def prune_volumes(distro_key: str, default_volume: str, state: VolumeState, store,
+                  extra: Iterable[str] = ()) -> List[str]:
+    """Remove the distribution's superseded restore clones, their -rw volumes and stale
+    snapshot base volumes, plus any `extra` volumes; returns the names removed.
+
+    A volume stays while it is live or a live overlay clone still has one of
+    its directories among its layers.
+    """
+    volumes = list_volumes(f"{distro_key}-")
+    live = live_volumes(distro_key, default_volume, state)
+    in_use = [layer.rstrip("/") for name in live if name in volumes for layer in overlay_layers(volumes[name])]
+
+    candidates = [name for name in volumes
+                  if name.startswith(f"{distro_key}-restore-") and not name.endswith("-rw")]
+    candidates += [name for name in volumes
+                   if name.startswith(f"{distro_key}-snapbase-") and not _snapbase_current(name, distro_key, store)]
+    # Upper volumes whose clone is already gone
+    candidates += [name[:-3] for name in volumes
+                   if name.startswith(f"{distro_key}-restore-") and name.endswith("-rw") and name[:-3] not in volumes]
+    candidates += [name for name in extra if name in volumes]
+
+    removed = []
+    for name in dict.fromkeys(candidates):
+        if name in live:
+            continue
+        dirs = _data_dirs(name, volumes)
+        if any(layer == d or layer.startswith(d + "/") for layer in in_use for d in dirs):
+            continue
+        for volume in (name, f"{name}-rw"):
+            if volume in volumes and remove_volume(volume):
+                removed.append(volume)
+    return removed
+
+
+def forget_snapshot(distro_key: str, name: str, state: VolumeState, index: SnapshotIndex) -> Optional[str]:
+    """Drop a volume-backed snapshot from the index and retained list; returns its volume"""
+    row = index.get(distro_key, name)
+    index.remove(distro_key, name)
+    state.forget(distro_key, name)
+    return row["location"] if row and row["kind"] == KIND_VOLUME else None
+
+
+def trim_pre_restores(distro_key: str, state: VolumeState, index: SnapshotIndex,
+                      keep: int = PRE_RESTORE_KEEP) -> List[str]:
+    """Forget all but the newest `keep` pre-restore snapshots; returns their volumes"""
+    pre_restores = [row for row in index.query(distro_key, kind=KIND_VOLUME, descending=True)
+                    if row["name"].startswith(PRE_RESTORE_PREFIX)]
+    return [forget_snapshot(distro_key, row["name"], state, index) for row in pre_restores[keep:]]
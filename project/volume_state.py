@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Persistent Volume State
+Tracks which Docker volume each distribution's persistent mount currently
+points at, plus the volumes kept as automatic "pre-restore" snapshots, so a
+restore can re-point the compose mount instead of rewriting a volume.
+"""
+
+import os
+import json
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+STATE_DIR = Path(__file__).resolve().parent / ".vps-state"
+DEFAULT_STATE_FILE = STATE_DIR / "volumes.json"
+
+
+class VolumeState:
+    """JSON-backed record of active and retained persistent volumes"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else DEFAULT_STATE_FILE
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict:
+        if not self.path.exists():
+            return {"active": {}, "retained": [], "overlay_supported": None}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def _save(self, state: Dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def active_volume(self, distro_key: str, default: str) -> str:
+        """Volume currently mounted as the distribution's persistent data"""
+        with self._lock:
+            return self._load()["active"].get(distro_key, default)
+
+    def set_active(self, distro_key: str, volume: str) -> None:
+        with self._lock:
+            state = self._load()
+            state["active"][distro_key] = volume
+            self._save(state)
+
+    def retain(self, snapshot: Dict) -> None:
+        """Remember a volume kept as a snapshot (index row format)"""
+        with self._lock:
+            state = self._load()
+            state["retained"] = [s for s in state["retained"]
+                                 if (s["distro"], s["name"]) != (snapshot["distro"], snapshot["name"])]
+            state["retained"].append(snapshot)
+            self._save(state)
+
+    def forget(self, distro_key: str, name: str) -> None:
+        """Stop tracking a retained snapshot volume"""
+        with self._lock:
+            state = self._load()
+            state["retained"] = [s for s in state["retained"] if (s["distro"], s["name"]) != (distro_key, name)]
+            self._save(state)
+
+    def retained(self) -> List[Dict]:
+        with self._lock:
+            return list(self._load()["retained"])
+
+    @property
+    def overlay_supported(self) -> Optional[bool]:
+        """Whether the daemon accepted an overlay volume (None until first tried)"""
+        with self._lock:
+            return self._load().get("overlay_supported")
+
+    @overlay_supported.setter
+    def overlay_supported(self, value: bool) -> None:
+        with self._lock:
+            state = self._load()
+            state["overlay_supported"] = value
+            self._save(state)
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Warm Standby Pool
+Keeps pre-booted, SSH-ready standby containers per distribution and hands
+one out as a throwaway scratch VPS in well under a second. Standbys are plain
+`docker run` containers labelled vps.pool with an ephemeral loopback SSH port.
+They are not the compose services: no fixed 22xx/80xx ports, no static IP on
+vps-network and no data volume, so the launcher's fresh mode never uses them.
+The pool is refilled by a detached background process and records hit rate
+and time-to-ready metrics.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import argparse
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from docker_api import DockerAPIError, get_client
+from family_registry import REGISTRY
+from readiness import SSH_BANNER_PREFIXES, read_ssh_banner, wait_for_vps_ready
+
+PROJECT_DIR = Path(__file__).resolve().parent
+STATE_DIR = PROJECT_DIR / ".vps-state"
+METRICS_FILE = STATE_DIR / "warm-pool-metrics.json"
+POOL_LABEL = "vps.pool"
+CREATED_LABEL = "vps.pool.created"
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_AGE = 60 * 60  # Seconds a standby may sit idle before it is replaced
+MAX_SAMPLES = 200
+
+
+def pool_image(distro_key: str) -> str:
+    return f"vps-pool/{distro_key}:latest"
+
+
+def pool_prefix(distro_key: str) -> str:
+    return f"vps-pool-{distro_key}-"
+
+
+def scratch_name(distro_key: str) -> str:
+    return f"{distro_key}-scratch-{uuid.uuid4().hex[:6]}"
+
+
+def _docker(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(["docker"] + args, capture_output=True, text=True)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class PoolMetrics:
+    """Hit/miss counters and time-to-ready samples, persisted as JSON"""
+
+    def __init__(self, path: Path = METRICS_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+    def _update(self, distro_key: str, counter: str, sample_key: str, seconds: float) -> None:
+        with self._lock:
+            metrics = self._load()
+            entry = metrics.setdefault(distro_key, {"hits": 0, "misses": 0, "refills": 0,
+                                                    "hit_ready": [], "miss_ready": [], "boot_ready": []})
+            entry[counter] += 1
+            entry[sample_key] = (entry[sample_key] + [round(seconds, 3)])[-MAX_SAMPLES:]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(metrics, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def record_hit(self, distro_key: str, seconds: float) -> None:
+        self._update(distro_key, "hits", "hit_ready", seconds)
+
+    def record_miss(self, distro_key: str, seconds: float) -> None:
+        self._update(distro_key, "misses", "miss_ready", seconds)
+
+    def record_boot(self, distro_key: str, seconds: float) -> None:
+        self._update(distro_key, "refills", "boot_ready", seconds)
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per-distribution hit rate and median/p95 time-to-ready"""
+        result = {}
+        for distro_key, entry in sorted(self._load().items()):
+            requests = entry["hits"] + entry["misses"]
+            result[distro_key] = {
+                "hits": entry["hits"],
+                "misses": entry["misses"],
+                "hit_rate": entry["hits"] / requests if requests else 0.0,
+                "refills": entry["refills"],
+                "hit_p50": _percentile(entry["hit_ready"], 0.5),
+                "hit_p95": _percentile(entry["hit_ready"], 0.95),
+                "miss_p50": _percentile(entry["miss_ready"], 0.5),
+                "boot_p50": _percentile(entry["boot_ready"], 0.5),
+            }
+        return result
+
+
+class WarmPool:
+    """Standby containers for one distribution"""
+
+    def __init__(self, distro_key: str, size: int = DEFAULT_POOL_SIZE, max_age: float = DEFAULT_MAX_AGE,
+                 metrics: Optional[PoolMetrics] = None):
+        self.distro_key = distro_key
+        self.size = size
+        self.max_age = max_age
+        self.metrics = metrics or PoolMetrics()
+
+    def standbys(self) -> List[Dict]:
+        """Running standbys, oldest first: [{name, port, created}]"""
+        rows = []
+        client = get_client()
+        containers = None
+        if client:
+            try:
+                containers = [
+                    {"name": c["Names"][0].lstrip("/"), "labels": c.get("Labels") or {},
+                     "port": next((p.get("PublicPort") for p in c.get("Ports") or []
+                                   if p.get("PrivatePort") == 22 and p.get("PublicPort")), None)}
+                    for c in client.list_containers(filters={"label": [f"{POOL_LABEL}={self.distro_key}"],
+                                                             "status": ["running"]})
+                ]
+            except (DockerAPIError, OSError):
+                containers = None
+        if containers is None:
+            result = _docker(["ps", "--filter", f"label={POOL_LABEL}={self.distro_key}",
+                              "--format", "{{json .}}"])
+            containers = []
+            for line in result.stdout.splitlines() if result.returncode == 0 else []:
+                row = json.loads(line)
+                match = re.search(r":(\d+)->22/tcp", row.get("Ports", ""))
+                labels = dict(pair.split("=", 1) for pair in row.get("Labels", "").split(",") if "=" in pair)
+                containers.append({"name": row["Names"], "labels": labels,
+                                   "port": int(match.group(1)) if match else None})
+
+        for container in containers:
+            # Handed-out standbys keep their label but are renamed away from the prefix
+            if not container["name"].startswith(pool_prefix(self.distro_key)) or not container["port"]:
+                continue
+            rows.append({"name": container["name"], "port": container["port"],
+                         "created": float(container["labels"].get(CREATED_LABEL, 0))})
+        return sorted(rows, key=lambda row: row["created"])
+
+    def ensure_image(self, context_dir: Path) -> bool:
+        """Build (or reuse from cache) the standby image from the distro build context"""
+        result = _docker(["build", "-q", "-t", pool_image(self.distro_key), str(context_dir)])
+        return result.returncode == 0
+
+    def start_standby(self) -> Optional[str]:
+        """Boot one standby and wait until sshd answers; return its name"""
+        name = f"{pool_prefix(self.distro_key)}{uuid.uuid4().hex[:8]}"
+        start = time.time()
+        result = _docker([
+            "run", "-d", "--privileged", "--name", name, "--hostname", f"{self.distro_key}-vps",
+            "--label", f"{POOL_LABEL}={self.distro_key}", "--label", f"{CREATED_LABEL}={start:.0f}",
+            "-p", "127.0.0.1::22",
+            "-v", f"{PROJECT_DIR / 'shared'}:/home/vpsuser/shared",
+            "-v", f"{PROJECT_DIR / 'deployments'}:/home/vpsuser/deployments",
+            pool_image(self.distro_key),
+        ])
+        if result.returncode != 0:
+            return None
+        port = next((s["port"] for s in self.standbys() if s["name"] == name), None)
+        if not port or not wait_for_vps_ready(name, port, timeout=180):
+            _docker(["rm", "-f", name])
+            return None
+        self.metrics.record_boot(self.distro_key, time.time() - start)
+        return name
+
+    def prune(self) -> int:
+        """Remove standbys idle longer than max_age or no longer answering SSH"""
+        removed = 0
+        for standby in self.standbys():
+            expired = time.time() - standby["created"] > self.max_age
+            if expired or not self._answers(standby["port"]):
+                _docker(["rm", "-f", standby["name"]])
+                removed += 1
+        return removed
+
+    def refill(self, context_dir: Path) -> int:
+        """Prune, then boot standbys until the pool is full; return how many started.
+
+        A lock file keeps overlapping background refills from overfilling the pool.
+        """
+        lock_path = STATE_DIR / f"warm-pool-{self.distro_key}.lock"
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        if lock_path.exists() and time.time() - lock_path.stat().st_mtime > 600:
+            lock_path.unlink(missing_ok=True)  # Left behind by a crashed refill
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            return 0
+
+        try:
+            self.prune()
+            missing = self.size - len(self.standbys())
+            if missing <= 0 or not self.ensure_image(context_dir):
+                return 0
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(self.start_standby()))
+                       for _ in range(missing)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return sum(1 for name in results if name)
+        finally:
+            lock_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _answers(port: int) -> bool:
+        banner = read_ssh_banner("127.0.0.1", port, timeout=1.0)
+        return bool(banner and banner.startswith(SSH_BANNER_PREFIXES))
+
+    def acquire(self, container_name: str) -> Optional[int]:
+        """Hand out the oldest healthy standby renamed to container_name; return its SSH port.
+
+        container_name must not be a compose service's container name: a standby
+        lacks the service's ports, network address and volumes.
+        """
+        start = time.time()
+        for standby in self.standbys():
+            if time.time() - standby["created"] > self.max_age or not self._answers(standby["port"]):
+                _docker(["rm", "-f", standby["name"]])
+                continue
+            if _docker(["rename", standby["name"], container_name]).returncode == 0:
+                self.metrics.record_hit(self.distro_key, time.time() - start)
+                return standby["port"]
+        return None
+
+    def take(self, context_dir: Path) -> Optional[Dict]:
+        """A scratch VPS: a pooled standby if one is ready, else one booted now (a miss)"""
+        name = scratch_name(self.distro_key)
+        port = self.acquire(name)
+        if port is None:
+            start = time.time()
+            if not self.ensure_image(context_dir):
+                return None
+            standby = self.start_standby()
+            if not standby or _docker(["rename", standby, name]).returncode != 0:
+                return None
+            self.metrics.record_miss(self.distro_key, time.time() - start)
+            port = self._port_of(name)
+        return {"name": name, "port": port}
+
+    def _port_of(self, container_name: str) -> Optional[int]:
+        result = _docker(["port", container_name, "22/tcp"])
+        if result.returncode != 0:
+            return None
+        match = re.search(r":(\d+)$", result.stdout.strip().split("\n")[0])
+        return int(match.group(1)) if match else None
+
+    def refill_in_background(self) -> None:
+        """Start a detached refill process that outlives the launcher"""
+        cmd = [sys.executable, str(Path(__file__).resolve()), "refill", self.distro_key,
+               "--size", str(self.size), "--max-age", str(int(self.max_age))]
+        kwargs = {"start_new_session": True} if os.name != "nt" else {
+            "creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+        subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL, cwd=str(PROJECT_DIR), **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm standby container pool")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    refill_parser = subparsers.add_parser("refill", help="Top up the pool for a distribution")
+    refill_parser.add_argument("distro")
+    refill_parser.add_argument("--size", type=int, default=DEFAULT_POOL_SIZE)
+    refill_parser.add_argument("--max-age", type=int, default=DEFAULT_MAX_AGE, help="Seconds")
+
+    take_parser = subparsers.add_parser("take", help="Hand out a throwaway scratch VPS and refill in the background")
+    take_parser.add_argument("distro")
+    take_parser.add_argument("--size", type=int, default=DEFAULT_POOL_SIZE)
+    take_parser.add_argument("--max-age", type=int, default=DEFAULT_MAX_AGE, help="Seconds")
+
+    list_parser = subparsers.add_parser("list", help="Show standby containers")
+    list_parser.add_argument("distro")
+
+    drain_parser = subparsers.add_parser("drain", help="Remove all standbys for a distribution")
+    drain_parser.add_argument("distro")
+
+    subparsers.add_parser("stats", help="Show hit rate and time-to-ready metrics")
+
+    args = parser.parse_args()
+
+    if args.action == "refill":
+        pool = WarmPool(args.distro, args.size, args.max_age)
+        distro = REGISTRY.distribution(args.distro)
+        if not distro:
+            print(f"Unknown distribution: {args.distro}")
+            sys.exit(1)
+        pool.refill(Path(distro["context_dir"]))
+        print(f"{args.distro}: {len(pool.standbys())}/{args.size} standbys ready")
+    elif args.action == "take":
+        distro = REGISTRY.distribution(args.distro)
+        if not distro:
+            print(f"Unknown distribution: {args.distro}")
+            sys.exit(1)
+        pool = WarmPool(args.distro, args.size, args.max_age)
+        scratch = pool.take(Path(distro["context_dir"]))
+        pool.refill_in_background()
+        if not scratch:
+            print(f"Could not start a {args.distro} standby")
+            sys.exit(1)
+        print(f"Scratch VPS {scratch['name']}: ssh vpsuser@localhost -p {scratch['port']}")
+        print(f"Remove it with: docker rm -f {scratch['name']}")
+    elif args.action == "list":
+        for standby in WarmPool(args.distro).standbys():
+            age = time.time() - standby["created"]
+            print(f"{standby['name']:<32} port {standby['port']:<6} idle {age / 60:.1f} min")
+    elif args.action == "drain":
+        standbys = WarmPool(args.distro).standbys()
+        for standby in standbys:
+            _docker(["rm", "-f", standby["name"]])
+        print(f"Removed {len(standbys)} standbys")
+    elif args.action == "stats":
+        summary = PoolMetrics().summary()
+        if not summary:
+            print("No warm pool activity recorded yet")
+            return
+        print(f"{'Distro':<12} {'Hits':>5} {'Miss':>5} {'Hit rate':>9} {'Hit p50':>8} {'Hit p95':>8} "
+              f"{'Miss p50':>9} {'Boot p50':>9}")
+        for distro_key, row in summary.items():
+            print(f"{distro_key:<12} {row['hits']:>5} {row['misses']:>5} {row['hit_rate']:>8.0%} "
+                  f"{row['hit_p50']:>7.2f}s {row['hit_p95']:>7.2f}s {row['miss_p50']:>8.1f}s {row['boot_p50']:>8.1f}s")
+
+
+if __name__ == "__main__":
+    main()